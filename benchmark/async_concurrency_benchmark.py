@@ -0,0 +1,90 @@
+"""
+Created to benchmark sequential sync requests against concurrent AsyncOnvifService requests across many devices.
+The fake SOAP server answers every request after a fixed latency, like a camera on the network.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from lxml import etree
+
+# setting path
+parent_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_directory)
+
+from lib.onvif import get_service_proxy
+from lib.async_onvif import AsyncOnvifService
+from zeep.wsse.username import UsernameToken
+
+WSDL_DIRECTORY = parent_directory + "/wsdl"
+# one token per device as OnvifService keeps it, the proxy registry is keyed by the token
+USERNAME_TOKEN = UsernameToken("admin","12345",use_digest=True)
+SOAP_ENV_NS = "http://www.w3.org/2003/05/soap-envelope"
+PTZ_BINDING = "{http://www.onvif.org/ver20/ptz/wsdl}PTZBinding"
+LATENCY = 0.02
+DEVICE_COUNTS = (1, 10, 50, 100)
+
+async def handle_connection(reader : asyncio.StreamReader,writer : asyncio.StreamWriter) -> None:
+    """
+    Keep-alive HTTP/1.1 connection answering every SOAP request with an empty <Operation>Response element.
+    """
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            headers = {line.split(b":", 1)[0].strip().lower(): line.split(b":", 1)[1].strip() for line in head.split(b"\r\n")[1:] if b":" in line}
+            body = await reader.readexactly(int(headers.get(b"content-length", 0)))
+            operation = etree.fromstring(body).find("{%s}Body" % SOAP_ENV_NS)[0]
+            qname = etree.QName(operation)
+            response = f'<s:Envelope xmlns:s="{SOAP_ENV_NS}"><s:Body><r:{qname.localname}Response xmlns:r="{qname.namespace}"/></s:Body></s:Envelope>'.encode()
+            await asyncio.sleep(LATENCY)
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/soap+xml; charset=utf-8\r\nContent-Length: " + str(len(response)).encode() + b"\r\n\r\n" + response)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+def start_server() -> int:
+    ready = threading.Event()
+    port = []
+    async def serve():
+        server = await asyncio.start_server(handle_connection, "127.0.0.1", 0, backlog=1024)
+        port.append(server.sockets[0].getsockname()[1])
+        ready.set()
+        await server.serve_forever()
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return port[0]
+
+def run_sync(xaddrs : list) -> float:
+    start = time.perf_counter()
+    for xaddr in xaddrs:
+        proxy = get_service_proxy(wsdl_URL=WSDL_DIRECTORY + "/ptz.wsdl",binding=PTZ_BINDING,xaddr=xaddr,username_token=USERNAME_TOKEN)
+        proxy.GetStatus(ProfileToken="Profile_1")
+    return time.perf_counter() - start
+
+async def run_async(devices : list,xaddrs : list) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(device.get_async_service_proxy(wsdl_URL=WSDL_DIRECTORY + "/ptz.wsdl",binding=PTZ_BINDING,xaddr=xaddr).GetStatus(ProfileToken="Profile_1")
+                           for device, xaddr in zip(devices, xaddrs)))
+    return time.perf_counter() - start
+
+async def main(port : int) -> None:
+    print(f"{'devices':<10}{'sync [ms]':>12}{'async [ms]':>12}{'speedup':>10}")
+    for count in DEVICE_COUNTS:
+        xaddrs = [f"http://127.0.0.1:{port}/onvif/{index}/ptz_service" for index in range(count)]
+        devices = [AsyncOnvifService(ip="127.0.0.1",port=port,wsdldirectory=WSDL_DIRECTORY) for _ in range(count)]
+        # warm up the proxies and connections of both sides
+        run_sync(xaddrs)
+        await run_async(devices, xaddrs)
+        sync_time = run_sync(xaddrs)
+        async_time = await run_async(devices, xaddrs)
+        print(f"{count:<10}{sync_time * 1000:>12.1f}{async_time * 1000:>12.1f}{sync_time / async_time:>9.1f}x")
+        await asyncio.gather(*(device.close() for device in devices))
+
+if __name__ == "__main__":
+    asyncio.run(main(start_server()))
@@ -0,0 +1,53 @@
+"""
+Created to benchmark the bounded EventBus against an unbounded queue.Queue during an alarm storm,
+many cameras report motion state changes faster than one slow consumer reads them.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import os
+import queue
+import sys
+import time
+import tracemalloc
+
+# setting path
+parent_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_directory)
+
+from lib.event_bus import EventBus
+from lib.params.event_request_params import EventRequestParams
+
+CAMERAS = 500
+ROUNDS = 100
+TOPICS = ("tns1:RuleEngine/CellMotionDetector/Motion", "tns1:VideoSource/MotionAlarm", "tns1:Device/Trigger/DigitalInput")
+
+def create_message(topic : str,round_index : int) -> EventRequestParams.NotificationMessage:
+    source = EventRequestParams.SimpleItem(name = "VideoSourceToken",value = "VideoSource_1")
+    return EventRequestParams.NotificationMessage(source = source,data = EventRequestParams.SimpleItem(name = "State",value = "true" if round_index % 2 else "false"),
+                                                  topic = topic,message = {"PropertyOperation": "Changed"},source_items = [source])
+
+def run_storm(event_queue) -> tuple:
+    """
+    Puts ROUNDS state changes of every topic and camera, the consumer reads one message per camera round.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    for round_index in range(ROUNDS):
+        for camera in range(CAMERAS):
+            for topic in TOPICS:
+                event_queue.put((f"10.0.{camera // 256}.{camera % 256}:80", create_message(topic, round_index)))
+        event_queue.get()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, event_queue.qsize()
+
+if __name__ == "__main__":
+    print(f"{'queue':<28}{'time [s]':>10}{'peak [MB]':>11}{'buffered':>10}")
+    for name, event_queue in (("queue.Queue", queue.Queue()),
+                              ("EventBus drop_oldest", EventBus(capacity = 1000)),
+                              ("EventBus coalesce", EventBus(capacity = 1000,coalesce = True))):
+        elapsed, peak, size = run_storm(event_queue)
+        print(f"{name:<28}{elapsed:>10.2f}{peak / 1024 / 1024:>11.1f}{size:>10}")
+        if isinstance(event_queue, EventBus): print(f"    {event_queue.get_stats()}")
@@ -0,0 +1,100 @@
+"""
+Created to benchmark the streaming PullMessages parser against the former ElementTree parser
+on synthetic responses of 1024 messages, the MessageLimit main.py pulls with.
+
+The streaming parser gains on the time to the first message and on the peak memory, its total parse time is within
+the run to run noise of the ElementTree parser. Times are the median of REPEATS rounds.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import datetime
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+# setting path
+parent_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_directory)
+
+from lib.params.event_request_params import EventRequestParams
+from lib.services.event_service import pull_response_parser, iter_pull_messages
+
+MESSAGE_LIMIT = 1024
+REPEATS = 20
+
+NOTIFICATION_MESSAGE = """<wsnt:NotificationMessage>
+<wsnt:Topic Dialect="http://www.onvif.org/ver10/tev/topicExpression/ConcreteSet">tns1:RuleEngine/CellMotionDetector/Motion</wsnt:Topic>
+<wsnt:Message><tt:Message UtcTime="2026-10-18T10:00:{second:02d}Z" PropertyOperation="Changed">
+<tt:Source><tt:SimpleItem Name="VideoSourceConfigurationToken" Value="VideoSourceToken"/><tt:SimpleItem Name="VideoAnalyticsConfigurationToken" Value="VideoAnalyticsToken"/><tt:SimpleItem Name="Rule" Value="MyMotionDetectorRule"/></tt:Source>
+<tt:Key><tt:SimpleItem Name="ObjectId" Value="{index}"/></tt:Key>
+<tt:Data><tt:SimpleItem Name="IsMotion" Value="{motion}"/><tt:ElementItem Name="Region"><tt:Polygon><tt:Point x="0.1" y="0.1"/><tt:Point x="0.9" y="0.9"/></tt:Polygon></tt:ElementItem></tt:Data>
+</tt:Message></wsnt:Message>
+</wsnt:NotificationMessage>"""
+
+def create_payload(message_count : int) -> bytes:
+    messages = "".join(NOTIFICATION_MESSAGE.format(second=index % 60,index=index,motion="true" if index % 2 else "false") for index in range(message_count))
+    return ('<?xml version="1.0" encoding="UTF-8"?>'
+            '<env:Envelope xmlns:env="http://www.w3.org/2003/05/soap-envelope" xmlns:tev="http://www.onvif.org/ver10/events/wsdl" '
+            'xmlns:wsnt="http://docs.oasis-open.org/wsn/b-2" xmlns:tt="http://www.onvif.org/ver10/schema"><env:Body><tev:PullMessagesResponse>'
+            '<tev:CurrentTime>2026-10-18T10:00:00Z</tev:CurrentTime><tev:TerminationTime>2026-10-18T10:01:00Z</tev:TerminationTime>'
+            + messages + '</tev:PullMessagesResponse></env:Body></env:Envelope>').encode("utf-8")
+
+def element_tree_parser(pull_response_xml : str) -> list:
+    # the parser before the streaming one, first SimpleItem of Source and Data only
+    tree = ET.fromstring(pull_response_xml)
+    datetime.datetime.strptime(tree.find('.//{http://www.onvif.org/ver10/events/wsdl}CurrentTime').text, '%Y-%m-%dT%H:%M:%SZ')
+    datetime.datetime.strptime(tree.find('.//{http://www.onvif.org/ver10/events/wsdl}TerminationTime').text, '%Y-%m-%dT%H:%M:%SZ')
+    messages = []
+    for notif_mes in tree.findall('.//{http://docs.oasis-open.org/wsn/b-2}NotificationMessage'):
+        message = EventRequestParams.NotificationMessage(source=EventRequestParams.SimpleItem,data=EventRequestParams.SimpleItem)
+        message.Topic = notif_mes.find('.//{http://docs.oasis-open.org/wsn/b-2}Topic').text
+        mes = notif_mes.find('.//{http://docs.oasis-open.org/wsn/b-2}Message').find('.//{http://www.onvif.org/ver10/schema}Message')
+        message.Message = mes.attrib
+        source = mes.find('.//{http://www.onvif.org/ver10/schema}Source').find(".//{http://www.onvif.org/ver10/schema}SimpleItem").attrib
+        message.Source = EventRequestParams.SimpleItem(name = source["Name"],value=source["Value"])
+        data = mes.find('.//{http://www.onvif.org/ver10/schema}Data').find(".//{http://www.onvif.org/ver10/schema}SimpleItem").attrib
+        message.Data = EventRequestParams.SimpleItem(name = data["Name"],value=data["Value"])
+        messages.append(message)
+    return messages
+
+def median_time(parse) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        parse()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def measure(parse) -> tuple:
+    elapsed = median_time(parse)
+    tracemalloc.start()
+    parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def first_message_time(parse) -> float:
+    return median_time(parse)
+
+if __name__ == "__main__":
+    # the parser logs every response, it would be measured with the parse time
+    logging.disable(logging.INFO)
+    payload = create_payload(MESSAGE_LIMIT)
+    payload_text = payload.decode("utf-8")
+    pull_response = pull_response_parser(payload)
+    assert len(pull_response.NotificationMessage) == MESSAGE_LIMIT
+    assert len(pull_response.NotificationMessage[0].SourceItems) == 3 and len(pull_response.NotificationMessage[0].ElementItems) == 1
+
+    rows = [
+        ("ElementTree", measure(lambda: element_tree_parser(payload_text)), first_message_time(lambda: element_tree_parser(payload_text)[0])),
+        ("streaming", measure(lambda: pull_response_parser(payload)), first_message_time(lambda: next(iter_pull_messages(payload)))),
+    ]
+    print(f"{MESSAGE_LIMIT} messages, {len(payload) / 1024:.0f} KB payload")
+    print(f"{'parser':<14}{'total [ms]':>12}{'per message [us]':>18}{'first message [ms]':>20}{'peak [KB]':>12}")
+    for name, (elapsed, peak), first_time in rows:
+        print(f"{name:<14}{elapsed * 1000:>12.2f}{elapsed / MESSAGE_LIMIT * 1e6:>18.2f}{first_time * 1000:>20.3f}{peak / 1024:>12.0f}")
@@ -0,0 +1,182 @@
+"""
+Created to benchmark the service wrappers against simulated cameras and to catch latency and allocation regressions.
+
+Every case measures latency percentiles, throughput and the memory peak and retained memory of one call. Results are written as json,
+a previous result file given with --compare fails the run when a case became slower than --threshold times.
+The service wrappers log a failed call and return a default value, the logged errors of a case are counted and fail the run.
+
+    python benchmark/service_benchmark_suite.py --output results.json
+    python benchmark/service_benchmark_suite.py --compare results.json --threshold 1.25
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+# setting path
+parent_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_directory)
+
+from simulator.onvif_simulator import OnvifSimulator
+from lib.onvif import OnvifService, clear_service_proxies, get_service_proxy
+from lib.params.media_request_params import MediaEnumParams, MediaRequestParams
+from lib.params.ptz_request_params import PTZRequestParams
+from lib.requests_messages.media_request_messages import MediaRequestMessages
+from lib.requests_messages.ptz_request_messages import PTZRequestMessages
+from lib.services.analytics_service import AnalyticsService
+from lib.services.event_service import EventService
+from lib.services.image_service import ImageService
+from lib.services.media_service import MediaService
+from lib.services.ptz_service import PTZService
+import zeep
+
+WSDL_DIRECTORY = parent_directory + "/wsdl"
+WARMUP = 5
+ROUNDS = 100
+ALLOCATION_ROUNDS = 5
+
+class ErrorCounter(logging.Handler):
+    """
+    Counts the ERROR records of the library loggers, they propagate to the root logger.
+    """
+    def __init__(self) -> None:
+        super().__init__(level = logging.ERROR)
+        self.count = 0
+
+    def emit(self,record) -> None:
+        self.count += 1
+
+ERROR_COUNTER = ErrorCounter()
+
+def measure(name : str,function,rounds = ROUNDS,warmup = WARMUP) -> dict:
+    """
+    Runs the function warmup + rounds times.
+    - return:
+        - result [dict] : name, rounds, mean_ms, p50_ms, p95_ms, min_ms, max_ms, ops_per_s, peak_kb (memory peak of one call),
+                          retained_kb (memory kept per call) and errors (logged errors of every call of the case)
+    """
+    error_count = ERROR_COUNTER.count
+    for _ in range(warmup): function()
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    # the peak is measured without snapshots, they are traced memory themselves
+    tracemalloc.start()
+    peak = 0
+    for _ in range(ALLOCATION_ROUNDS):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        function()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    snapshot = tracemalloc.take_snapshot()
+    for _ in range(ALLOCATION_ROUNDS): function()
+    retained = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(snapshot, "filename"))
+    tracemalloc.stop()
+    times.sort()
+    return {"name": name, "rounds": rounds, "mean_ms": statistics.fmean(times) * 1000, "p50_ms": times[len(times) // 2] * 1000,
+            "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))] * 1000, "min_ms": times[0] * 1000, "max_ms": times[-1] * 1000,
+            "ops_per_s": len(times) / sum(times), "peak_kb": peak / 1024, "retained_kb": retained / ALLOCATION_ROUNDS / 1024,
+            "errors": ERROR_COUNTER.count - error_count}
+
+def create_cases(camera) -> list:
+    """
+    Returns (name, function, rounds) of the benchmarked calls of one connected simulated camera.
+    """
+    def connect(concurrent : bool):
+        onvif_service = OnvifService(ip = camera.host,username = "admin",password = "admin",port = camera.port,wsdldirectory = WSDL_DIRECTORY)
+        onvif_service.connect_onvif(concurrent = concurrent)
+        assert onvif_service.get_con_status() and onvif_service.profiles
+        return onvif_service
+
+    onvif_service = connect(False)
+    media_service = MediaService(onvif_service = onvif_service)
+    ptz_service = PTZService(onvif_service = onvif_service)
+    image_service = ImageService(onvif_service = onvif_service)
+    event_service = EventService(onvif_service = onvif_service)
+    analytics_service = AnalyticsService(onvif_service = onvif_service)
+    profile_token = onvif_service.get_first_profile().token
+    stream_uri_message = MediaRequestMessages.GetStreamUriMessage(profile_token = profile_token,
+        stream_setup = MediaRequestParams.StreamSetup(stream = MediaEnumParams.StreamType.Unicast,transport = MediaRequestParams.Transport(protocol = MediaEnumParams.TransportProtocol.RTSP)))
+    move_message = PTZRequestMessages.ContinuousMoveRequestMessage(profile_token = profile_token,
+        velocity = PTZRequestParams.PTZSpeed(pantilt = PTZRequestParams.Vector2D("http://www.onvif.org/ver10/tptz/PanTiltSpaces/VelocityGenericSpace",0.5,-0.5)))
+    subscription = event_service.CreatePullPointSubscription()
+    pull_point_address = subscription.SubscriptionReference.Address._value_1
+
+    def cold_service_proxy():
+        # client construction of a new device, the parsed wsdl documents stay cached
+        clear_service_proxies()
+        get_service_proxy(wsdl_URL = WSDL_DIRECTORY + "/media.wsdl",binding = "{http://www.onvif.org/ver10/media/wsdl}MediaBinding",xaddr = camera.get_xaddr("media_service"),
+                          username_token = onvif_service.get_username_token())
+
+    def pull_messages():
+        response = event_service.PullMessages(address = pull_point_address,timeout = "PT1S",message_limit = 1024)
+        assert response != {}
+
+    return [
+        ("OnvifService.connect_onvif", lambda: connect(False), 20),
+        ("OnvifService.connect_onvif(concurrent)", lambda: connect(True), 20),
+        ("get_service_proxy (cold)", cold_service_proxy, 50),
+        ("MediaService.GetStreamUri", lambda: media_service.GetStreamUri(stream_uri_message,use_cache = False), ROUNDS),
+        ("MediaService.GetStreamUri (cached)", lambda: media_service.GetStreamUri(stream_uri_message), ROUNDS),
+        ("MediaService.GetSnapshotUri", lambda: media_service.GetSnapshotUri(profile_token = profile_token,use_cache = False), ROUNDS),
+        ("MediaService.GetSnapshotUri (cached)", lambda: media_service.GetSnapshotUri(profile_token = profile_token), ROUNDS),
+        ("PTZService.ContinuousMove", lambda: ptz_service.ContinuousMove(move_message), ROUNDS),
+        ("PTZService.GetStatus", lambda: ptz_service.GetStatus(profile_token = profile_token), ROUNDS),
+        ("ImageService.GetImagingSettings", lambda: image_service.GetImagingSettings(), ROUNDS),
+        ("EventService.PullMessages", pull_messages, ROUNDS),
+        ("AnalyticsService.GetRules", lambda: analytics_service.GetRules(configuration_token = "VideoAnalyticsToken"), ROUNDS),
+    ]
+
+def compare_results(results : list,baseline_path : str,threshold : float) -> list:
+    """
+    Returns the names of the cases whose p50 latency is more than threshold times the baseline.
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = {result["name"]: result for result in json.load(baseline_file)["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["name"])
+        if previous != None and result["p50_ms"] > previous["p50_ms"] * threshold:
+            regressions.append(f'{result["name"]}: p50 {previous["p50_ms"]:.2f} -> {result["p50_ms"]:.2f} ms')
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Service wrapper benchmarks against a simulated camera")
+    parser.add_argument("--output", help = "json result file")
+    parser.add_argument("--compare", help = "json result file of a previous run")
+    parser.add_argument("--threshold", type = float, default = 1.25, help = "allowed p50 slowdown against --compare")
+    parser.add_argument("--filter", default = "", help = "only run the cases whose name contains the text")
+    parser.add_argument("--latency", type = float, default = 0.0, help = "simulated camera latency in seconds")
+    args = parser.parse_args()
+    # the service loggers write every request to the console, it would dominate the measured time; errors are shown and counted
+    logging.disable(logging.WARNING)
+    logging.getLogger().addHandler(ERROR_COUNTER)
+
+    simulator = OnvifSimulator()
+    camera = simulator.start(camera_count = 1,latency = args.latency,event_rate = 1000.0)[0]
+    results = [measure(name, function, rounds = rounds) for name, function, rounds in create_cases(camera) if args.filter in name]
+    simulator.stop()
+
+    print(f"{'case':<40}{'p50 [ms]':>10}{'p95 [ms]':>10}{'ops/s':>10}{'peak [KB]':>11}{'retained [KB]':>15}{'errors':>8}")
+    for result in results:
+        print(f"{result['name']:<40}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['ops_per_s']:>10.0f}{result['peak_kb']:>11.1f}{result['retained_kb']:>15.2f}{result['errors']:>8}")
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"python": platform.python_version(), "zeep": zeep.__version__, "platform": platform.platform(), "time": time.time(), "results": results}, output_file, indent = 2)
+    failed_cases = [result["name"] for result in results if result["errors"]]
+    for name in failed_cases: print(f"FAILED {name}: the calls logged errors, its timing is not the one of the operation")
+    regressions = []
+    if args.compare:
+        regressions = compare_results(results, args.compare, args.threshold)
+        for regression in regressions: print(f"REGRESSION {regression}")
+    sys.exit(1 if regressions or failed_cases else 0)
@@ -0,0 +1,77 @@
+"""
+Created to benchmark the service proxy registry against per call client construction.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from lxml import etree
+
+# setting path
+parent_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_directory)
+
+from lib.onvif import SETTINGS, get_service_proxy
+from zeep.client import CachingClient
+from zeep.plugins import HistoryPlugin
+from zeep.wsse.username import UsernameToken
+
+WSDL_DIRECTORY = parent_directory + "/wsdl"
+# one token per device as OnvifService keeps it, the proxy registry is keyed by the token
+USERNAME_TOKEN = UsernameToken("admin","12345",use_digest=True)
+SOAP_ENV_NS = "http://www.w3.org/2003/05/soap-envelope"
+ROUNDS = 50
+
+class StubSoapHandler(BaseHTTPRequestHandler):
+    """
+    Answers every SOAP request with an empty <Operation>Response element of the request namespace.
+    """
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        operation = etree.fromstring(body).find("{%s}Body" % SOAP_ENV_NS)[0]
+        qname = etree.QName(operation)
+        response = f'<s:Envelope xmlns:s="{SOAP_ENV_NS}"><s:Body><r:{qname.localname}Response xmlns:r="{qname.namespace}"/></s:Body></s:Envelope>'.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/soap+xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+def run_before(wsdl_URL : str,binding : str,xaddr : str,operation : str,**kwargs) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        # per call construction as it was done before the proxy registry
+        client = CachingClient(wsdl=wsdl_URL,wsse=UsernameToken("admin","12345",use_digest=True),settings=SETTINGS,plugins=[HistoryPlugin()])
+        getattr(client.create_service(binding, xaddr), operation)(**kwargs)
+    return (time.perf_counter() - start) / ROUNDS
+
+def run_after(wsdl_URL : str,binding : str,xaddr : str,operation : str,**kwargs) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        proxy = get_service_proxy(wsdl_URL=wsdl_URL,binding=binding,xaddr=xaddr,username_token=USERNAME_TOKEN)
+        getattr(proxy, operation)(**kwargs)
+    return (time.perf_counter() - start) / ROUNDS
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSoapHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_xaddr = f"http://127.0.0.1:{server.server_port}/onvif"
+
+    cases = [
+        ("PTZ ContinuousMove", WSDL_DIRECTORY + "/ptz.wsdl", "{http://www.onvif.org/ver20/ptz/wsdl}PTZBinding", base_xaddr + "/ptz_service", "ContinuousMove",
+            {"ProfileToken": "Profile_1", "Velocity": {"PanTilt": {"x": 0.5, "y": -0.5}}}),
+        ("Media GetProfiles", WSDL_DIRECTORY + "/media.wsdl", "{http://www.onvif.org/ver10/media/wsdl}MediaBinding", base_xaddr + "/media_service", "GetProfiles", {}),
+    ]
+    print(f"{'operation':<20}{'before [ms]':>14}{'after [ms]':>14}{'speedup':>10}")
+    for name, wsdl_URL, binding, xaddr, operation, kwargs in cases:
+        before = run_before(wsdl_URL, binding, xaddr, operation, **kwargs)
+        after = run_after(wsdl_URL, binding, xaddr, operation, **kwargs)
+        print(f"{name:<20}{before * 1000:>14.2f}{after * 1000:>14.2f}{before / after:>9.1f}x")
+    server.shutdown()
@@ -0,0 +1,59 @@
+"""
+Created to benchmark pooled keep-alive device transports against a new connection per request.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import os
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+# setting path
+parent_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_directory)
+
+from service_proxy_benchmark import StubSoapHandler
+from lib.onvif import get_service_proxy, set_transport_options, close_device_transports
+from zeep.wsse.username import UsernameToken
+
+WSDL_DIRECTORY = parent_directory + "/wsdl"
+# one token per device as OnvifService keeps it, the proxy registry is keyed by the token
+USERNAME_TOKEN = UsernameToken("admin","12345",use_digest=True)
+ROUNDS = 200
+CONNECTIONS = [0]
+
+class KeepAliveStubSoapHandler(StubSoapHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, avoid the delayed ack stall on kept alive sockets
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        CONNECTIONS[0] += 1
+        super().setup()
+
+def run_control_loop(base_xaddr : str) -> float:
+    """
+    PTZ control loop as a client would run it, moves and status requests of one device.
+    """
+    start = time.perf_counter()
+    for index in range(ROUNDS):
+        ptz = get_service_proxy(wsdl_URL=WSDL_DIRECTORY + "/ptz.wsdl",binding="{http://www.onvif.org/ver20/ptz/wsdl}PTZBinding",xaddr=base_xaddr + "/ptz_service",username_token=USERNAME_TOKEN)
+        if index % 2: ptz.GetStatus(ProfileToken="Profile_1")
+        else: ptz.ContinuousMove(ProfileToken="Profile_1",Velocity={"PanTilt": {"x": 0.5, "y": -0.5}})
+    return (time.perf_counter() - start) / ROUNDS
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveStubSoapHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_xaddr = f"http://127.0.0.1:{server.server_port}/onvif"
+    print(f"{'transport':<24}{'per call [ms]':>14}{'connections':>13}")
+    for name, keep_alive in (("connection per request", False), ("pooled keep-alive", True)):
+        set_transport_options(keep_alive=keep_alive)
+        # transports are created with the proxies, start both cases from an empty registry
+        close_device_transports()
+        CONNECTIONS[0] = 0
+        per_call = run_control_loop(base_xaddr)
+        print(f"{name:<24}{per_call * 1000:>14.2f}{CONNECTIONS[0]:>13}")
+    server.shutdown()
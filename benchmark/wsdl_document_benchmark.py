@@ -0,0 +1,51 @@
+"""
+Created to benchmark per camera memory with the shared WSDL document store.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+# setting path
+parent_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_directory)
+
+from lib.onvif import SETTINGS, get_service_proxy, get_wsdl_document
+from zeep.client import CachingClient
+from zeep.plugins import HistoryPlugin
+from zeep.wsse.username import UsernameToken
+
+WSDL_DIRECTORY = parent_directory + "/wsdl"
+CAMERAS = 20
+SERVICES = [
+    ("devicemgmt.wsdl", "{http://www.onvif.org/ver10/device/wsdl}DeviceBinding", "device_service"),
+    ("media.wsdl", "{http://www.onvif.org/ver10/media/wsdl}MediaBinding", "media_service"),
+]
+
+def measure(create_camera) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    cameras = [create_camera(index) for index in range(CAMERAS)]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / CAMERAS, current / CAMERAS, cameras
+
+def private_documents(index : int) -> list:
+    # every camera parses its own documents as it was done before the shared store
+    return [CachingClient(wsdl=WSDL_DIRECTORY + "/" + wsdl,wsse=UsernameToken("admin","12345"),settings=SETTINGS,plugins=[HistoryPlugin()]).create_service(binding, f"http://10.0.0.{index}/onvif/{path}") for wsdl, binding, path in SERVICES]
+
+def shared_documents(index : int) -> list:
+    return [get_service_proxy(wsdl_URL=WSDL_DIRECTORY + "/" + wsdl,binding=binding,xaddr=f"http://10.0.0.{index}/onvif/{path}",username_token=UsernameToken("admin","12345")) for wsdl, binding, path in SERVICES]
+
+if __name__ == "__main__":
+    before_time, before_memory, _ = measure(private_documents)
+    # the shared documents are parsed once per process, outside of the per camera figures
+    for wsdl, _, _ in SERVICES: get_wsdl_document(wsdl_URL=WSDL_DIRECTORY + "/" + wsdl)
+    after_time, after_memory, _ = measure(shared_documents)
+    print(f"{'':<18}{'per camera [ms]':>18}{'per camera [KB]':>18}")
+    print(f"{'private documents':<18}{before_time * 1000:>18.2f}{before_memory / 1024:>18.1f}")
+    print(f"{'shared documents':<18}{after_time * 1000:>18.2f}{after_memory / 1024:>18.1f}")
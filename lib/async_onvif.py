@@ -0,0 +1,429 @@
+"""
+Created to use Onvif services from asyncio with zeep AsyncClient and httpx.
+
+Every AsyncOnvifService owns one httpx.AsyncClient, so one event loop can drive many devices concurrently.
+Wsdl documents are shared with the sync OnvifService (see get_wsdl_document).
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import asyncio
+import datetime
+import logging
+import time
+import httpx
+from zeep.client import AsyncClient, Settings
+from zeep.loader import parse_xml
+from zeep.proxy import AsyncServiceProxy
+from zeep.transports import AsyncTransport
+
+from lib import metrics
+from lib import device_metadata_cache
+from lib.device_metadata_cache import get_device_identity, get_operation_key
+from lib.onvif import OnvifService, get_wsdl_document, isfile_exist, SETTINGS, DEVICE_SERVICE_NS, MEDIA_SERVICE_NS
+from lib.log_config import get_logger, get_device_logger
+
+logger = get_logger('async_onvif_service')
+
+OPERATION_TIMEOUT = 10
+
+# metadata responses are received as envelopes to store them, the thread local raw_response override of zeep
+# would also apply to the other coroutines of the event loop
+METADATA_SETTINGS = Settings()
+METADATA_SETTINGS.strict = False
+METADATA_SETTINGS.xml_huge_tree = True
+METADATA_SETTINGS.raw_response = True
+# wsdl files are local, the sync client is only used by zeep for remote imports
+WSDL_HTTP_CLIENT = None
+
+def get_wsdl_http_client() -> httpx.Client:
+    global WSDL_HTTP_CLIENT
+    if WSDL_HTTP_CLIENT == None:
+        WSDL_HTTP_CLIENT = httpx.Client()
+    return WSDL_HTTP_CLIENT
+
+class AsyncOnvifService(OnvifService):
+    """
+    Asyncio variant of OnvifService, the connect and service methods are coroutines.
+
+        onvif_device = AsyncOnvifService(ip = "192.168.1.168",username = "admin",password = "9999")
+        await onvif_device.connect_onvif()
+        status = await onvif_device.ptz.GetStatus()
+        await onvif_device.close()
+    """
+    def __init__(self,ip = "192.168.1.168",username = "admin" , password = "9999",port = 80,wsdldirectory = "wsdl",operation_timeout = OPERATION_TIMEOUT) -> None:
+        super().__init__(ip = ip,username = username,password = password,port = port,wsdldirectory = wsdldirectory)
+        self.logger = get_device_logger(logger,self)
+        self.operation_timeout = operation_timeout
+        self.transport = None
+        # zeep clients keyed by (wsdl, settings) and service proxies keyed by (wsdl, binding QName, xaddr, settings)
+        self.async_clients = {}
+        self.async_proxies = {}
+        self.snapshot_auth = None
+
+    def get_transport(self) -> AsyncTransport:
+        """
+        Returns the pooled transport of the device, it follows the options of lib.onvif.set_transport_options.
+        """
+        if self.transport == None:
+            from lib.onvif import TRANSPORT_POOL_SIZE, TRANSPORT_KEEP_ALIVE, TRANSPORT_IDLE_TIMEOUT
+            limits = httpx.Limits(max_connections = TRANSPORT_POOL_SIZE,max_keepalive_connections = TRANSPORT_POOL_SIZE if TRANSPORT_KEEP_ALIVE else 0,keepalive_expiry = TRANSPORT_IDLE_TIMEOUT)
+            client = httpx.AsyncClient(timeout = self.operation_timeout,limits = limits,event_hooks = {"response": [metrics.record_httpx_response]})
+            self.transport = AsyncTransport(client = client,wsdl_client = get_wsdl_http_client())
+        return self.transport
+
+    def get_async_service_proxy(self,wsdl_URL : str,binding : str,xaddr : str,settings = SETTINGS) -> AsyncServiceProxy:
+        """
+        Returns the AsyncServiceProxy of the device for the given wsdl, binding and xaddr, it is created once.
+        The wsse token is refreshed on every call, the request is signed before the first await of the operation
+        so concurrent operations of the same device do not mix their tokens.
+        - requirements:
+            - wsdl_URL [str] : local wsdl path or onvif.org URL
+            - binding [str] : binding QName, e.g. "{http://www.onvif.org/ver10/device/wsdl}DeviceBinding"
+            - xaddr [str] : service address of the device
+            - settings [Settings] : optional zeep settings, should be a module level object since it is keyed by identity
+        - return:
+            - AsyncServiceProxy or None if the client can not be created
+        """
+        key = (wsdl_URL, binding, xaddr, id(settings))
+        service_proxy = self.async_proxies.get(key)
+        if service_proxy == None:
+            client_key = (wsdl_URL, id(settings))
+            async_client = self.async_clients.get(client_key)
+            if async_client == None:
+                if not (isfile_exist(wsdl_URL) or wsdl_URL.find("http://www.onvif.org") != -1):
+                    self.logger.error("No such a file directory : %s", wsdl_URL)
+                    return None
+                document = get_wsdl_document(wsdl_URL = wsdl_URL,settings = settings)
+                if document == None:
+                    return None
+                try:
+                    async_client = AsyncClient(wsdl=document, transport=self.get_transport(), settings=settings)
+                except Exception as emsg:
+                    self.logger.error("Create async client exception : \n%s", emsg)
+                    return None
+                self.async_clients[client_key] = async_client
+            try:
+                service_proxy = AsyncServiceProxy(async_client, async_client.wsdl.bindings[binding], address = xaddr)
+            except Exception as emsg:
+                self.logger.error("Create async service proxy exception : \n%s", emsg)
+                return None
+            self.async_proxies[key] = service_proxy
+        username_token = self.get_device_username_token()
+        if service_proxy._client.wsse is not username_token: service_proxy._client.wsse = username_token
+        plugins = [self.history] if self.history != None else []
+        if service_proxy._client.plugins != plugins: service_proxy._client.plugins = plugins
+        metrics_registry = metrics.METRICS_REGISTRY
+        if metrics_registry != None:
+            return metrics.InstrumentedServiceProxy(service_proxy,metrics_registry,xaddr = xaddr,binding = binding,is_async = True)
+        return service_proxy
+
+    def get_snapshot_auth(self) -> httpx.DigestAuth:
+        """
+        Returns the digest auth of the snapshot requests, it keeps the last challenge of the device so the following requests skip the 401 round trip.
+        """
+        # (username, password, auth)
+        if self.snapshot_auth == None or self.snapshot_auth[:2] != (self.username, self.password):
+            self.snapshot_auth = (self.username, self.password, httpx.DigestAuth(self.username, self.password))
+        return self.snapshot_auth[2]
+
+    def get_username_token(self):
+        # the re-sync request is awaited by resync_device_time, a blocking request would stall the event loop
+        return self.get_device_username_token()
+
+    async def resync_device_time(self) -> None:
+        """
+        Re-syncs the device time if the device rejected a request with an authentication or time skew fault.
+        """
+        if self.username_token.needs_sync and self.get_con_status():
+            self.logger.warning("Username token rejected, re-sync device time of %s ..", self.ip)
+            self.username_token.needs_sync = False
+            await self.get_device_time(xaddr=self.get_con_xaddr())
+
+    async def close(self) -> None:
+        """
+        Closes the http connections of the device.
+        """
+        if self.transport != None:
+            await self.transport.aclose()
+        self.transport = None
+        self.async_clients = {}
+        self.async_proxies = {}
+
+    @property
+    def device(self):
+        """
+        AsyncDeviceService of the device, devicemgmt.wsdl is loaded on first access.
+        """
+        from lib.services.async_device_service import AsyncDeviceService
+        return self.get_service_object("device",AsyncDeviceService)
+
+    @property
+    def media(self):
+        """
+        AsyncMediaService of the device, media.wsdl is loaded on first access.
+        """
+        from lib.services.async_media_service import AsyncMediaService
+        return self.get_service_object("media",AsyncMediaService)
+
+    @property
+    def ptz(self):
+        """
+        AsyncPTZService of the device, ptz.wsdl is loaded on first access.
+        """
+        from lib.services.async_ptz_service import AsyncPTZService
+        return self.get_service_object("ptz",AsyncPTZService)
+
+    @property
+    def imaging(self):
+        """
+        AsyncImageService of the device, imaging.wsdl is loaded on first access.
+        """
+        from lib.services.async_image_service import AsyncImageService
+        return self.get_service_object("imaging",AsyncImageService)
+
+    @property
+    def events(self):
+        """
+        AsyncEventService of the device, events.wsdl is loaded on first access.
+        """
+        from lib.services.async_event_service import AsyncEventService
+        return self.get_service_object("events",AsyncEventService)
+
+    @property
+    def analytics(self):
+        """
+        AsyncAnalyticsService of the device, analytics.wsdl is loaded on first access.
+        """
+        from lib.services.async_analytics_service import AsyncAnalyticsService
+        return self.get_service_object("analytics",AsyncAnalyticsService)
+
+    async def get_device_time(self,xaddr = "http://192.168.1.168:80/onvif/device_service") -> dict:
+        response = {}
+        global DEVICE_SERVICE_NS
+        try:
+            ws_client_device = self.get_async_service_proxy(wsdl_URL = self.wsdl_directory + "/devicemgmt.wsdl",binding = "{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr = xaddr)
+            if ws_client_device != None:
+                response = await ws_client_device.GetSystemDateAndTime()
+            else:
+                self.con_status = False
+        except Exception as emsg:
+            self.logger.error("Get device time exception : \n%s", emsg)
+            self.con_status = False
+
+        if response:
+            self.con_status = True
+            try:
+                self.device_created_time = datetime.datetime(year=response["UTCDateTime"]["Date"]["Year"],\
+                                                            month=response["UTCDateTime"]["Date"]["Month"],\
+                                                                day=response["UTCDateTime"]["Date"]["Day"],\
+                                                                    hour=response["UTCDateTime"]["Time"]["Hour"],\
+                                                                        minute=response["UTCDateTime"]["Time"]["Minute"],\
+                                                                            second=response["UTCDateTime"]["Time"]["Second"])
+                self.first_local_time = datetime.datetime.now()
+                self.username_token.sync(self.device_created_time)
+            except Exception as emsg:
+                self.logger.error("Create device time exception : \n%s", emsg)
+
+        return response
+
+    async def call_metadata_operation(self,operation : str,wsdl_URL : str,binding : str,xaddr : str,**params):
+        """
+        Async variant of OnvifService.call_metadata_operation, the cached responses are shared with the sync OnvifService.
+        The SQLite queries run in a worker thread so they do not stall the event loop.
+        Raises the exceptions of the operation like a service proxy call.
+        - requirements:
+            - operation [str] : operation name
+            - wsdl_URL, binding, xaddr [str] : like get_async_service_proxy
+            - params : parameters of the operation
+        """
+        metadata_cache = device_metadata_cache.METADATA_CACHE
+        identity = get_device_identity(self.device_info)
+        if metadata_cache == None or identity == None:
+            service_proxy = self.get_async_service_proxy(wsdl_URL = wsdl_URL,binding = binding,xaddr = xaddr)
+            return await getattr(service_proxy, operation)(**params)
+        service_proxy = self.get_async_service_proxy(wsdl_URL = wsdl_URL,binding = binding,xaddr = xaddr,settings = METADATA_SETTINGS)
+        firmware = str(getattr(self.device_info, "FirmwareVersion", ""))
+        address = f"{self.ip}:{self.port}"
+        cache_key = get_operation_key(binding,operation,params)
+        async_client = service_proxy._client
+        operation_binding = service_proxy._binding
+        content = await asyncio.to_thread(metadata_cache.get,identity,address,firmware,cache_key,metadata_cache.get_operation_ttl(operation))
+        if content != None:
+            try:
+                return operation_binding.get(operation).process_reply(parse_xml(content, async_client.transport, settings = async_client.settings))
+            except Exception as emsg:
+                self.logger.warning("Cached %s response can not be read, it is requested again -> %s", operation, emsg)
+                await asyncio.to_thread(metadata_cache.remove,identity,address,cache_key)
+        response = await getattr(service_proxy, operation)(**params)
+        result = operation_binding.process_reply(async_client, operation_binding.get(operation), response)
+        await asyncio.to_thread(metadata_cache.put,identity,address,firmware,cache_key,response.content)
+        return result
+
+    async def get_capabilities(self,xaddr = "http://192.168.1.168:80/onvif/device_service",category = "All") -> dict:
+        global DEVICE_SERVICE_NS
+        capabilities = {}
+        try:
+            capabilities = await self.call_metadata_operation("GetCapabilities",wsdl_URL = self.wsdl_directory + "/devicemgmt.wsdl",binding = "{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr = xaddr,Category = category)
+        except Exception as emsg:
+            self.logger.error("Get capabilities error : \n%s\n", emsg)
+        return capabilities
+
+    async def get_services(self,xaddr = "http://192.168.1.168:80/onvif/device_service" , include_capability = False) -> list:
+        global DEVICE_SERVICE_NS
+        services = []
+        try:
+            services = await self.call_metadata_operation("GetServices",wsdl_URL = self.wsdl_directory + "/devicemgmt.wsdl",binding = "{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr = xaddr,IncludeCapability = str(include_capability).lower())
+        except Exception as emsg:
+            self.logger.error("Get services error : \n%s\n", emsg)
+        return services
+
+    async def get_profiles(self,xaddr = "http://192.168.1.168:80/onvif/media_service") -> list:
+        global MEDIA_SERVICE_NS
+        profiles = []
+        try:
+            profiles = await self.call_metadata_operation("GetProfiles",wsdl_URL = self.wsdl_directory + "/media.wsdl",binding = "{" + MEDIA_SERVICE_NS + "}MediaBinding",xaddr = xaddr)
+        except Exception as emsg:
+            self.logger.error("Get profiles error : \n%s\n", emsg)
+        else:
+            self.media_uri_cache.update_profiles(profiles)
+        return profiles
+
+    async def get_device_information(self,xaddr = "http://192.168.1.168:80/onvif/device_service"):
+        global DEVICE_SERVICE_NS
+        device_info = {}
+        try:
+            ws_client_device = self.get_async_service_proxy(wsdl_URL = self.wsdl_directory + "/devicemgmt.wsdl",binding = "{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr = xaddr)
+            device_info = await ws_client_device.GetDeviceInformation()
+        except Exception as emsg:
+            self.logger.error("Get device info error : \n%s\n", emsg)
+        return device_info
+
+    async def run_connect_stage(self,stage : str,coroutine):
+        """
+        Awaits the connect stage coroutine and records its duration in connect_timings.
+        """
+        stage_start = time.perf_counter()
+        try:
+            return await coroutine
+        finally:
+            self.connect_timings[stage] = time.perf_counter() - stage_start
+
+    async def get_capabilities_and_profiles(self) -> tuple:
+        capabilities = await self.run_connect_stage("GetCapabilities",self.get_capabilities(xaddr=self.get_con_xaddr()))
+        profiles = []
+        if capabilities:
+            profiles = await self.run_connect_stage("GetProfiles",self.get_profiles(xaddr=capabilities["Media"]["XAddr"]))
+        return capabilities, profiles
+
+    async def connect_onvif(self,concurrent = False):
+        """
+        Connects to the device, see OnvifService.connect_onvif for the concurrent mode.
+        """
+        self.logger.info("Try to connect onvif device : %s", str(self.ip))
+        self.service_objects = {}
+        self.connect_timings = {}
+        connect_start = time.perf_counter()
+        await self.run_connect_stage("GetSystemDateAndTime",self.get_device_time(xaddr=self.get_con_xaddr()))
+        if self.get_con_status():
+            self.logger.info("Onvif device connection complete with succes.. %s", str(self.ip))
+            if concurrent:
+                if device_metadata_cache.METADATA_CACHE != None:
+                    # the cached responses are keyed by the device information, it is requested first when a metadata cache is set
+                    self.device_info = await self.run_connect_stage("GetDeviceInformation",self.get_device_information(xaddr=self.get_con_xaddr()))
+                    await asyncio.to_thread(self.validate_metadata_cache)
+                    self.services, (self.capabilities, self.profiles) = await asyncio.gather(
+                        self.run_connect_stage("GetServices",self.get_services(xaddr=self.get_con_xaddr(),include_capability=False)),
+                        self.get_capabilities_and_profiles())
+                else:
+                    self.device_info, self.services, (self.capabilities, self.profiles) = await asyncio.gather(
+                        self.run_connect_stage("GetDeviceInformation",self.get_device_information(xaddr=self.get_con_xaddr())),
+                        self.run_connect_stage("GetServices",self.get_services(xaddr=self.get_con_xaddr(),include_capability=False)),
+                        self.get_capabilities_and_profiles())
+                if not self.device_info: self.logger.error("Can not Getting device information for %s\n", self.ip)
+                if not self.capabilities: self.logger.error("Can not Getting device capabilities for %s\n", self.ip)
+                elif not self.profiles: self.logger.error("Can not Getting device profiles for %s\n", self.ip)
+                if not self.services: self.logger.error("Can not Getting device services for %s\n", self.ip)
+            else:
+                self.device_info = await self.run_connect_stage("GetDeviceInformation",self.get_device_information(xaddr=self.get_con_xaddr()))
+                if self.device_info:
+                    await asyncio.to_thread(self.validate_metadata_cache)
+                    self.capabilities = await self.run_connect_stage("GetCapabilities",self.get_capabilities(xaddr=self.get_con_xaddr()))
+                    if self.capabilities:
+                        self.profiles = await self.run_connect_stage("GetProfiles",self.get_profiles(xaddr= self.capabilities["Media"]["XAddr"]))
+                        if self.profiles:
+                            self.services = await self.run_connect_stage("GetServices",self.get_services(xaddr=self.get_con_xaddr(),include_capability=False))
+                            if self.services:
+                                self.logger.info("Getting device services complete with success..")
+                            else:
+                                self.logger.error("Can not Getting device services for %s\n", self.ip)
+                        else:
+                            self.logger.error("Can not Getting device profiles for %s\n", self.ip)
+                    else:
+                        self.logger.error("Can not Getting device capabilities for %s\n", self.ip)
+                else:
+                    self.logger.error("Can not Getting device information for %s\n", self.ip)
+            self.get_service_index()
+        else:
+            self.logger.error("No onvif connection to : %s\n", self.ip)
+        self.connect_timings["Total"] = time.perf_counter() - connect_start
+
+class AsyncServiceBase:
+    """
+    Common request flow of the async service classes, an operation returns its default on any error like the sync services.
+    """
+    def __init__(self,onvif_service : AsyncOnvifService,service_name : str,logger : logging.Logger) -> None:
+        self.onvif_service = onvif_service
+        self.service_name = service_name
+        self.logger = get_device_logger(logger,onvif_service)
+        self.is_service_supported = False
+        self.wsdlUrl = ""
+        self.xAddr = ""
+        self.binding = ""
+
+    async def call_operation(self,operation : str,default = None,binding = None,xaddr = None,settings = SETTINGS,use_metadata_cache = False,**params) -> tuple:
+        """
+        Calls the operation of the service with the given params.
+        - requirements:
+            - operation [str] : operation name, e.g. "GetStatus"
+            - default : returned value when the request is not sent or fails
+            - binding [str] : optional binding QName, defaults to the service binding
+            - xaddr [str] : optional address, defaults to the service xaddr
+            - settings [Settings] : optional zeep settings
+            - use_metadata_cache [bool] : True reads the response through AsyncOnvifService.call_metadata_operation
+        - return:
+            - (status [boolean], response)
+        """
+        if not self.onvif_service.get_con_status():
+            self.logger.warning("No Onvif Connection!")
+            return False, default
+        if not self.is_service_supported:
+            self.logger.error("%s Service not supported..", self.service_name)
+            return False, default
+        await self.onvif_service.resync_device_time()
+        self.logger.info("Try to %s..", operation)
+        try:
+            if use_metadata_cache:
+                response = await self.onvif_service.call_metadata_operation(operation,wsdl_URL = self.wsdlUrl,binding = binding or self.binding,xaddr = xaddr or self.xAddr,**params)
+            else:
+                ws_client = self.onvif_service.get_async_service_proxy(wsdl_URL = self.wsdlUrl,binding = binding or self.binding,xaddr = xaddr or self.xAddr,settings = settings)
+                response = await getattr(ws_client, operation)(**params)
+        except Exception as emsg:
+            self.logger.error("%s unsuccess.. -> %s", operation, emsg)
+            return False, default
+        self.logger.info("%s complete with success..", operation)
+        return True, response
+
+    async def call(self,operation : str,default = None,**params):
+        """
+        Returns the response of the operation or the default value.
+        """
+        status, response = await self.call_operation(operation,default,**params)
+        return response if status else default
+
+    async def call_status(self,operation : str,**params) -> bool:
+        """
+        Returns True if the operation was sent with success else False.
+        """
+        status, response = await self.call_operation(operation,False,**params)
+        return status
@@ -0,0 +1,167 @@
+"""
+Created to keep the static metadata responses of the devices on disk between process restarts.
+
+    from lib.device_metadata_cache import DeviceMetadataCache, set_metadata_cache
+    set_metadata_cache(DeviceMetadataCache(path = "cache/device_metadata.sqlite",ttl = 24 * 3600))
+    onvif_device.connect_onvif()    # GetCapabilities, GetProfiles, GetServices are read from the cache after the first run
+
+The SOAP envelopes of GetCapabilities, GetProfiles, GetServices and GetServiceCapabilities are stored as they are received and
+deserialized with the wsdl of the operation again, a cached response is the same zeep object as a requested one.
+GetSystemDateAndTime and GetDeviceInformation are always requested, the entries of a device are keyed by its manufacturer, model,
+serial number and address and are dropped when its firmware version changes or their ttl is over.
+Profiles are edited at runtime, GetProfiles is kept for PROFILES_CACHE_TTL only and dropped by OnvifService on a profile change,
+configuration change or reboot of the device.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from lib.log_config import get_logger
+
+logger = get_logger('device_metadata_cache')
+
+METADATA_CACHE_PATH = "cache/device_metadata.sqlite"
+# seconds a cached response is used
+METADATA_CACHE_TTL = 24 * 3600
+# seconds a cached GetProfiles response is used, profiles changed by an other client are only announced by events
+PROFILES_CACHE_TTL = 300
+
+METADATA_CACHE = None
+
+def set_metadata_cache(metadata_cache) -> None:
+    """
+    Sets the process-wide DeviceMetadataCache of OnvifService.connect_onvif and the service constructors, None disables it.
+    """
+    global METADATA_CACHE
+    METADATA_CACHE = metadata_cache
+
+def get_metadata_cache():
+    return METADATA_CACHE
+
+def get_device_identity(device_info) -> str:
+    """
+    Returns manufacturer/model/serial number of a GetDeviceInformation response, None when the device reports no serial number.
+    """
+    serial_number = getattr(device_info, "SerialNumber", None) if device_info else None
+    if not serial_number: return None
+    return f"{getattr(device_info, 'Manufacturer', '')}/{getattr(device_info, 'Model', '')}/{serial_number}"
+
+def get_operation_key(binding : str,operation : str,params = None) -> str:
+    """
+    Returns the cache key of an operation call, e.g. {http://www.onvif.org/ver10/media/wsdl}MediaBindingGetProfiles.
+    """
+    return binding + operation + (repr(sorted(params.items())) if params else "")
+
+class DeviceMetadataCache:
+    def __init__(self,path = METADATA_CACHE_PATH,ttl = METADATA_CACHE_TTL,profiles_ttl = PROFILES_CACHE_TTL) -> None:
+        """
+        SQLite store of the SOAP envelopes of the static operations of the devices.
+        - requirements:
+            - path [str] : database file, the directory is created; ":memory:" keeps the cache in the process
+            - ttl [float] : seconds a response is used, older ones are requested again
+            - profiles_ttl [float] : seconds a GetProfiles response is used
+        """
+        self.path = path
+        self.ttl = ttl
+        # operation name -> ttl of the operations which change more often than the firmware
+        self.operation_ttls = {"GetProfiles": profiles_ttl}
+        self.lock = threading.Lock()
+        self.connection = None
+        # a forked worker opens its own connection, an sqlite connection can not be shared between processes
+        self.connection_pid = None
+        self.hit_count = 0
+        self.miss_count = 0
+
+    def get_connection(self) -> sqlite3.Connection:
+        # called with the lock held
+        if self.connection == None or self.connection_pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory and self.path != ":memory:": os.makedirs(directory, exist_ok = True)
+            self.connection = sqlite3.connect(self.path, timeout = 30, check_same_thread = False)
+            self.connection_pid = os.getpid()
+            if self.path != ":memory:": self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS metadata (identity TEXT, address TEXT, operation TEXT, firmware TEXT, "
+                                    "content BLOB, created REAL, PRIMARY KEY (identity, address, operation))")
+            self.connection.commit()
+        return self.connection
+
+    def validate_device(self,identity : str,firmware : str) -> bool:
+        """
+        Drops the entries of the device when they belong to an other firmware version.
+        - return:
+            - status [boolean] : False when entries were dropped
+        """
+        with self.lock:
+            connection = self.get_connection()
+            cursor = connection.execute("DELETE FROM metadata WHERE identity = ? AND firmware != ?", (identity, firmware))
+            connection.commit()
+        if cursor.rowcount:
+            logger.info("Firmware of %s changed to %s, %s cached responses dropped", identity, firmware, cursor.rowcount)
+        return cursor.rowcount == 0
+
+    def get_operation_ttl(self,operation : str) -> float:
+        return self.operation_ttls.get(operation, self.ttl)
+
+    def get(self,identity : str,address : str,firmware : str,operation : str,ttl = None) -> bytes:
+        """
+        Returns the cached envelope of the operation, None when it is not cached, expired or of an other firmware version.
+        - requirements:
+            - ttl [float] : optional, seconds the entry is used instead of the ttl of the cache
+        """
+        if ttl == None: ttl = self.ttl
+        with self.lock:
+            row = self.get_connection().execute("SELECT content FROM metadata WHERE identity = ? AND address = ? AND operation = ? AND firmware = ? AND created > ?",
+                                                (identity, address, operation, firmware, time.time() - ttl)).fetchone()
+            if row == None:
+                self.miss_count += 1
+                return None
+            self.hit_count += 1
+        return bytes(row[0])
+
+    def put(self,identity : str,address : str,firmware : str,operation : str,content : bytes) -> None:
+        with self.lock:
+            connection = self.get_connection()
+            connection.execute("INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?, ?)", (identity, address, operation, firmware, content, time.time()))
+            connection.commit()
+
+    def remove(self,identity : str,address : str,operation : str) -> None:
+        with self.lock:
+            connection = self.get_connection()
+            connection.execute("DELETE FROM metadata WHERE identity = ? AND address = ? AND operation = ?", (identity, address, operation))
+            connection.commit()
+
+    def invalidate(self,identity = None) -> None:
+        """
+        Drops the entries of every device or of the given device identity.
+        """
+        with self.lock:
+            connection = self.get_connection()
+            if identity == None:
+                connection.execute("DELETE FROM metadata")
+            else:
+                connection.execute("DELETE FROM metadata WHERE identity = ?", (identity,))
+            connection.commit()
+
+    def purge_expired(self) -> int:
+        """
+        Deletes the expired entries, returns their count.
+        """
+        with self.lock:
+            connection = self.get_connection()
+            cursor = connection.execute("DELETE FROM metadata WHERE created <= ?", (time.time() - self.ttl,))
+            connection.commit()
+        return cursor.rowcount
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            entries = self.get_connection().execute("SELECT COUNT(*), COUNT(DISTINCT identity) FROM metadata").fetchone()
+            return {"entries": entries[0], "devices": entries[1], "hits": self.hit_count, "misses": self.miss_count}
+
+    def close(self) -> None:
+        with self.lock:
+            if self.connection != None and self.connection_pid == os.getpid(): self.connection.close()
+            self.connection = None
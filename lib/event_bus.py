@@ -0,0 +1,183 @@
+"""
+Created to buffer event notifications between the pull workers and slow consumers with a bounded memory footprint.
+
+    event_bus = EventBus(capacity = 1000,topic_capacities = {"tns1:VideoSource/MotionAlarm": 100},coalesce = True)
+    manager = EventSubscriptionManager(message_queue = event_bus)
+    key, message = event_bus.get()
+    print(event_bus.get_stats())
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+def get_coalesce_key(key : str,message):
+    """
+    Returns the (device, topic, source) key of a property state notification, None for other notifications.
+    Property notifications carry a PropertyOperation (Initialized, Changed or Deleted), only the latest state of a source matters.
+    """
+    try:
+        if not message.Message.get("PropertyOperation"): return None
+        source_items = message.SourceItems or ([message.Source] if message.Source != None else [])
+        return (key, message.Topic, tuple((item.Name, item.Value) for item in source_items))
+    except Exception:
+        return None
+
+class EventBus:
+    def __init__(self,capacity = 10000,topic_capacities = None,overflow_policy = DROP_OLDEST,coalesce = False) -> None:
+        """
+        Ring buffer of (key, NotificationMessage) items with a capacity per topic, it has the put and get methods of queue.Queue.
+        - requirements:
+            - capacity [int] : maximum buffered messages of a topic without an entry in topic_capacities
+            - topic_capacities [dict] : optional, topic -> maximum buffered messages of the topic
+            - overflow_policy [str] : drop_oldest, drop_newest or block (put waits for a free slot of the topic, queue.Full after timeout)
+            - coalesce [bool] : True replaces a buffered property notification of the same device, topic and source with the latest one
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy should be one of {OVERFLOW_POLICIES}")
+        self.capacity = capacity
+        self.topic_capacities = dict(topic_capacities or {})
+        self.overflow_policy = overflow_policy
+        self.coalesce = coalesce
+        # sequence -> [topic, coalesce key, item] in arrival order
+        self.entries = OrderedDict()
+        # topic -> deque of the buffered sequences of the topic
+        self.topic_entries = {}
+        # coalesce key -> sequence of the buffered notification
+        self.coalesce_index = {}
+        self.sequence = 0
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        self.put_count = 0
+        self.get_count = 0
+        self.dropped_count = 0
+        self.coalesced_count = 0
+        self.topic_dropped_counts = {}
+
+    def get_topic_capacity(self,topic : str) -> int:
+        return self.topic_capacities.get(topic, self.capacity)
+
+    def qsize(self) -> int:
+        with self.lock:
+            return len(self.entries)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def count_drop(self,topic : str) -> None:
+        self.dropped_count += 1
+        self.topic_dropped_counts[topic] = self.topic_dropped_counts.get(topic, 0) + 1
+
+    def remove_entry(self,sequence : int) -> list:
+        # called with the lock held
+        entry = self.entries.pop(sequence)
+        topic, coalesce_key, _ = entry
+        sequences = self.topic_entries[topic]
+        if sequences[0] == sequence: sequences.popleft()
+        else: sequences.remove(sequence)
+        if not sequences: del self.topic_entries[topic]
+        if coalesce_key != None and self.coalesce_index.get(coalesce_key) == sequence: del self.coalesce_index[coalesce_key]
+        return entry
+
+    def put(self,item : tuple,block = True,timeout = None) -> bool:
+        """
+        Buffers a (key, NotificationMessage) item.
+        - return:
+            - status [bool] : False when the item was dropped by the drop_newest policy
+        """
+        key, message = item
+        topic = getattr(message, "Topic", "")
+        coalesce_key = get_coalesce_key(key, message) if self.coalesce else None
+        with self.not_full:
+            self.put_count += 1
+            if coalesce_key != None:
+                sequence = self.coalesce_index.get(coalesce_key)
+                if sequence != None:
+                    # keeps the place of the buffered notification, only its state is replaced
+                    self.entries[sequence][2] = item
+                    self.coalesced_count += 1
+                    return True
+            capacity = self.get_topic_capacity(topic)
+            if capacity <= 0:
+                self.count_drop(topic)
+                return False
+            sequences = self.topic_entries.get(topic)
+            if sequences != None and len(sequences) >= capacity:
+                if self.overflow_policy == DROP_NEWEST:
+                    self.count_drop(topic)
+                    return False
+                elif self.overflow_policy == DROP_OLDEST:
+                    self.remove_entry(sequences[0])
+                    self.count_drop(topic)
+                else:
+                    if not block: raise queue.Full
+                    end_time = None if timeout == None else time.monotonic() + timeout
+                    while topic in self.topic_entries and len(self.topic_entries[topic]) >= capacity:
+                        remaining_time = None if end_time == None else end_time - time.monotonic()
+                        if remaining_time != None and remaining_time <= 0: raise queue.Full
+                        self.not_full.wait(remaining_time)
+            self.sequence += 1
+            self.entries[self.sequence] = [topic, coalesce_key, item]
+            self.topic_entries.setdefault(topic, deque()).append(self.sequence)
+            if coalesce_key != None: self.coalesce_index[coalesce_key] = self.sequence
+            self.not_empty.notify()
+            return True
+
+    def put_nowait(self,item : tuple) -> bool:
+        return self.put(item, block = False)
+
+    def get(self,block = True,timeout = None) -> tuple:
+        """
+        Returns the oldest buffered (key, NotificationMessage) item, raises queue.Empty like queue.Queue.
+        """
+        with self.not_empty:
+            if not block:
+                if not self.entries: raise queue.Empty
+            elif timeout == None:
+                while not self.entries: self.not_empty.wait()
+            else:
+                end_time = time.monotonic() + timeout
+                while not self.entries:
+                    remaining_time = end_time - time.monotonic()
+                    if remaining_time <= 0: raise queue.Empty
+                    self.not_empty.wait(remaining_time)
+            _, _, item = self.remove_entry(next(iter(self.entries)))
+            self.get_count += 1
+            self.not_full.notify_all()
+            return item
+
+    def get_nowait(self) -> tuple:
+        return self.get(block = False)
+
+    def get_batch(self,max_items = 100,timeout = None) -> list:
+        """
+        Waits up to timeout for the first item and returns at most max_items buffered items with one lock round trip.
+        """
+        try:
+            items = [self.get(timeout = timeout)]
+        except queue.Empty:
+            return []
+        with self.lock:
+            while self.entries and len(items) < max_items:
+                _, _, item = self.remove_entry(next(iter(self.entries)))
+                items.append(item)
+            self.get_count += len(items) - 1
+            self.not_full.notify_all()
+        return items
+
+    def get_stats(self) -> dict:
+        """
+        Returns the counters: size, put, get, dropped, coalesced and dropped per topic.
+        """
+        with self.lock:
+            return {"size": len(self.entries), "put": self.put_count, "get": self.get_count, "dropped": self.dropped_count,
+                    "coalesced": self.coalesced_count, "topic_dropped": dict(self.topic_dropped_counts)}
@@ -0,0 +1,392 @@
+"""
+Created to keep PullPoint event subscriptions of many Onvif devices alive through a small worker pool.
+
+    manager = EventSubscriptionManager(max_workers = 16,callback = lambda key, message: print(key, message.Topic))
+    manager.add_device(onvif_service)
+    manager.start()
+    ...
+    manager.stop()
+
+Every subscription is a chain of short tasks (subscribe, pull, renew) run by the pool, so no thread belongs to a camera.
+Renew runs before pulls and ahead of the TerminationTime, it overlaps with the long polling PullMessages of the subscription.
+The long polling pulls occupy at most max_pull_workers workers, the other ones stay free for the due renew and subscribe tasks.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import datetime
+import heapq
+import itertools
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lib import metrics
+from lib.onvif import OnvifService
+from lib.requests_messages.event_request_messages import EventRequestMessages
+from lib.log_config import get_logger
+
+logger = get_logger('event_subscription_manager')
+
+# task priorities, a due renew is started before a due subscribe and both before a pull
+RENEW = 0
+SUBSCRIBE = 1
+PULL = 2
+TASK_PRIORITIES = (RENEW, SUBSCRIBE, PULL)
+
+DURATION_PATTERN = re.compile(r"^P(?:(?P<days>\d+(?:\.\d+)?)D)?(?:T(?:(?P<hours>\d+(?:\.\d+)?)H)?(?:(?P<minutes>\d+(?:\.\d+)?)M)?(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?$")
+
+def parse_duration(duration : str) -> float:
+    """
+    Returns the seconds of an xs:duration without years and months, e.g. PT1M -> 60.0, None for other values.
+    """
+    match = DURATION_PATTERN.match(str(duration).strip())
+    if match == None or duration in ("P", "PT"): return None
+    values = {name: float(value) if value else 0.0 for name, value in match.groupdict().items()}
+    return values["days"] * 86400 + values["hours"] * 3600 + values["minutes"] * 60 + values["seconds"]
+
+def get_lifetime(response) -> float:
+    """
+    Returns TerminationTime - CurrentTime of a subscribe, renew or pull response in seconds, None when it is unknown.
+    The difference of two device times does not depend on the device clock offset.
+    """
+    try:
+        current_time, termination_time = response.CurrentTime, response.TerminationTime
+    except Exception:
+        return None
+    if not isinstance(current_time, datetime.datetime) or not isinstance(termination_time, datetime.datetime): return None
+    if (current_time.tzinfo == None) != (termination_time.tzinfo == None):
+        current_time, termination_time = current_time.replace(tzinfo = None), termination_time.replace(tzinfo = None)
+    lifetime = (termination_time - current_time).total_seconds()
+    return lifetime if lifetime > 0 else None
+
+def record_retry(key : str,operation : str,service : str) -> None:
+    # keys are the host:port device names of lib/metrics.py
+    metrics_registry = metrics.METRICS_REGISTRY
+    if metrics_registry != None: metrics_registry.record_retry(key, operation, service)
+
+class EventSubscription:
+    def __init__(self,key : str,onvif_service : OnvifService,request_message = None,topic_filter = None) -> None:
+        self.key = key
+        self.onvif_service = onvif_service
+        self.request_message = request_message
+        self.topic_filter = topic_filter
+        self.event_service = None
+        # SubscriptionReference address, None while the device has no subscription
+        self.address = None
+        # time.monotonic() when the subscription terminates on the device
+        self.termination_deadline = 0.0
+        self.pulling = False
+        self.renewing = False
+        self.subscribing = False
+        self.failures = 0
+        self.resubscribe_delay = 0.0
+        self.subscribe_count = 0
+        self.message_count = 0
+        self.last_error = ""
+
+    def is_active(self) -> bool:
+        return self.address != None and time.monotonic() < self.termination_deadline
+
+    def get_status(self) -> dict:
+        return {"key": self.key, "active": self.is_active(), "address": self.address, "subscribe_count": self.subscribe_count,
+                "message_count": self.message_count, "failures": self.failures, "error": self.last_error,
+                "remaining_time": max(0.0, self.termination_deadline - time.monotonic()) if self.address != None else 0.0}
+
+class EventSubscriptionManager:
+    def __init__(self,max_workers = 8,callback = None,message_queue = None,pull_timeout = "PT5S",message_limit = 1024,termination_time = "PT1M",\
+                renew_margin = 0.3,max_failures = 3,resubscribe_delay = 1.0,max_resubscribe_delay = 60.0,max_pull_workers = None) -> None:
+        """
+        - requirements:
+            - max_workers [int] : pool size, one in flight PullMessages holds a worker for at most pull_timeout
+            - callback [callable] : optional, called as callback(key, NotificationMessage) from the pool workers
+            - message_queue [queue.Queue or EventBus] : optional, (key, NotificationMessage) tuples are put into it
+            - pull_timeout [duration] : PullMessages Timeout, short timeouts let a small pool serve many devices
+            - message_limit [int] : PullMessages MessageLimit
+            - termination_time [duration] : InitialTerminationTime of the subscriptions and TerminationTime of Renew
+            - renew_margin [float] : part of the subscription lifetime left when Renew is started, e.g. 0.3 renews a PT1M subscription 18 s before it terminates
+            - max_failures [int] : consecutive failed pull or renew requests after which the device is subscribed again
+            - resubscribe_delay, max_resubscribe_delay [float] : seconds, first and maximum delay of the doubling subscribe retries
+            - max_pull_workers [int] : optional, workers the PullMessages requests may hold at once, defaults to max_workers - 1
+                so a renew is not delayed behind the pulls
+        """
+        self.max_workers = max_workers
+        self.max_pull_workers = max_pull_workers if max_pull_workers != None else max(1, max_workers - 1)
+        self.callback = callback
+        self.message_queue = message_queue
+        self.pull_timeout = pull_timeout
+        self.message_limit = message_limit
+        self.termination_time = termination_time
+        self.default_lifetime = parse_duration(termination_time) or 60.0
+        self.renew_margin = renew_margin
+        self.max_failures = max_failures
+        self.min_resubscribe_delay = resubscribe_delay
+        self.max_resubscribe_delay = max_resubscribe_delay
+        self.subscriptions = {}
+        # task -> (due time, sequence, key, generation) heap of the scheduled tasks of the priority
+        self.tasks = {task: [] for task in TASK_PRIORITIES}
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.running_tasks = 0
+        self.running_pulls = 0
+        self.executor = None
+        self.scheduler_thread = None
+        self.is_running = False
+
+    def add_device(self,onvif_service : OnvifService,request_message = None,topic_filter = None) -> str:
+        """
+        Adds a connected device, it is subscribed by the workers once the manager runs.
+        - requirements:
+            - onvif_service [OnvifService] : connected device
+            - request_message [CreatePullPointSubscriptionRequestMessage] : optional, Filter and SubscriptionPolicy of the subscription,
+                InitialTerminationTime defaults to termination_time
+            - topic_filter [TopicFilter] : optional, sent as the Filter of the subscription when the device supports it (and no request_message is given),
+                messages of other topics are dropped before they are decoded
+        - return:
+            - key [str] : ip:port of the device
+        """
+        key = f"{onvif_service.ip}:{onvif_service.port}"
+        with self.condition:
+            if key in self.subscriptions:
+                logger.warning("%s is already subscribed..", key)
+                return key
+            self.subscriptions[key] = EventSubscription(key = key,onvif_service = onvif_service,request_message = request_message,topic_filter = topic_filter)
+            self.schedule(key, SUBSCRIBE)
+        return key
+
+    def remove_device(self,key : str,unsubscribe = True) -> None:
+        """
+        Removes a device, its pending tasks are dropped and its subscription is terminated on the device.
+        """
+        with self.condition:
+            subscription = self.subscriptions.pop(key, None)
+        if subscription != None and unsubscribe: self.unsubscribe(subscription)
+
+    def get_status(self) -> list:
+        """
+        Returns one status dict per device: key, active, address, subscribe_count, message_count, failures, error and remaining_time.
+        """
+        with self.condition:
+            return [subscription.get_status() for subscription in self.subscriptions.values()]
+
+    def start(self) -> None:
+        """
+        Starts the worker pool and the scheduler thread.
+        """
+        with self.condition:
+            if self.is_running: return
+            self.is_running = True
+        self.executor = ThreadPoolExecutor(max_workers = self.max_workers,thread_name_prefix = "event_subscription")
+        self.scheduler_thread = threading.Thread(target = self.run_scheduler,name = "event_subscription_scheduler",daemon = True)
+        self.scheduler_thread.start()
+        logger.info("Event subscription manager started with %s workers for %s devices..", self.max_workers, len(self.subscriptions))
+
+    def stop(self,unsubscribe = True) -> None:
+        """
+        Stops scheduling, waits for the running requests (at most pull_timeout) and unsubscribes every active subscription.
+        """
+        with self.condition:
+            if not self.is_running: return
+            self.is_running = False
+            self.condition.notify_all()
+        self.scheduler_thread.join()
+        self.executor.shutdown(wait = True)
+        if unsubscribe:
+            with ThreadPoolExecutor(max_workers = self.max_workers) as executor:
+                executor.map(self.unsubscribe, [subscription for subscription in list(self.subscriptions.values()) if subscription.is_active()])
+        logger.info("Event subscription manager stopped..")
+
+    def schedule(self,key : str,task : int,delay = 0.0) -> None:
+        # called with the condition held, pull and renew tasks belong to the current subscription of the device
+        if key not in self.subscriptions: return
+        generation = self.subscriptions[key].subscribe_count
+        heapq.heappush(self.tasks[task], (time.monotonic() + delay, next(self.sequence), key, generation))
+        self.condition.notify()
+
+    def get_due_task(self,now : float) -> tuple:
+        """
+        Returns (task, None) of the highest priority task which is due, else (None, due time of the next task which can be started).
+        Pulls are not started while max_pull_workers pulls are running.
+        """
+        # called with the condition held
+        next_due_time = None
+        for task in TASK_PRIORITIES:
+            tasks = self.tasks[task]
+            if not tasks or (task == PULL and self.running_pulls >= self.max_pull_workers): continue
+            if tasks[0][0] <= now: return task, None
+            if next_due_time == None or tasks[0][0] < next_due_time: next_due_time = tasks[0][0]
+        return None, next_due_time
+
+    def run_scheduler(self) -> None:
+        with self.condition:
+            while self.is_running:
+                if self.running_tasks >= self.max_workers:
+                    self.condition.wait()
+                    continue
+                now = time.monotonic()
+                task, next_due_time = self.get_due_task(now)
+                if task == None:
+                    # woken by a new task or a finished one
+                    self.condition.wait(next_due_time - now if next_due_time != None else None)
+                    continue
+                _, _, key, generation = heapq.heappop(self.tasks[task])
+                subscription = self.subscriptions.get(key)
+                # tasks of removed devices and of replaced subscriptions are dropped
+                if subscription == None or (task != SUBSCRIBE and generation != subscription.subscribe_count): continue
+                self.running_tasks += 1
+                if task == PULL: self.running_pulls += 1
+                self.executor.submit(self.run_task, subscription, task)
+
+    def run_task(self,subscription : EventSubscription,task : int) -> None:
+        try:
+            if task == SUBSCRIBE: self.subscribe(subscription)
+            elif task == RENEW: self.renew(subscription)
+            else: self.pull(subscription)
+        except Exception as emsg:
+            logger.error("%s event subscription task unsuccess.. -> %s", subscription.key, emsg)
+        finally:
+            with self.condition:
+                self.running_tasks -= 1
+                if task == PULL: self.running_pulls -= 1
+                self.condition.notify()
+
+    def set_termination(self,subscription : EventSubscription,response,start_time : float) -> float:
+        lifetime = get_lifetime(response)
+        if lifetime == None: lifetime = self.default_lifetime
+        subscription.termination_deadline = start_time + lifetime
+        return lifetime
+
+    def subscribe(self,subscription : EventSubscription) -> None:
+        with self.condition:
+            if subscription.subscribing or subscription.pulling or subscription.renewing: return
+            subscription.subscribing = True
+        try:
+            if subscription.event_service == None: subscription.event_service = subscription.onvif_service.events
+            if subscription.request_message != None: request_message = subscription.request_message
+            elif subscription.topic_filter != None:
+                # the request is kept, GetEventProperties is not requested again on re-subscribe
+                request_message = subscription.topic_filter.to_request_message(event_properties = subscription.event_service.GetEventProperties(),initial_termination_time = self.termination_time)
+                subscription.request_message = request_message
+            else: request_message = EventRequestMessages.CreatePullPointSubscriptionRequestMessage(filter = None,initial_termination_time = self.termination_time)
+            start_time = time.monotonic()
+            response = subscription.event_service.CreatePullPointSubscription(request_message = request_message)
+            address = response.SubscriptionReference.Address._value_1 if response else None
+        except Exception as emsg:
+            address = None
+            subscription.last_error = str(emsg)
+        with self.condition:
+            subscription.subscribing = False
+            if address == None:
+                subscription.address = None
+                subscription.resubscribe_delay = min(self.max_resubscribe_delay, max(self.min_resubscribe_delay, subscription.resubscribe_delay * 2))
+                subscription.last_error = subscription.last_error or "CreatePullPointSubscription unsuccess"
+                logger.error("%s subscribe unsuccess, retry in %.1f s..", subscription.key, subscription.resubscribe_delay)
+                if subscription.key in self.subscriptions:
+                    self.schedule(subscription.key, SUBSCRIBE, subscription.resubscribe_delay)
+                    record_retry(subscription.key, "CreatePullPointSubscription", "EventBinding")
+                return
+            lifetime = self.set_termination(subscription, response, start_time)
+            subscription.address = address
+            subscription.failures = 0
+            subscription.resubscribe_delay = 0.0
+            subscription.subscribe_count += 1
+            subscription.last_error = ""
+            if subscription.key in self.subscriptions:
+                self.schedule(subscription.key, RENEW, lifetime * (1 - self.renew_margin))
+                self.schedule(subscription.key, PULL)
+        logger.info("%s subscribed to %s for %.0f s..", subscription.key, address, lifetime)
+
+    def resubscribe(self,subscription : EventSubscription,reason : str) -> None:
+        # called with the condition held, the subscription is created again once the pull and renew in flight return
+        logger.warning("%s subscription lost (%s), subscribe again..", subscription.key, reason)
+        subscription.address = None
+        subscription.last_error = reason
+        if subscription.key in self.subscriptions and not (subscription.pulling or subscription.renewing or subscription.subscribing):
+            self.schedule(subscription.key, SUBSCRIBE)
+
+    def renew(self,subscription : EventSubscription) -> None:
+        with self.condition:
+            if subscription.renewing or subscription.address == None: return
+            subscription.renewing = True
+            address = subscription.address
+        start_time = time.monotonic()
+        try:
+            response = subscription.event_service.Renew(address = address,termination_time = self.termination_time)
+        except Exception as emsg:
+            response = {}
+            subscription.last_error = str(emsg)
+        with self.condition:
+            subscription.renewing = False
+            if subscription.address != address:
+                # subscribed again while renewing
+                if subscription.address == None: self.resubscribe(subscription, subscription.last_error)
+                return
+            if response:
+                subscription.failures = 0
+                lifetime = self.set_termination(subscription, response, start_time)
+                self.schedule(subscription.key, RENEW, lifetime * (1 - self.renew_margin))
+                return
+            subscription.failures += 1
+            if subscription.failures >= self.max_failures or not subscription.is_active():
+                self.resubscribe(subscription, "Renew unsuccess")
+            else:
+                # retry while the subscription is still alive
+                remaining_time = subscription.termination_deadline - time.monotonic()
+                self.schedule(subscription.key, RENEW, min(self.min_resubscribe_delay, remaining_time / 2))
+                record_retry(subscription.key, "Renew", "SubscriptionManagerBinding")
+
+    def pull(self,subscription : EventSubscription) -> None:
+        with self.condition:
+            if subscription.pulling or subscription.address == None: return
+            subscription.pulling = True
+            address = subscription.address
+        start_time = time.monotonic()
+        try:
+            pull_response = subscription.event_service.PullMessages(address = address,timeout = self.pull_timeout,message_limit = self.message_limit,topic_filter = subscription.topic_filter)
+            if pull_response: self.deliver(subscription, pull_response.NotificationMessage)
+        except Exception as emsg:
+            pull_response = {}
+            subscription.last_error = str(emsg)
+        with self.condition:
+            subscription.pulling = False
+            if subscription.address != address:
+                if subscription.address == None: self.resubscribe(subscription, subscription.last_error)
+                return
+            if pull_response:
+                subscription.failures = 0
+                # devices extend the subscription on every pull, the TerminationTime of the response is kept when it is later
+                lifetime = get_lifetime(pull_response)
+                if lifetime != None: subscription.termination_deadline = max(subscription.termination_deadline, start_time + lifetime)
+            else:
+                subscription.failures += 1
+            if subscription.failures >= self.max_failures or not subscription.is_active():
+                self.resubscribe(subscription, "PullMessages unsuccess" if subscription.failures else "subscription terminated")
+            elif subscription.failures:
+                self.schedule(subscription.key, PULL, self.min_resubscribe_delay)
+                record_retry(subscription.key, "PullMessages", "PullPointSubscriptionBinding")
+            else:
+                self.schedule(subscription.key, PULL)
+
+    def deliver(self,subscription : EventSubscription,notification_messages : list) -> None:
+        subscription.message_count += len(notification_messages)
+        for message in notification_messages:
+            # profile change and reboot events invalidate the cached stream uris and profiles of the device
+            subscription.onvif_service.handle_notification(message)
+            if self.callback != None:
+                try:
+                    self.callback(subscription.key, message)
+                except Exception as emsg:
+                    logger.error("%s event callback unsuccess.. -> %s", subscription.key, emsg)
+            if self.message_queue != None:
+                self.message_queue.put((subscription.key, message))
+
+    def unsubscribe(self,subscription : EventSubscription) -> bool:
+        address = subscription.address
+        subscription.address = None
+        if address == None or subscription.event_service == None: return False
+        try:
+            return subscription.event_service.Unsubscribe(address = address)
+        except Exception as emsg:
+            logger.error("%s Unsubscribe unsuccess.. -> %s", subscription.key, emsg)
+            return False
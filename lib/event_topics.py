@@ -0,0 +1,227 @@
+"""
+Created to index the TopicSet of GetEventProperties and to compile topic filters.
+
+    topic_trie = TopicTrie.from_event_properties(event_serv.GetEventProperties())
+    topic_filter = TopicFilter(["tns1:RuleEngine/CellMotionDetector/Motion", "tns1:VideoSource//."])
+    request_message = topic_filter.to_request_message(event_properties = event_serv.GetEventProperties())
+    topic_filter.match("tns1:VideoSource/MotionAlarm") # True
+
+A filter is sent to the device as a ConcreteSet TopicExpression when the device supports the dialect, every
+message is also matched on the client in O(topic depth) since the filter is optional for the device.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+from lxml import etree
+
+from lib.log_config import get_logger
+from lib.requests_messages.event_request_messages import EventRequestMessages
+
+logger = get_logger('event_service')
+
+WSNT_NS = "http://docs.oasis-open.org/wsn/b-2"
+WSTOP_NS = "http://docs.oasis-open.org/wsn/t-1"
+TT_NS = "http://www.onvif.org/ver10/schema"
+ONVIF_TOPIC_NS = "http://www.onvif.org/ver10/topics"
+CONCRETE_DIALECT = "http://docs.oasis-open.org/wsn/t-1/TopicExpression/Concrete"
+CONCRETE_SET_DIALECT = "http://www.onvif.org/ver10/tev/topicExpression/ConcreteSet"
+TOPIC_EXPRESSION_TAG = "{" + WSNT_NS + "}TopicExpression"
+TOPIC_ATTRIBUTE = "{" + WSTOP_NS + "}topic"
+
+# a pattern segment matching any topic segment and a pattern end matching the topic and all of its descendants
+ANY_SEGMENT = "*"
+DESCENDANTS = "//."
+
+def split_topic(topic : str) -> tuple:
+    """
+    Returns the segments of a topic without namespace prefixes, e.g. tns1:RuleEngine/tns1:CellMotionDetector -> (RuleEngine, CellMotionDetector).
+    """
+    return tuple(segment.rpartition(":")[2] for segment in topic.strip().split("/") if segment)
+
+class TopicNode:
+    __slots__ = ("children", "is_topic", "descendants")
+
+    def __init__(self) -> None:
+        self.children = {}
+        # True when the path up to the node is a topic (TopicTrie) or a complete pattern (TopicFilter)
+        self.is_topic = False
+        # True when a pattern ends with //. at the node
+        self.descendants = False
+
+class TopicTrie:
+    """
+    Trie of the topics a device supports, keyed by the segments of the topics.
+    """
+    def __init__(self) -> None:
+        self.root = TopicNode()
+        # root segment -> namespace of the topic tree, e.g. RuleEngine -> http://www.onvif.org/ver10/topics
+        self.namespaces = {}
+
+    @classmethod
+    def from_event_properties(cls,event_properties) -> 'TopicTrie':
+        """
+        Builds the trie from the TopicSet of a GetEventProperties response.
+        """
+        topic_trie = cls()
+        try:
+            topic_set = event_properties.TopicSet
+        except Exception:
+            topic_set = None
+        if topic_set != None: topic_trie.add_topic_set(topic_set)
+        return topic_trie
+
+    def add_topic_set(self,topic_set) -> None:
+        """
+        Adds the topic trees of a TopicSet, given as the zeep TopicSet object, its lxml element or the list of its topic tree elements.
+        """
+        if isinstance(topic_set, (list, tuple)): elements = topic_set
+        elif isinstance(topic_set, etree._Element): elements = list(topic_set) if etree.QName(topic_set).localname == "TopicSet" else [topic_set]
+        else: elements = getattr(topic_set, "_value_1", None) or []
+        for element in elements:
+            if not isinstance(element, etree._Element): continue
+            self.namespaces[etree.QName(element).localname] = etree.QName(element).namespace
+            self.add_topic_element(element, self.root)
+
+    def add_topic_element(self,element,parent : TopicNode) -> None:
+        # MessageDescription elements describe a topic, they are not topics
+        qname = etree.QName(element)
+        if qname.namespace == TT_NS: return
+        node = parent.children.get(qname.localname)
+        if node == None:
+            node = TopicNode()
+            parent.children[qname.localname] = node
+        if str(element.get(TOPIC_ATTRIBUTE, "")).lower() == "true": node.is_topic = True
+        for child in element:
+            if isinstance(child.tag, str): self.add_topic_element(child, node)
+
+    def add(self,topic : str) -> None:
+        node = self.root
+        for segment in split_topic(topic):
+            node = node.children.setdefault(segment, TopicNode())
+        node.is_topic = True
+
+    def find(self,topic : str) -> TopicNode:
+        node = self.root
+        for segment in split_topic(topic):
+            node = node.children.get(segment)
+            if node == None: return None
+        return node
+
+    def __contains__(self,topic : str) -> bool:
+        node = self.find(topic)
+        return node != None and node.is_topic
+
+    def get_topics(self,prefix = "") -> list:
+        """
+        Returns every topic of the trie, or every topic below the given prefix, as segment paths, e.g. RuleEngine/CellMotionDetector/Motion.
+        """
+        node = self.find(prefix) if prefix else self.root
+        if node == None: return []
+        topics = []
+        stack = [(node, split_topic(prefix))]
+        while stack:
+            node, segments = stack.pop()
+            if node.is_topic: topics.append("/".join(segments))
+            for segment, child in node.children.items():
+                stack.append((child, segments + (segment,)))
+        return sorted(topics)
+
+class TopicFilter:
+    """
+    Compiled topic filter of ConcreteSet expressions: concrete topics, topics ending with //. (topic and descendants),
+    expressions joined with | and, for client-side matching only, * segments.
+    """
+    def __init__(self,expressions,namespaces = None) -> None:
+        """
+        - requirements:
+            - expressions [list or str] : topic expressions, e.g. ["tns1:RuleEngine/CellMotionDetector/Motion", "tns1:VideoSource//."] or "tns1:A|tns1:B"
+            - namespaces [dict] : optional, prefix -> namespace of the prefixes used by the expressions, tns1 is known
+        """
+        if isinstance(expressions, str): expressions = [expressions]
+        self.expressions = [expression.strip() for group in expressions for expression in group.split("|") if expression.strip()]
+        self.namespaces = {"tns1": ONVIF_TOPIC_NS}
+        self.namespaces.update(namespaces or {})
+        self.root = TopicNode()
+        for expression in self.expressions:
+            self.add_expression(expression)
+        self.match_cache = {}
+
+    def add_expression(self,expression : str) -> None:
+        descendants = expression.endswith(DESCENDANTS)
+        if descendants: expression = expression[:-len(DESCENDANTS)]
+        node = self.root
+        for segment in split_topic(expression):
+            node = node.children.setdefault(segment, TopicNode())
+        if descendants: node.descendants = True
+        else: node.is_topic = True
+
+    def match(self,topic : str) -> bool:
+        """
+        Returns True when the topic of a NotificationMessage matches one of the expressions.
+        """
+        matched = self.match_cache.get(topic)
+        if matched == None:
+            matched = self.match_segments(self.root, split_topic(topic), 0)
+            # topics repeat on every message, the cache is bounded by the topics of the devices
+            if len(self.match_cache) < 4096: self.match_cache[topic] = matched
+        return matched
+
+    def match_segments(self,node : TopicNode,segments : tuple,index : int) -> bool:
+        while True:
+            if node.descendants: return True
+            if index == len(segments): return node.is_topic
+            wildcard = node.children.get(ANY_SEGMENT)
+            if wildcard != None and self.match_segments(wildcard, segments, index + 1): return True
+            node = node.children.get(segments[index])
+            if node == None: return False
+            index += 1
+
+    def is_concrete(self) -> bool:
+        return not any(ANY_SEGMENT in split_topic(expression) for expression in self.expressions)
+
+    def get_unknown_expressions(self,topic_trie : TopicTrie) -> list:
+        """
+        Returns the expressions whose topic is not in the TopicSet of the device.
+        """
+        unknown = []
+        for expression in self.expressions:
+            if expression.endswith(DESCENDANTS):
+                if topic_trie.find(expression[:-len(DESCENDANTS)]) == None: unknown.append(expression)
+            elif ANY_SEGMENT not in split_topic(expression) and expression not in topic_trie:
+                unknown.append(expression)
+        return unknown
+
+    def get_dialect(self,event_properties = None) -> str:
+        """
+        Returns the TopicExpression dialect of the filter the device supports, None when the filter can only be matched on the client.
+        """
+        if not self.expressions or not self.is_concrete(): return None
+        try:
+            dialects = [str(dialect).strip() for dialect in event_properties.TopicExpressionDialect]
+        except Exception:
+            # ConcreteSet is mandatory for ONVIF devices
+            dialects = [CONCRETE_SET_DIALECT]
+        if CONCRETE_SET_DIALECT in dialects: return CONCRETE_SET_DIALECT
+        if CONCRETE_DIALECT in dialects and len(self.expressions) == 1 and not self.expressions[0].endswith(DESCENDANTS): return CONCRETE_DIALECT
+        return None
+
+    def to_filter(self,event_properties = None) -> dict:
+        """
+        Returns the Filter of CreatePullPointSubscription with a TopicExpression of the filter, None when the device does not support it.
+        """
+        dialect = self.get_dialect(event_properties)
+        if dialect == None: return None
+        prefixes = {segment.partition(":")[0] for expression in self.expressions for segment in expression.split("/") if ":" in segment}
+        nsmap = {prefix: self.namespaces[prefix] for prefix in prefixes if prefix in self.namespaces}
+        topic_expression = etree.Element(TOPIC_EXPRESSION_TAG, nsmap = nsmap)
+        topic_expression.set("Dialect", dialect)
+        topic_expression.text = "|".join(self.expressions)
+        return {"_value_1": [topic_expression]}
+
+    def to_request_message(self,event_properties = None,initial_termination_time = "PT1M") -> EventRequestMessages.CreatePullPointSubscriptionRequestMessage:
+        """
+        Returns the CreatePullPointSubscription request of the filter, without a Filter when the device does not support it.
+        """
+        topic_filter = self.to_filter(event_properties)
+        if topic_filter == None: logger.info("Topic filter %s is matched on the client..", self.expressions)
+        return EventRequestMessages.CreatePullPointSubscriptionRequestMessage(filter = topic_filter,initial_termination_time = initial_termination_time)
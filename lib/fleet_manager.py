@@ -0,0 +1,183 @@
+"""
+Created to connect a fleet of Onvif devices through a bounded thread or process pool.
+
+    fleet = FleetManager(devices = [("192.168.1.168", 80, "admin", "9999"), ("192.168.1.169", 80, "admin", "9999")],max_workers = 64,rate_limit = 50)
+    fleet.connect_all()
+    print(fleet.get_results_table())
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from zeep.helpers import serialize_object
+
+from lib import onvif
+from lib.onvif import OnvifService
+from lib.fleet_snapshot import FleetSnapshotCapture
+from lib.log_config import get_logger
+
+logger = get_logger('fleet_manager')
+
+CAPABILITY_NAMES = ("Analytics", "Device", "Events", "Imaging", "Media", "PTZ")
+
+class RateLimiter:
+    """
+    Token bucket allowing rate requests per second with bursts up to burst requests.
+    """
+    def __init__(self,rate : float,burst = 1) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last_time) * self.rate)
+                self.last_time = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+def get_capability_names(capabilities) -> list:
+    names = []
+    for name in CAPABILITY_NAMES:
+        try:
+            if capabilities[name] != None: names.append(name)
+        except Exception:
+            pass
+    return names
+
+def connect_device(ip : str,port : int,username : str,password : str,wsdl_directory = "wsdl",concurrent = False,keep_service = True) -> dict:
+    """
+    Connects one device, it runs in the pool workers.
+    - requirements:
+        - keep_service [bool] : True returns the connected OnvifService, False returns plain values only (process pool)
+    - return:
+        - result [dict] : ip, port, con_status, device_info, capabilities, error, connect_time, onvif_service
+    """
+    result = {"ip": ip, "port": port, "con_status": False, "device_info": {}, "capabilities": [], "error": "", "connect_time": 0.0, "onvif_service": None}
+    start_time = time.perf_counter()
+    try:
+        onvif_service = OnvifService(ip = ip,username = username,password = password,port = port,wsdldirectory = wsdl_directory)
+        onvif_service.connect_onvif(concurrent = concurrent)
+        result["con_status"] = onvif_service.get_con_status()
+        result["device_info"] = dict(serialize_object(onvif_service.device_info) or {})
+        result["capabilities"] = get_capability_names(onvif_service.capabilities)
+        if not onvif_service.get_con_status():
+            result["error"] = "No onvif connection"
+        elif not onvif_service.device_info:
+            result["error"] = "Can not get device information"
+        elif not onvif_service.capabilities:
+            result["error"] = "Can not get capabilities"
+        elif not onvif_service.profiles:
+            result["error"] = "Can not get profiles"
+        elif not onvif_service.services:
+            result["error"] = "Can not get services"
+        if keep_service: result["onvif_service"] = onvif_service
+    except Exception as emsg:
+        result["error"] = str(emsg)
+    result["connect_time"] = time.perf_counter() - start_time
+    return result
+
+class FleetManager:
+    def __init__(self,devices = [],max_workers = 32,use_processes = False,per_host_limit = 1,rate_limit = None,wsdl_directory = "wsdl",concurrent_connect = False) -> None:
+        """
+        - requirements:
+            - devices [list] : (ip, port, username, password) entries
+            - max_workers [int] : pool size
+            - use_processes [bool] : False uses a thread pool, True uses a process pool (results hold no OnvifService objects)
+            - per_host_limit [int] : maximum concurrent connects to the same ip, e.g. NVR channels on different ports
+            - rate_limit [float] : optional, maximum connects started per second over the whole fleet
+            - wsdl_directory [str] : wsdl directory
+            - concurrent_connect [bool] : passed to OnvifService.connect_onvif
+        """
+        self.devices = list(devices)
+        # the proxy registry keeps the clients of every device of the fleet instead of rebuilding them
+        if len(self.devices) * onvif.PROXIES_PER_DEVICE > onvif.PROXY_CACHE_SIZE: onvif.set_proxy_cache_size(device_count = len(self.devices))
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.per_host_limit = per_host_limit
+        self.rate_limiter = RateLimiter(rate = rate_limit,burst = max(1, int(rate_limit))) if rate_limit else None
+        self.wsdl_directory = wsdl_directory
+        self.concurrent_connect = concurrent_connect
+        self.results = []
+        # created on the first capture_snapshots, it keeps the resolved snapshot uris
+        self.snapshot_capture = None
+
+    def connect_all(self) -> list:
+        """
+        Connects every device of the fleet.
+        - return:
+            - results [list] : one result dict per device in the order of devices (see connect_device)
+        """
+        logger.info("Try to connect %s onvif devices..", len(self.devices))
+        start_time = time.perf_counter()
+        results = [None] * len(self.devices)
+        pending = deque(enumerate(self.devices))
+        running = {}
+        host_counts = {}
+        executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        with executor_class(max_workers = self.max_workers) as executor:
+            while pending or running:
+                # start the next devices whose host has a free slot, keeping at most max_workers connects in flight
+                skipped = deque()
+                while pending and len(running) < self.max_workers:
+                    index, (ip, port, username, password) = pending.popleft()
+                    if host_counts.get(ip, 0) >= self.per_host_limit:
+                        skipped.append((index, (ip, port, username, password)))
+                        continue
+                    if self.rate_limiter != None: self.rate_limiter.acquire()
+                    host_counts[ip] = host_counts.get(ip, 0) + 1
+                    future = executor.submit(connect_device,ip,port,username,password,self.wsdl_directory,self.concurrent_connect,not self.use_processes)
+                    running[future] = (index, ip, port)
+                pending.extendleft(reversed(skipped))
+                if not running: continue
+                done, _ = wait(running, return_when = FIRST_COMPLETED)
+                for future in done:
+                    index, ip, port = running.pop(future)
+                    host_counts[ip] -= 1
+                    try:
+                        results[index] = future.result()
+                    except Exception as emsg:
+                        results[index] = {"ip": ip, "port": port, "con_status": False, "device_info": {}, "capabilities": [], "error": str(emsg), "connect_time": 0.0, "onvif_service": None}
+        self.results = results
+        connected = len([result for result in results if result["con_status"]])
+        logger.info("Connect fleet complete %s/%s devices connected in %.2f s", connected, len(results), time.perf_counter() - start_time)
+        return results
+
+    def get_connected_services(self) -> list:
+        """
+        Returns the connected OnvifService objects, only filled by thread pools.
+        """
+        return [result["onvif_service"] for result in self.results if result["con_status"] and result["onvif_service"] != None]
+
+    def capture_snapshots(self,profile_tokens = None,destination = None,max_concurrency = 64) -> list:
+        """
+        Captures a snapshot of every connected device, only filled by thread pools (see FleetSnapshotCapture.capture).
+        - requirements:
+            - profile_tokens [list] : optional profile tokens of every device, None captures the first profile
+            - destination [str] : optional directory of the images, None returns the image bytes
+            - max_concurrency [int] : maximum snapshot requests in flight
+        """
+        if self.snapshot_capture == None:
+            self.snapshot_capture = FleetSnapshotCapture(max_concurrency = max_concurrency)
+        self.snapshot_capture.max_concurrency = max_concurrency
+        return self.snapshot_capture.capture([(onvif_service, profile_tokens) for onvif_service in self.get_connected_services()],destination = destination)
+
+    def get_results_table(self) -> str:
+        """
+        Returns the results as a text table of address, con_status, capabilities, connect time and error.
+        """
+        rows = [("address", "con_status", "capabilities", "time [s]", "error")]
+        for result in self.results:
+            rows.append((f"{result['ip']}:{result['port']}", str(result["con_status"]), ",".join(result["capabilities"]), f"{result['connect_time']:.2f}", result["error"]))
+        widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+        return "\n".join("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in rows)
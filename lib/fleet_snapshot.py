@@ -0,0 +1,132 @@
+"""
+Created to capture snapshot images of many devices and profiles concurrently.
+
+    snapshot_capture = FleetSnapshotCapture(max_concurrency = 64)
+    results = snapshot_capture.capture(fleet.get_connected_services(),destination = "download")
+    results = snapshot_capture.capture([(onvif_device, ["Profile_1", "Profile_2"])])
+    print(results[0]["path"], results[0]["fetch_time"])
+
+Snapshot uris are resolved once per device and profile and kept in the media_uri_cache of the device (see lib/media_uri_cache.py),
+a later capture only fetches the images.
+Images are streamed by the SnapshotFetcher of each device (see lib/snapshot_fetcher.py).
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lib.onvif import OnvifService
+from lib.log_config import get_logger
+from lib.media_uri_cache import GET_SNAPSHOT_URI
+from lib.snapshot_fetcher import SNAPSHOT_POOL_SIZE, SNAPSHOT_TIMEOUT
+
+logger = get_logger('fleet_snapshot')
+
+def get_device_key(onvif_service : OnvifService) -> str:
+    return f"{onvif_service.ip}:{onvif_service.port}"
+
+class FleetSnapshotCapture:
+    def __init__(self,max_concurrency = 32,per_device_limit = SNAPSHOT_POOL_SIZE,timeout = SNAPSHOT_TIMEOUT) -> None:
+        """
+        - requirements:
+            - max_concurrency [int] : maximum snapshot requests in flight over every device
+            - per_device_limit [int] : maximum snapshot requests in flight to one device, e.g. for several profiles of the device
+            - timeout [float or tuple] : request timeout of one snapshot in seconds
+        """
+        self.max_concurrency = max_concurrency
+        self.per_device_limit = per_device_limit
+        self.timeout = timeout
+        self.device_semaphores = {}
+        self.lock = threading.Lock()
+
+    def get_device_semaphore(self,device_key : str) -> threading.BoundedSemaphore:
+        with self.lock:
+            semaphore = self.device_semaphores.get(device_key)
+            if semaphore == None:
+                semaphore = threading.BoundedSemaphore(self.per_device_limit)
+                self.device_semaphores[device_key] = semaphore
+        return semaphore
+
+    def get_snapshot_uri(self,onvif_service : OnvifService,profile_token : str,use_cache = True) -> str:
+        """
+        Returns the snapshot uri of the profile, GetSnapshotUri is only requested when the uri is not in the media_uri_cache of the device.
+        """
+        response = onvif_service.media.GetSnapshotUri(profile_token = profile_token,use_cache = use_cache)
+        return getattr(response, "Uri", None)
+
+    def invalidate(self,onvif_service : OnvifService) -> None:
+        """
+        Drops the cached snapshot uris of the device.
+        """
+        onvif_service.media_uri_cache.invalidate()
+
+    def get_targets(self,devices : list) -> list:
+        targets = []
+        for device in devices:
+            onvif_service, profile_tokens = device if isinstance(device, (tuple, list)) else (device, None)
+            if profile_tokens == None:
+                first_profile = onvif_service.get_first_profile() if onvif_service.profiles else None
+                profile_tokens = [first_profile.token] if first_profile != None else [None]
+            elif isinstance(profile_tokens, str):
+                profile_tokens = [profile_tokens]
+            targets.extend((onvif_service, profile_token) for profile_token in profile_tokens)
+        return targets
+
+    def capture_one(self,onvif_service : OnvifService,profile_token : str,destination : str) -> dict:
+        result = {"ip": onvif_service.ip, "port": onvif_service.port, "profile_token": profile_token, "status": False, "image": None, "path": None,
+                  "size": 0, "uri_time": 0.0, "fetch_time": 0.0, "total_time": 0.0, "error": ""}
+        start_time = time.perf_counter()
+        try:
+            if profile_token == None: raise ValueError("Device has no media profile")
+            with self.get_device_semaphore(get_device_key(onvif_service)):
+                for attempt in range(2):
+                    is_cached = attempt == 0 and onvif_service.media_uri_cache.contains(GET_SNAPSHOT_URI, profile_token)
+                    uri_start = time.perf_counter()
+                    snapshot_uri = self.get_snapshot_uri(onvif_service, profile_token, use_cache = attempt == 0)
+                    result["uri_time"] += time.perf_counter() - uri_start
+                    if not snapshot_uri: raise ValueError("GetSnapshotUri unsuccess")
+                    fetch_start = time.perf_counter()
+                    try:
+                        if destination == None:
+                            image = io.BytesIO()
+                            result["size"] = onvif_service.get_snapshot_fetcher().fetch(snapshot_uri, image, timeout = self.timeout)
+                            result["image"] = image.getvalue()
+                        else:
+                            path = os.path.join(destination, f"{onvif_service.ip}_{onvif_service.port}_{profile_token}.jpg")
+                            result["size"] = onvif_service.get_snapshot_fetcher().fetch(snapshot_uri, path, timeout = self.timeout)
+                            result["path"] = path
+                        break
+                    except Exception:
+                        # a cached uri can be outdated, e.g. after a reboot, it is resolved again once
+                        if not is_cached: raise
+                    finally:
+                        result["fetch_time"] += time.perf_counter() - fetch_start
+            result["status"] = True
+        except Exception as emsg:
+            result["error"] = str(emsg) or type(emsg).__name__
+        result["total_time"] = time.perf_counter() - start_time
+        return result
+
+    def capture(self,devices : list,destination = None) -> list:
+        """
+        Captures a snapshot of every device and profile.
+        - requirements:
+            - devices [list] : OnvifService objects (first profile) or (OnvifService, profile token or list of profile tokens) entries
+            - destination [str] : optional directory, images are written to <ip>_<port>_<profile token>.jpg, None returns the image bytes
+        - return:
+            - results [list] : one dict per device and profile in the given order with ip, port, profile_token, status, image, path, size,
+              uri_time, fetch_time, total_time (seconds) and error
+        """
+        targets = self.get_targets(devices)
+        logger.info("Try to capture %s snapshots..", len(targets))
+        start_time = time.perf_counter()
+        if destination != None: os.makedirs(destination, exist_ok = True)
+        with ThreadPoolExecutor(max_workers = max(1, min(self.max_concurrency, len(targets)))) as executor:
+            results = list(executor.map(lambda target: self.capture_one(target[0], target[1], destination), targets))
+        captured = len([result for result in results if result["status"]])
+        logger.info("Capture snapshots complete %s/%s in %.2f s", captured, len(results), time.perf_counter() - start_time)
+        return results
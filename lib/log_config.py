@@ -0,0 +1,129 @@
+"""
+Created to configure the loggers of the library in one place.
+
+    import logging
+    from lib.log_config import configure_logging
+    configure_logging(level = logging.INFO,console = True,filename = "log/onvif_service.log",use_queue = True)
+
+Every library logger shares the same handlers, with use_queue they only put records to a queue and a listener thread writes them.
+Messages are formatted lazily, a disabled level costs one cached isEnabledFor check per call.
+Loggers of the device and service objects add the host:port of their device to the records as %(device)s.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+
+# console and file handlers of the import time configuration, configure_logging replaces them
+DEBUG = True
+LOG = False
+LOG_FILENAME = "log/onvif_service.log"
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(device)s - %(message)s'
+
+# name -> logger of the library modules
+LOGGERS = {}
+LOG_LEVEL = logging.DEBUG
+# handlers attached to every library logger, a single QueueHandler when the queue is used
+ATTACHED_HANDLERS = []
+# handlers writing the records, closed on reconfiguration
+OUTPUT_HANDLERS = []
+QUEUE_LISTENER = None
+LOGGERS_LOCK = threading.RLock()
+
+class DeviceContextFilter(logging.Filter):
+    def filter(self,record) -> bool:
+        # records of module level functions have no device
+        if not hasattr(record, "device"): record.device = "-"
+        return True
+
+class DeviceLoggerAdapter(logging.LoggerAdapter):
+    """
+    Logger of an object bound to a device, adds the host:port of the device to its records.
+    The context is only built for enabled levels.
+    """
+    def __init__(self,logger : logging.Logger,onvif_service) -> None:
+        super().__init__(logger, {})
+        self.onvif_service = onvif_service
+
+    def process(self,msg,kwargs):
+        kwargs["extra"] = dict(kwargs.get("extra") or {}, device = f"{self.onvif_service.ip}:{self.onvif_service.port}")
+        return msg, kwargs
+
+def get_logger(name : str) -> logging.Logger:
+    """
+    Returns the library logger with the given name, it gets the shared handlers and the level of configure_logging.
+    """
+    global LOGGERS
+    with LOGGERS_LOCK:
+        logger = LOGGERS.get(name)
+        if logger == None:
+            logger = logging.getLogger(name)
+            logger.setLevel(LOG_LEVEL)
+            for handler in ATTACHED_HANDLERS: logger.addHandler(handler)
+            LOGGERS[name] = logger
+    return logger
+
+def get_device_logger(logger : logging.Logger,onvif_service) -> DeviceLoggerAdapter:
+    return DeviceLoggerAdapter(logger, onvif_service)
+
+def create_output_handlers(console : bool,filename : str,log_format : str) -> list:
+    formatter = logging.Formatter(log_format)
+    handlers = []
+    if console: handlers.append(logging.StreamHandler())
+    if filename: handlers.append(logging.handlers.RotatingFileHandler(filename, mode = 'a', maxBytes = 5*1024*1024, backupCount = 2, delay = True))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        handler.addFilter(DeviceContextFilter())
+    return handlers
+
+def stop_queue_listener() -> None:
+    global QUEUE_LISTENER
+    if QUEUE_LISTENER != None:
+        # the listener writes the queued records before it stops
+        QUEUE_LISTENER.stop()
+        QUEUE_LISTENER = None
+
+def configure_logging(level = logging.DEBUG,console = True,filename = None,use_queue = False,log_format = LOG_FORMAT) -> None:
+    """
+    Replaces the handlers and the level of every library logger.
+    - requirements:
+        - level [int] : level of the library loggers, e.g. logging.WARNING keeps the request logs of the services out
+        - console [bool] : True writes the records to stderr
+        - filename [str] : optional, rotating log file
+        - use_queue [bool] : True moves formatting and writing of the records to a listener thread
+        - log_format [str] : logging.Formatter format, %(device)s is the host:port of the device or -
+    """
+    global ATTACHED_HANDLERS, OUTPUT_HANDLERS, QUEUE_LISTENER, LOG_LEVEL
+    with LOGGERS_LOCK:
+        stop_queue_listener()
+        for logger in LOGGERS.values():
+            for handler in ATTACHED_HANDLERS: logger.removeHandler(handler)
+        for handler in OUTPUT_HANDLERS: handler.close()
+        OUTPUT_HANDLERS = create_output_handlers(console, filename, log_format)
+        if use_queue and OUTPUT_HANDLERS:
+            log_queue = queue.SimpleQueue()
+            QUEUE_LISTENER = logging.handlers.QueueListener(log_queue, *OUTPUT_HANDLERS, respect_handler_level = True)
+            QUEUE_LISTENER.start()
+            ATTACHED_HANDLERS = [logging.handlers.QueueHandler(log_queue)]
+        else:
+            ATTACHED_HANDLERS = list(OUTPUT_HANDLERS)
+        LOG_LEVEL = level
+        for logger in LOGGERS.values():
+            logger.setLevel(level)
+            for handler in ATTACHED_HANDLERS: logger.addHandler(handler)
+
+def set_log_level(level) -> None:
+    """
+    Sets the level of every library logger without touching the handlers.
+    """
+    global LOG_LEVEL
+    with LOGGERS_LOCK:
+        LOG_LEVEL = level
+        for logger in LOGGERS.values(): logger.setLevel(level)
+
+configure_logging(level = logging.DEBUG,console = DEBUG,filename = LOG_FILENAME if LOG else None)
+atexit.register(stop_queue_listener)
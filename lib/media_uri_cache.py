@@ -0,0 +1,192 @@
+"""
+Created to keep the stream and snapshot uris of a device between requests.
+
+    stream_uri = onvif_device.media.GetStreamUri(request_message)          # requested from the device
+    stream_uri = onvif_device.media.GetStreamUri(request_message)          # returned from the cache
+    onvif_device.media_uri_cache.invalidate_profile("Profile_1")
+    print(onvif_device.media_uri_cache.get_stats())
+
+A uri is kept as long as the MediaUri of the response allows it:
+    - InvalidAfterConnect true : the uri is not cached
+    - Timeout PT0S : the uri is valid until the profile changes, otherwise it expires after the timeout
+    - InvalidAfterReboot true : the uri is dropped when a reboot of the device is detected
+Changed or removed profiles are detected from the GetProfiles responses and the tns1:Media/ProfileChanged events,
+reboots from SystemReboot and the tns1:Monitoring/OperatingTime/LastReboot events. A device sends LastReboot as Initialized on
+every new subscription, it is only a reboot when the PropertyOperation is Changed or the reboot time differs from the last one seen.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import datetime
+import threading
+import time
+
+GET_STREAM_URI = "GetStreamUri"
+GET_SNAPSHOT_URI = "GetSnapshotUri"
+
+# topics are compared without their namespace prefix, e.g. tns1:Media/ProfileChanged -> Media/ProfileChanged
+PROFILE_CHANGED_TOPIC = "Media/ProfileChanged"
+CONFIGURATION_CHANGED_TOPIC = "Media/ConfigurationChanged"
+LAST_REBOOT_TOPIC = "Monitoring/OperatingTime/LastReboot"
+CHANGED_OPERATION = "Changed"
+
+def freeze(value):
+    """
+    Returns a hashable copy of a StreamSetup dict, e.g. {"Stream": "RTP-Unicast", "Transport": {"Protocol": "RTSP"}}.
+    """
+    if hasattr(value, "items"):
+        return tuple(sorted((str(name), freeze(item)) for name, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return getattr(value, "value", value)
+
+def get_timeout_seconds(timeout):
+    """
+    Returns the seconds of a MediaUri Timeout, 0 for PT0S, None when the duration has no fixed length, e.g. P1M.
+    """
+    if timeout == None: return 0
+    if isinstance(timeout, datetime.timedelta): return timeout.total_seconds()
+    return None
+
+def get_topic_name(topic) -> str:
+    return str(topic or "").partition(":")[2] or str(topic or "")
+
+class MediaUriEntry:
+    __slots__ = ("response", "expires_at", "invalid_after_reboot")
+
+    def __init__(self,response,expires_at,invalid_after_reboot) -> None:
+        self.response = response
+        # time.monotonic deadline, None is valid until it is invalidated
+        self.expires_at = expires_at
+        self.invalid_after_reboot = invalid_after_reboot
+
+class MediaUriCache:
+    def __init__(self) -> None:
+        """
+        Stream and snapshot uris of one device keyed by (operation, profile token, StreamSetup).
+        """
+        self.entries = {}
+        # profile token -> serialized profile of the last GetProfiles response
+        self.profile_fingerprints = {}
+        self.lock = threading.Lock()
+        self.hit_count = 0
+        self.miss_count = 0
+        self.invalidation_count = 0
+        # Status of the last LastReboot event, the reboot time of the device
+        self.last_reboot_time = None
+
+    def get(self,operation : str,profile_token : str,stream_setup = None):
+        """
+        Returns the cached GetStreamUri or GetSnapshotUri response, None when it is not cached or expired.
+        """
+        key = (operation, profile_token, freeze(stream_setup))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry != None and entry.expires_at != None and entry.expires_at <= time.monotonic():
+                del self.entries[key]
+                entry = None
+            if entry == None:
+                self.miss_count += 1
+                return None
+            self.hit_count += 1
+            return entry.response
+
+    def contains(self,operation : str,profile_token : str,stream_setup = None) -> bool:
+        with self.lock:
+            entry = self.entries.get((operation, profile_token, freeze(stream_setup)))
+            return entry != None and (entry.expires_at == None or entry.expires_at > time.monotonic())
+
+    def put(self,operation : str,profile_token : str,stream_setup,response) -> bool:
+        """
+        Caches a GetStreamUri or GetSnapshotUri response according to its InvalidAfterConnect and Timeout fields.
+        - return:
+            - status [boolean] : True when the response is cached
+        """
+        if not getattr(response, "Uri", None) or getattr(response, "InvalidAfterConnect", False): return False
+        timeout = get_timeout_seconds(getattr(response, "Timeout", None))
+        if timeout == None or timeout < 0: return False
+        expires_at = time.monotonic() + timeout if timeout > 0 else None
+        with self.lock:
+            self.entries[(operation, profile_token, freeze(stream_setup))] = MediaUriEntry(response, expires_at, bool(getattr(response, "InvalidAfterReboot", False)))
+        return True
+
+    def invalidate(self) -> None:
+        with self.lock:
+            self.invalidation_count += len(self.entries)
+            self.entries = {}
+
+    def invalidate_profile(self,profile_token : str) -> None:
+        """
+        Drops the uris of the profile, e.g. after its encoder configuration changed.
+        """
+        with self.lock:
+            self.drop(lambda key, entry: key[1] == profile_token)
+
+    def notify_reboot(self) -> None:
+        """
+        Drops the uris which are invalid after a reboot of the device.
+        """
+        with self.lock:
+            self.drop(lambda key, entry: entry.invalid_after_reboot)
+
+    def drop(self,condition) -> None:
+        # called with the lock held
+        keys = [key for key, entry in self.entries.items() if condition(key, entry)]
+        for key in keys: del self.entries[key]
+        self.invalidation_count += len(keys)
+
+    def update_profiles(self,profiles) -> list:
+        """
+        Compares the profiles with the ones of the last call and drops the uris of the changed and removed profiles.
+        - requirements:
+            - profiles [list] : GetProfiles response
+        - return:
+            - changed [list] : tokens of the changed and removed profiles
+        """
+        fingerprints = {}
+        for profile in profiles or []:
+            token = getattr(profile, "token", None)
+            if token != None: fingerprints[token] = str(profile)
+        with self.lock:
+            changed = [token for token, fingerprint in self.profile_fingerprints.items() if fingerprints.get(token) != fingerprint]
+            self.profile_fingerprints = fingerprints
+            if changed:
+                changed_tokens = set(changed)
+                self.drop(lambda key, entry: key[1] in changed_tokens)
+        return changed
+
+    def handle_notification(self,message) -> bool:
+        """
+        Invalidates the uris on a profile change, configuration change or reboot event of the device.
+        - requirements:
+            - message [NotificationMessage] : message of a PullMessages response
+        - return:
+            - status [boolean] : True when the message is one of these events, False for a LastReboot event of an unchanged reboot time
+        """
+        topic = get_topic_name(getattr(message, "Topic", None))
+        if topic == PROFILE_CHANGED_TOPIC:
+            tokens = [item.Value for item in getattr(message, "SourceItems", []) if item.Name == "Token"]
+            if tokens:
+                for token in tokens: self.invalidate_profile(token)
+            else:
+                self.invalidate()
+        elif topic == CONFIGURATION_CHANGED_TOPIC:
+            # a configuration can be used by several profiles
+            self.invalidate()
+        elif topic == LAST_REBOOT_TOPIC:
+            message_attributes = getattr(message, "Message", None)
+            operation = message_attributes.get("PropertyOperation") if hasattr(message_attributes, "get") else None
+            reboot_times = [item.Value for item in getattr(message, "DataItems", []) if item.Name == "Status"]
+            reboot_time = reboot_times[0] if reboot_times else None
+            with self.lock:
+                last_reboot_time = self.last_reboot_time
+                if reboot_time != None: self.last_reboot_time = reboot_time
+            if operation != CHANGED_OPERATION and (reboot_time == None or last_reboot_time == None or reboot_time == last_reboot_time): return False
+            self.notify_reboot()
+        else:
+            return False
+        return True
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hit_count, "misses": self.miss_count, "invalidations": self.invalidation_count}
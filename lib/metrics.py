@@ -0,0 +1,286 @@
+"""
+Created to measure every SOAP call of the service classes per device and operation.
+
+    metrics_registry = MetricsRegistry()
+    set_metrics_registry(metrics_registry)
+    metrics_registry.add_listener(lambda record: print(record.device, record.operation, record.latency))
+    onvif_device.ptz.GetStatus(profile_token = "Profile_1")
+    print(metrics_registry.get_slowest(limit = 10))
+    open("metrics.prom", "w").write(metrics_registry.to_prometheus())
+
+The proxies of lib.onvif.get_service_proxy and AsyncOnvifService.get_async_service_proxy are only wrapped while a registry is set,
+a process without a registry keeps the plain zeep proxies.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import bisect
+import contextvars
+import threading
+import time
+from urllib.parse import urlsplit
+from zeep.exceptions import Fault
+
+# upper bounds in seconds of the latency histogram buckets, the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_REGISTRY = None
+
+# [request bytes, response bytes] of the SOAP call running in the current thread or task, filled by the transport hooks
+CURRENT_CALL = contextvars.ContextVar("onvif_metrics_call", default = None)
+
+def set_metrics_registry(metrics_registry) -> None:
+    """
+    Sets the process-wide MetricsRegistry of the service calls, None disables the instrumentation.
+    """
+    global METRICS_REGISTRY
+    METRICS_REGISTRY = metrics_registry
+
+def get_metrics_registry():
+    return METRICS_REGISTRY
+
+def get_device_name(xaddr : str) -> str:
+    """
+    Returns the host:port of a service address, e.g. http://192.168.1.168:80/onvif/ptz_service -> 192.168.1.168:80.
+    """
+    return urlsplit(xaddr).netloc or xaddr
+
+def get_error_code(exception : Exception) -> str:
+    """
+    Returns the most specific fault code of a SOAP fault, e.g. ter:InvalidArgVal -> InvalidArgVal, else the exception class name.
+    """
+    if isinstance(exception, Fault):
+        codes = [code for code in (exception.subcodes or []) if code != None]
+        code = codes[-1] if codes else exception.code
+        if code != None:
+            return str(getattr(code, "localname", code)).rpartition(":")[2].rpartition("}")[2]
+        return "Fault"
+    return type(exception).__name__
+
+def escape_label_value(value) -> str:
+    """
+    Escapes a label value for the Prometheus text format, fault codes and reasons can contain backslashes, quotes and newlines.
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def record_requests_response(response,*args,**kwargs):
+    # requests response hook of the device transports
+    sizes = CURRENT_CALL.get()
+    if sizes != None:
+        body = response.request.body
+        sizes[0] += len(body) if body != None else 0
+        sizes[1] += len(response.content)
+    return response
+
+async def record_httpx_response(response) -> None:
+    # httpx response hook of the async device transports, the body is read by the client anyway
+    sizes = CURRENT_CALL.get()
+    if sizes != None:
+        sizes[0] += len(response.request.content)
+        sizes[1] += len(await response.aread())
+
+class CallRecord:
+    """
+    One measured SOAP call, given to the listeners of the registry.
+    """
+    __slots__ = ("device", "service", "operation", "latency", "request_bytes", "response_bytes", "error")
+
+    def __init__(self,device : str,service : str,operation : str,latency : float,request_bytes = 0,response_bytes = 0,error = None) -> None:
+        self.device = device
+        self.service = service
+        self.operation = operation
+        # seconds
+        self.latency = latency
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+        # fault code or exception class name, None on success
+        self.error = error
+
+class OperationStats:
+    __slots__ = ("count", "latency_sum", "latency_max", "buckets", "request_bytes", "response_bytes", "retries", "errors")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+        # error code -> count
+        self.errors = {}
+
+    def get_quantile(self,quantile : float) -> float:
+        """
+        Returns the upper bound of the bucket of the quantile in seconds, the maximum latency for the +Inf bucket.
+        """
+        if self.count == 0: return 0.0
+        rank = quantile * self.count
+        total = 0
+        for index, bucket_count in enumerate(self.buckets):
+            total += bucket_count
+            if total >= rank:
+                return min(LATENCY_BUCKETS[index], self.latency_max) if index < len(LATENCY_BUCKETS) else self.latency_max
+        return self.latency_max
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "errors": sum(self.errors.values()), "error_codes": dict(self.errors), "retries": self.retries,
+                "mean_ms": self.latency_sum / self.count * 1000 if self.count else 0.0, "p50_ms": self.get_quantile(0.5) * 1000,
+                "p95_ms": self.get_quantile(0.95) * 1000, "max_ms": self.latency_max * 1000,
+                "request_bytes": self.request_bytes, "response_bytes": self.response_bytes}
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        """
+        Latency histograms, payload sizes, retries and error codes of the SOAP calls keyed by (device, service, operation).
+        """
+        self.operations = {}
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def add_listener(self,callback) -> None:
+        """
+        Adds a callback(record : CallRecord) called after every measured call, e.g. to feed an other metrics system.
+        """
+        self.listeners = self.listeners + [callback]
+
+    def remove_listener(self,callback) -> None:
+        self.listeners = [listener for listener in self.listeners if listener != callback]
+
+    def get_operation_stats(self,device : str,service : str,operation : str) -> OperationStats:
+        # called with the lock held
+        key = (device, service, operation)
+        stats = self.operations.get(key)
+        if stats == None:
+            stats = OperationStats()
+            self.operations[key] = stats
+        return stats
+
+    def observe(self,record : CallRecord) -> None:
+        with self.lock:
+            stats = self.get_operation_stats(record.device, record.service, record.operation)
+            stats.count += 1
+            stats.latency_sum += record.latency
+            if record.latency > stats.latency_max: stats.latency_max = record.latency
+            stats.buckets[bisect.bisect_left(LATENCY_BUCKETS, record.latency)] += 1
+            stats.request_bytes += record.request_bytes
+            stats.response_bytes += record.response_bytes
+            if record.error != None: stats.errors[record.error] = stats.errors.get(record.error, 0) + 1
+        for listener in self.listeners:
+            try:
+                listener(record)
+            except Exception:
+                pass
+
+    def record_retry(self,device : str,operation : str,service = "") -> None:
+        """
+        Counts a request the library sent again after a failure, e.g. a CreatePullPointSubscription retry.
+        """
+        with self.lock:
+            self.get_operation_stats(device, service, operation).retries += 1
+
+    def remove_device(self,device : str) -> None:
+        with self.lock:
+            for key in [key for key in self.operations if key[0] == device]:
+                del self.operations[key]
+
+    def reset(self) -> None:
+        with self.lock:
+            self.operations = {}
+
+    def get_stats(self,device = None) -> list:
+        """
+        Returns the stats of every operation, or of the operations of one device, as dicts with device, service and operation.
+        """
+        with self.lock:
+            return [dict(device = key[0], service = key[1], operation = key[2], **stats.to_dict())
+                    for key, stats in self.operations.items() if device == None or key[0] == device]
+
+    def get_slowest(self,limit = 10,key = "p95_ms") -> list:
+        """
+        Returns the limit slowest (device, service, operation) stats ordered by the given stat, e.g. p95_ms, mean_ms or max_ms.
+        """
+        return sorted(self.get_stats(), key = lambda stats: stats[key], reverse = True)[:limit]
+
+    def to_prometheus(self,prefix = "onvif") -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        def labels(key, **extra):
+            pairs = list(zip(("device", "service", "operation"), key)) + list(extra.items())
+            return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in pairs) + "}"
+
+        with self.lock:
+            operations = [(key, stats.to_dict(), list(stats.buckets), stats.latency_sum) for key, stats in self.operations.items()]
+        lines = [f"# TYPE {prefix}_operation_duration_seconds histogram"]
+        for key, stats, buckets, latency_sum in operations:
+            total = 0
+            for index, bucket_count in enumerate(buckets):
+                total += bucket_count
+                bound = str(LATENCY_BUCKETS[index]) if index < len(LATENCY_BUCKETS) else "+Inf"
+                lines.append(f"{prefix}_operation_duration_seconds_bucket{labels(key, le = bound)} {total}")
+            lines.append(f"{prefix}_operation_duration_seconds_sum{labels(key)} {latency_sum}")
+            lines.append(f"{prefix}_operation_duration_seconds_count{labels(key)} {stats['count']}")
+        for name, stat in (("request_bytes_total", "request_bytes"), ("response_bytes_total", "response_bytes"), ("retries_total", "retries")):
+            lines.append(f"# TYPE {prefix}_operation_{name} counter")
+            lines.extend(f"{prefix}_operation_{name}{labels(key)} {stats[stat]}" for key, stats, _, _ in operations)
+        lines.append(f"# TYPE {prefix}_operation_errors_total counter")
+        for key, stats, _, _ in operations:
+            lines.extend(f"{prefix}_operation_errors_total{labels(key, code = code)} {count}" for code, count in stats["error_codes"].items())
+        return "\n".join(lines) + "\n"
+
+class InstrumentedServiceProxy:
+    """
+    Wraps a zeep ServiceProxy or AsyncServiceProxy, its operations are measured into the registry.
+    """
+    def __init__(self,service_proxy,metrics_registry : MetricsRegistry,xaddr : str,binding : str,is_async = False) -> None:
+        self.service_proxy = service_proxy
+        self.metrics_registry = metrics_registry
+        self.device = get_device_name(xaddr)
+        # binding local name, e.g. {http://www.onvif.org/ver20/ptz/wsdl}PTZBinding -> PTZBinding
+        self.service = binding.rpartition("}")[2]
+        self.is_async = is_async
+
+    def __getattr__(self,name : str):
+        operation = getattr(self.service_proxy, name)
+        if not callable(operation): return operation
+        return self.wrap_async(name, operation) if self.is_async else self.wrap(name, operation)
+
+    def __getitem__(self,name : str):
+        operation = self.service_proxy[name]
+        return self.wrap_async(name, operation) if self.is_async else self.wrap(name, operation)
+
+    def observe(self,name : str,start : float,sizes : list,error) -> None:
+        self.metrics_registry.observe(CallRecord(self.device, self.service, name, time.perf_counter() - start, sizes[0], sizes[1], error))
+
+    def wrap(self,name : str,operation):
+        def call(*args,**kwargs):
+            sizes = [0, 0]
+            token = CURRENT_CALL.set(sizes)
+            start = time.perf_counter()
+            try:
+                response = operation(*args, **kwargs)
+            except Exception as emsg:
+                self.observe(name, start, sizes, get_error_code(emsg))
+                raise
+            finally:
+                CURRENT_CALL.reset(token)
+            self.observe(name, start, sizes, None)
+            return response
+        return call
+
+    def wrap_async(self,name : str,operation):
+        async def call(*args,**kwargs):
+            sizes = [0, 0]
+            token = CURRENT_CALL.set(sizes)
+            start = time.perf_counter()
+            try:
+                response = await operation(*args, **kwargs)
+            except Exception as emsg:
+                self.observe(name, start, sizes, get_error_code(emsg))
+                raise
+            finally:
+                CURRENT_CALL.reset(token)
+            self.observe(name, start, sizes, None)
+            return response
+        return call
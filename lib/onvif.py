@@ -1,38 +1,32 @@
 import datetime
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from zeep.client import Client, CachingClient, Settings
+from zeep.transports import Transport
+from zeep.wsdl import Document
 from zeep.wsse.username import UsernameToken
+from zeep.loader import parse_xml
 import json
 import sys
-import logging
 import os
-from zeep.plugins import HistoryPlugin
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+from lib.wsdl_snapshot import load_snapshot_document, load_wsdl_snapshot
+from lib.username_token import DeviceUsernameToken
+from lib.request_history import RequestHistory
+from lib.snapshot_fetcher import SnapshotFetcher
+from lib.media_uri_cache import MediaUriCache
+from lib.service_index import ServiceIndex
+from lib import metrics
+from lib import device_metadata_cache
+from lib.device_metadata_cache import get_device_identity, get_operation_key
+from lib.log_config import get_logger, get_device_logger
 
-HISTORY = HistoryPlugin()
-
-LOG = False
-DEBUG = True
-
-LOG_FILENAME = "log/onvif_service.log"
-
-logger = logging.getLogger('onvif_service')
-logger.setLevel(logging.DEBUG)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-
-# logging.basicConfig(filename="onvif_service.log",format='%(asctime)s - %(levelname)s : %(message)s',level=logging.DEBUG)
-
-if DEBUG:
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
-    ch.setFormatter(formatter)
-    logger.addHandler(ch)
-
-if LOG: 
-    log = RotatingFileHandler(LOG_FILENAME, mode='a', maxBytes=5*1024*1024,backupCount=2, encoding=None, delay=True)
-    # log = logging.FileHandler(filename=LOG_FILENAME, mode='w', encoding=None, delay=False, errors=None)
-    log.setLevel(logging.DEBUG)
-    log.setFormatter(formatter)
-    logger.addHandler(log)
+logger = get_logger('onvif_service')
 
 SETTINGS = Settings()
 SETTINGS.strict = False
@@ -43,23 +37,262 @@ MEDIA_SERVICE_NS = "http://www.onvif.org/ver10/media/wsdl"
 IMAGING_SERVICE_NS = "http://www.onvif.org/ver10/image/wsdl"
 PTZ_SERVICE_NS = "http://www.onvif.org/ver10/ptz/wsdl"
 
+# Process-wide store of parsed WSDL documents keyed by (wsdl, strict, xml_huge_tree)
+WSDL_DOCUMENTS = {}
+WSDL_DOCUMENTS_LOCK = threading.Lock()
+# (wsdl directory, strict, xml_huge_tree) keys whose snapshot file was already tried
+WSDL_SNAPSHOTS = set()
+# pickled snapshot documents keyed like WSDL_DOCUMENTS, unpickled on first use
+WSDL_SNAPSHOT_DOCUMENTS = {}
+
+# Process-wide registry of zeep service proxies keyed by (wsdl, binding QName, xaddr, settings, username token)
+# a device uses about 8 proxies (device, media, ptz, imaging, events, analytics bindings and its pull points), see set_proxy_cache_size
+PROXIES_PER_DEVICE = 8
+PROXY_CACHE_SIZE = 4096
+PROXY_CACHE = OrderedDict()
+PROXY_CACHE_LOCK = threading.Lock()
+
+# Process-wide pooled http transports keyed by device host (scheme://host:port), shared by every service of a device
+TRANSPORT_POOL_SIZE = 4
+TRANSPORT_KEEP_ALIVE = True
+TRANSPORT_IDLE_TIMEOUT = 60
+TRANSPORTS = {}
+TRANSPORTS_LOCK = threading.Lock()
+TRANSPORTS_EVICTION_TIME = time.monotonic()
+
+# username token of a device -> RequestHistory of the devices which enabled their history, see OnvifService.enable_history
+REQUEST_HISTORIES = weakref.WeakKeyDictionary()
+
+def set_proxy_cache_size(size = None,device_count = None) -> None:
+    """
+    Sets the maximum cached service proxies, the least recently used ones are evicted beyond it.
+    - requirements:
+        - size [int] : maximum proxies
+        - device_count [int] : alternative to size, reserves PROXIES_PER_DEVICE proxies per device
+    """
+    global PROXY_CACHE_SIZE
+    if size == None: size = device_count * PROXIES_PER_DEVICE
+    with PROXY_CACHE_LOCK:
+        PROXY_CACHE_SIZE = max(1, int(size))
+        while len(PROXY_CACHE) > PROXY_CACHE_SIZE:
+            PROXY_CACHE.popitem(last = False)
+
+def set_transport_options(pool_size = None,keep_alive = None,idle_timeout = None) -> None:
+    """
+    Sets the options of the device transports created after the call.
+    - requirements:
+        - pool_size [int] : maximum pooled connections per device host
+        - keep_alive [bool] : False closes the connection after every request
+        - idle_timeout [float] : seconds after which the idle connections of a device host are closed
+    """
+    global TRANSPORT_POOL_SIZE, TRANSPORT_KEEP_ALIVE, TRANSPORT_IDLE_TIMEOUT
+    if pool_size != None: TRANSPORT_POOL_SIZE = pool_size
+    if keep_alive != None: TRANSPORT_KEEP_ALIVE = keep_alive
+    if idle_timeout != None: TRANSPORT_IDLE_TIMEOUT = idle_timeout
+
+def get_transport_host(xaddr : str) -> str:
+    address = urlsplit(xaddr)
+    return f"{address.scheme}://{address.netloc}"
+
+def close_response_connection(response,*args,**kwargs):
+    # devices do not always answer "Connection: close" with a closed socket, the client side drops it
+    connection = getattr(response.raw, "connection", None)
+    response.content
+    if connection != None: connection.close()
+    return response
+
+def create_device_transport() -> Transport:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections = 1,pool_maxsize = TRANSPORT_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not TRANSPORT_KEEP_ALIVE:
+        session.headers["Connection"] = "close"
+        session.hooks["response"].append(close_response_connection)
+    # payload sizes of the measured calls, see lib/metrics.py
+    session.hooks["response"].append(metrics.record_requests_response)
+    return Transport(session = session)
+
+def evict_idle_transports() -> None:
+    """
+    Closes the pooled connections of the device hosts which are not used for TRANSPORT_IDLE_TIMEOUT seconds.
+    The transports stay registered, they open new connections on their next request.
+    """
+    global TRANSPORTS, TRANSPORTS_LOCK, TRANSPORTS_EVICTION_TIME
+    now = time.monotonic()
+    with TRANSPORTS_LOCK:
+        TRANSPORTS_EVICTION_TIME = now
+        idle_transports = [entry for entry in TRANSPORTS.values() if entry[2] and now - entry[1] > TRANSPORT_IDLE_TIMEOUT]
+        for entry in idle_transports:
+            entry[2] = False
+    for entry in idle_transports:
+        entry[0].session.close()
+
+def get_device_transport(xaddr : str) -> Transport:
+    """
+    Returns the pooled keep-alive transport of the device host of the xaddr.
+    - requirements:
+        - xaddr [str] : service address of the device, e.g. "http://192.168.1.168:80/onvif/ptz_service"
+    - return:
+        - Transport
+    """
+    global TRANSPORTS, TRANSPORTS_LOCK, TRANSPORTS_EVICTION_TIME
+    now = time.monotonic()
+    if now - TRANSPORTS_EVICTION_TIME > TRANSPORT_IDLE_TIMEOUT / 2:
+        evict_idle_transports()
+    host = get_transport_host(xaddr)
+    with TRANSPORTS_LOCK:
+        # entry : [transport, last used time, has open connections]
+        entry = TRANSPORTS.get(host)
+        if entry == None:
+            entry = [create_device_transport(), now, True]
+            TRANSPORTS[host] = entry
+        entry[1] = now
+        entry[2] = True
+    return entry[0]
+
+def close_device_transports() -> None:
+    """
+    Closes and drops every device transport, cached service proxies are dropped too since they hold the transports.
+    """
+    global TRANSPORTS, TRANSPORTS_LOCK
+    with TRANSPORTS_LOCK:
+        transports = [entry[0] for entry in TRANSPORTS.values()]
+        TRANSPORTS.clear()
+    clear_service_proxies()
+    for transport in transports:
+        transport.session.close()
+
 def isfile_exist(path = "wsdl/test.txt"):
     return os.path.isfile(path)
 
-def get_caching_client(isAuth = True,wsdl_URL = "wsdl/devicemgmt.wsdl",username_token = UsernameToken(username="admin",password="9999")):
-    global SETTINGS
+def get_wsdl_document(wsdl_URL = "wsdl/devicemgmt.wsdl",settings = SETTINGS) -> Document:
+    """
+    Returns the parsed zeep Document of the given wsdl, it is parsed once per process and shared by every client.
+    The document is only read after parsing, so devices bind their own XAddr on top of the same schema.
+    Local wsdl files are taken from the wsdl directory snapshot when an up to date one exists (see lib/wsdl_snapshot.py).
+    - requirements:
+        - wsdl_URL [str] : local wsdl path or onvif.org URL
+        - settings [Settings] : zeep settings used while parsing
+    - return:
+        - Document or None if the wsdl can not be parsed
+    """
+    global WSDL_DOCUMENTS, WSDL_DOCUMENTS_LOCK, WSDL_SNAPSHOTS, WSDL_SNAPSHOT_DOCUMENTS
+    is_local = isfile_exist(wsdl_URL)
+    location = os.path.abspath(wsdl_URL) if is_local else wsdl_URL
+    key = (location, settings.strict, settings.xml_huge_tree)
+    document = WSDL_DOCUMENTS.get(key)
+    if document == None:
+        with WSDL_DOCUMENTS_LOCK:
+            snapshot_key = (os.path.dirname(location), settings.strict, settings.xml_huge_tree)
+            if is_local and snapshot_key not in WSDL_SNAPSHOTS:
+                WSDL_SNAPSHOTS.add(snapshot_key)
+                for path, pickled_document in load_wsdl_snapshot(wsdl_directory = snapshot_key[0],settings = settings).items():
+                    WSDL_SNAPSHOT_DOCUMENTS[(path, settings.strict, settings.xml_huge_tree)] = pickled_document
+            document = WSDL_DOCUMENTS.get(key)
+            if document == None and key in WSDL_SNAPSHOT_DOCUMENTS:
+                document = load_snapshot_document(WSDL_SNAPSHOT_DOCUMENTS.pop(key),settings = settings)
+                if document != None: WSDL_DOCUMENTS[key] = document
+            if document == None:
+                try:
+                    document = Document(location, Transport(), settings=settings)
+                except Exception as emsg:
+                    logger.error("Parse wsdl document exception : \n%s", emsg)
+                else:
+                    WSDL_DOCUMENTS[key] = document
+    return document
+
+def get_caching_client(isAuth = True,wsdl_URL = "wsdl/devicemgmt.wsdl",username_token = UsernameToken(username="admin",password="9999"),settings = SETTINGS,transport = None):
     caching_client = None
     if isfile_exist(wsdl_URL) or wsdl_URL.find("http://www.onvif.org") != -1:
+        document = get_wsdl_document(wsdl_URL = wsdl_URL,settings = settings)
+        if document != None:
+            try:
+                if isAuth: 
+                    caching_client = Client(wsdl=document, wsse=username_token, transport=transport, settings=settings)
+                else: 
+                    caching_client = Client(wsdl=document, transport=transport, settings=settings)
+            except Exception as emsg:
+                logger.error("Create caching client exception : \n%s", emsg)
+    else:
+        logger.error("No such a file directory : %s", wsdl_URL)
+    return caching_client
+
+def get_service_proxy(wsdl_URL : str,binding : str,xaddr : str,username_token = None,settings = SETTINGS):
+    """
+    Returns a long-lived zeep ServiceProxy from the process-wide proxy registry.
+    The client for a (wsdl, binding, xaddr, settings, username token) key is created once with the token as its wsse,
+    so devices sharing an xaddr with other credentials, e.g. NVR channels, never sign with the token of an other device.
+    The least recently used proxy is evicted when the registry grows beyond PROXY_CACHE_SIZE (see set_proxy_cache_size).
+    The RequestHistory of the device owning the username token is attached as the only plugin of the client when the device enabled its history.
+    The proxy is wrapped into an InstrumentedServiceProxy while a metrics registry is set (see lib/metrics.py).
+    - requirements:
+        - wsdl_URL [str] : local wsdl path or onvif.org URL
+        - binding [str] : binding QName, e.g. "{http://www.onvif.org/ver10/device/wsdl}DeviceBinding"
+        - xaddr [str] : service address of the device
+        - username_token [DeviceUsernameToken] : optional, None means no authentication
+        - settings [Settings] : optional zeep settings, should be a module level object since it is keyed by identity
+    - return:
+        - ServiceProxy or None if the client can not be created
+    """
+    global PROXY_CACHE, PROXY_CACHE_LOCK
+    # the client of an entry holds the token as its wsse, so the id is not reused while the entry exists
+    key = (wsdl_URL, binding, xaddr, id(settings), id(username_token))
+    with PROXY_CACHE_LOCK:
+        entry = PROXY_CACHE.get(key)
+        if entry != None: PROXY_CACHE.move_to_end(key)
+    if entry == None:
+        caching_client = get_caching_client(isAuth = username_token != None,wsdl_URL = wsdl_URL,username_token = username_token,settings = settings,transport = get_device_transport(xaddr))
+        if caching_client == None:
+            return None
         try:
-            if isAuth: 
-                caching_client = CachingClient(wsdl=wsdl_URL, wsse=username_token, settings=SETTINGS,plugins=[HISTORY])
-            else: 
-                caching_client = CachingClient(wsdl=wsdl_URL, settings=SETTINGS,plugins=[HISTORY])
+            service_proxy = caching_client.create_service(binding, xaddr)
         except Exception as emsg:
-            logger.error(f"Create caching client exception : \n{emsg}")
+            logger.error("Create service proxy exception : \n%s", emsg)
+            return None
+        entry = (caching_client, service_proxy)
+        with PROXY_CACHE_LOCK:
+            PROXY_CACHE[key] = entry
+            while len(PROXY_CACHE) > PROXY_CACHE_SIZE:
+                PROXY_CACHE.popitem(last = False)
     else:
-        logger.error(f"No such a file directory : {str(wsdl_URL)}")
-    return caching_client
+        # marks the device host as used for the idle eviction
+        get_device_transport(xaddr)
+    caching_client, service_proxy = entry
+    if REQUEST_HISTORIES or caching_client.plugins:
+        request_history = REQUEST_HISTORIES.get(username_token) if username_token != None else None
+        plugins = [request_history] if request_history != None else []
+        if caching_client.plugins != plugins: caching_client.plugins = plugins
+    metrics_registry = metrics.METRICS_REGISTRY
+    if metrics_registry != None:
+        return metrics.InstrumentedServiceProxy(service_proxy,metrics_registry,xaddr = xaddr,binding = binding)
+    return service_proxy
+
+def clear_service_proxies(xaddr = None) -> None:
+    """
+    Drops cached service proxies, all of them or only the ones bound to the given xaddr.
+    """
+    global PROXY_CACHE, PROXY_CACHE_LOCK
+    with PROXY_CACHE_LOCK:
+        if xaddr == None:
+            PROXY_CACHE.clear()
+        else:
+            for key in [key for key in PROXY_CACHE if key[2] == xaddr]:
+                del PROXY_CACHE[key]
+
+def reset_after_fork() -> None:
+    """
+    Forked workers start with an empty proxy registry, pooled http connections of the parent must not be shared.
+    """
+    global PROXY_CACHE, PROXY_CACHE_LOCK, WSDL_DOCUMENTS_LOCK, TRANSPORTS, TRANSPORTS_LOCK
+    PROXY_CACHE = OrderedDict()
+    PROXY_CACHE_LOCK = threading.Lock()
+    WSDL_DOCUMENTS_LOCK = threading.Lock()
+    TRANSPORTS = {}
+    TRANSPORTS_LOCK = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child = reset_after_fork)
 
 class OnvifService:
     def __init__(self,ip = "192.168.1.168",username = "admin" , password = "9999",port = 80,wsdldirectory = "wsdl") -> None:
@@ -67,6 +300,8 @@ class OnvifService:
         self.username = username
         self.password = password
         self.port = port
+        # records of the device carry its host:port, see lib/log_config.py
+        self.logger = get_device_logger(logger,self)
         self.con_xaddr = "http://192.168.1.168:80/onvif/device_service"
         self.device_created_time = datetime.datetime.now()
         self.first_local_time = datetime.datetime.now()
@@ -76,7 +311,81 @@ class OnvifService:
         self.profiles = []
         self.services = []
         self.con_status = False
-        self.username_token = UsernameToken(username=self.username,password=self.password,zulu_timestamp=True, use_digest=True)
+        self.username_token = DeviceUsernameToken(username = self.username,password = self.password)
+        # opt-in capture of the sent and received envelopes, see enable_history
+        self.history = None
+        self.snapshot_fetcher = None
+        self.ptz_channel = None
+        # stream and snapshot uris shared by the media service objects of the device, see lib/media_uri_cache.py
+        self.media_uri_cache = MediaUriCache()
+        # namespace and xaddr lookups of the services, rebuilt when self.services is replaced
+        self.service_index = ServiceIndex()
+        # service objects created on first access of device, media, ptz, imaging, events and analytics
+        self.service_objects = {}
+        self.service_objects_lock = threading.Lock()
+        # seconds spent by each stage of the last connect_onvif call
+        self.connect_timings = {}
+
+    def get_service_object(self,name : str,service_class):
+        """
+        Returns the service object with the given name, it is created once on first access.
+        """
+        service_object = self.service_objects.get(name)
+        if service_object == None:
+            with self.service_objects_lock:
+                service_object = self.service_objects.get(name)
+                if service_object == None:
+                    service_object = service_class(onvif_service = self)
+                    self.service_objects[name] = service_object
+        return service_object
+
+    @property
+    def device(self):
+        """
+        DeviceService of the device, devicemgmt.wsdl is loaded on first access.
+        """
+        from lib.services.device_service import DeviceService
+        return self.get_service_object("device",DeviceService)
+
+    @property
+    def media(self):
+        """
+        MediaService of the device, media.wsdl is loaded on first access.
+        """
+        from lib.services.media_service import MediaService
+        return self.get_service_object("media",MediaService)
+
+    @property
+    def ptz(self):
+        """
+        PTZService of the device, ptz.wsdl is loaded on first access.
+        """
+        from lib.services.ptz_service import PTZService
+        return self.get_service_object("ptz",PTZService)
+
+    @property
+    def imaging(self):
+        """
+        ImageService of the device, imaging.wsdl is loaded on first access.
+        """
+        from lib.services.image_service import ImageService
+        return self.get_service_object("imaging",ImageService)
+
+    @property
+    def events(self):
+        """
+        EventService of the device, events.wsdl is loaded on first access.
+        """
+        from lib.services.event_service import EventService
+        return self.get_service_object("events",EventService)
+
+    @property
+    def analytics(self):
+        """
+        AnalyticsService of the device, analytics.wsdl is loaded on first access.
+        """
+        from lib.services.analytics_service import AnalyticsService
+        return self.get_service_object("analytics",AnalyticsService)
 
     def get_con_xaddr(self) -> str:
         return "http://"+ str(self.ip) +":"+ str(self.port) +"/onvif/device_service"
@@ -84,26 +393,42 @@ class OnvifService:
     def get_con_status(self) -> bool:
         return self.con_status
 
-    def get_username_token(self) -> UsernameToken(username="admin",password="9999"):
-        created_time = datetime.datetime.now() - self.first_local_time + self.device_created_time
-        self.username_token = UsernameToken(username = self.username,password= self.password, created = created_time,zulu_timestamp=True, use_digest=True)
+    def get_device_username_token(self) -> DeviceUsernameToken:
+        # username and password can be changed after construction, the new token keeps the device time
+        if self.username_token.username != self.username or self.username_token.password != self.password:
+            username_token = DeviceUsernameToken(username = self.username,password = self.password)
+            if self.username_token.is_synced: username_token.sync(self.username_token.get_device_time())
+            request_history = REQUEST_HISTORIES.pop(self.username_token, None)
+            if request_history != None: REQUEST_HISTORIES[username_token] = request_history
+            self.username_token = username_token
         return self.username_token
 
+    def get_username_token(self) -> DeviceUsernameToken:
+        """
+        Returns the UsernameToken of the device, the device time is only re-synced when the device rejected a request with
+        an authentication or time skew fault.
+        """
+        username_token = self.get_device_username_token()
+        if username_token.needs_sync and self.get_con_status():
+            self.logger.warning("Username token rejected, re-sync device time of %s ..", self.ip)
+            username_token.needs_sync = False
+            self.get_device_time(xaddr=self.get_con_xaddr())
+        return username_token
+
     def get_device_time(self,xaddr = "http://192.168.1.168:80/onvif/device_service") -> dict: 
         response = {}
         global DEVICE_SERVICE_NS
         try:            
-            zeep_client_device = get_caching_client(isAuth = True,wsdl_URL= self.wsdl_directory + "/devicemgmt.wsdl",username_token=self.get_username_token())
-            if zeep_client_device != None:
-                ws_client_device = zeep_client_device.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", xaddr)
+            ws_client_device = get_service_proxy(wsdl_URL = self.wsdl_directory + "/devicemgmt.wsdl",binding = "{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr = xaddr,username_token = self.get_device_username_token())
+            if ws_client_device != None:
                 response = ws_client_device.GetSystemDateAndTime()
             else:
                 self.con_status = False
         except Exception as emsg:
-            logger.error(f"Get device time exception : \n{emsg}")
+            self.logger.error("Get device time exception : \n%s", emsg)
             self.con_status = False
-        
-        if zeep_client_device != None and response:
+
+        if response:
             self.con_status = True
             try:
                 self.device_created_time = datetime.datetime(year=response["UTCDateTime"]["Date"]["Year"],\
@@ -112,8 +437,10 @@ class OnvifService:
                                                                     hour=response["UTCDateTime"]["Time"]["Hour"],\
                                                                         minute=response["UTCDateTime"]["Time"]["Minute"],\
                                                                             second=response["UTCDateTime"]["Time"]["Second"])
+                self.first_local_time = datetime.datetime.now()
+                self.username_token.sync(self.device_created_time)
             except Exception as emsg:
-                logger.error(f"Create device time exception : \n{emsg}")
+                self.logger.error("Create device time exception : \n%s", emsg)
 
         return response
                  
@@ -121,41 +448,119 @@ class OnvifService:
         global DEVICE_SERVICE_NS
         capabilities = {}
         try:
-            zeep_client_device = get_caching_client(isAuth = True,wsdl_URL= self.wsdl_directory + "/devicemgmt.wsdl",username_token=self.get_username_token())
-            ws_client_device = zeep_client_device.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", xaddr)
-            capabilities = ws_client_device.GetCapabilities(Category = category) 
+            capabilities = self.call_metadata_operation("GetCapabilities",wsdl_URL = self.wsdl_directory + "/devicemgmt.wsdl",binding = "{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr = xaddr,Category = category)
         except Exception as emsg:
-            logger.error(f'Get capabilities error : \n{emsg}\n')
+            self.logger.error("Get capabilities error : \n%s\n", emsg)
         return capabilities
 
     def get_services(self,xaddr = "http://192.168.1.168:80/onvif/device_service" , include_capability = False) -> list:
         global DEVICE_SERVICE_NS
         services = []
         try:
-            zeep_client_device = get_caching_client(isAuth = True,wsdl_URL= self.wsdl_directory + "/devicemgmt.wsdl",username_token=self.get_username_token())
-            ws_client_device = zeep_client_device.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", xaddr)
-            services = ws_client_device.GetServices(IncludeCapability = str(include_capability).lower()) 
+            services = self.call_metadata_operation("GetServices",wsdl_URL = self.wsdl_directory + "/devicemgmt.wsdl",binding = "{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr = xaddr,IncludeCapability = str(include_capability).lower())
         except Exception as emsg:
-            logger.error(f'Get services error : \n{emsg}\n')
+            self.logger.error("Get services error : \n%s\n", emsg)
         return services
 
     def get_profiles(self,xaddr = "http://192.168.1.168:80/onvif/media_service") -> list:
         global MEDIA_SERVICE_NS
         profiles = []
         try:
-            zeep_client_media = get_caching_client(isAuth= True,wsdl_URL=self.wsdl_directory+"/media.wsdl",username_token=self.get_username_token())
-            ws_client_media = zeep_client_media.create_service("{" + MEDIA_SERVICE_NS + "}MediaBinding", xaddr)                               
-            profiles = ws_client_media.GetProfiles()
+            profiles = self.call_metadata_operation("GetProfiles",wsdl_URL = self.wsdl_directory + "/media.wsdl",binding = "{" + MEDIA_SERVICE_NS + "}MediaBinding",xaddr = xaddr)
         except Exception as emsg:
-            logger.error(f'Get profiles error : \n{emsg}\n')
+            self.logger.error("Get profiles error : \n%s\n", emsg)
+        else:
+            self.media_uri_cache.update_profiles(profiles)
         return profiles
 
+    def call_metadata_operation(self,operation : str,wsdl_URL : str,binding : str,xaddr : str,**params):
+        """
+        Calls an operation whose response only changes with the configuration or the firmware of the device, e.g. GetCapabilities.
+        The response is read from the process-wide DeviceMetadataCache when one is set and it has a valid response of the device,
+        a requested response is stored into it (see lib/device_metadata_cache.py).
+        Raises the exceptions of the operation like a service proxy call.
+        - requirements:
+            - operation [str] : operation name
+            - wsdl_URL, binding, xaddr [str] : like get_service_proxy
+            - params : parameters of the operation
+        """
+        service_proxy = get_service_proxy(wsdl_URL = wsdl_URL,binding = binding,xaddr = xaddr,username_token = self.get_username_token())
+        metadata_cache = device_metadata_cache.METADATA_CACHE
+        identity = get_device_identity(self.device_info)
+        if metadata_cache == None or identity == None:
+            return service_proxy[operation](**params)
+        firmware = str(getattr(self.device_info, "FirmwareVersion", ""))
+        address = f"{self.ip}:{self.port}"
+        cache_key = get_operation_key(binding,operation,params)
+        caching_client = service_proxy._client
+        operation_binding = service_proxy._binding
+        content = metadata_cache.get(identity,address,firmware,cache_key,ttl = metadata_cache.get_operation_ttl(operation))
+        if content != None:
+            try:
+                return operation_binding.get(operation).process_reply(parse_xml(content, caching_client.transport, settings = caching_client.settings))
+            except Exception as emsg:
+                self.logger.warning("Cached %s response can not be read, it is requested again -> %s", operation, emsg)
+                metadata_cache.remove(identity,address,cache_key)
+        # the envelope is kept to store it, zeep settings are thread local so other threads get parsed responses meanwhile
+        with caching_client.settings(raw_response = True):
+            response = service_proxy[operation](**params)
+        result = operation_binding.process_reply(caching_client, operation_binding.get(operation), response)
+        metadata_cache.put(identity,address,firmware,cache_key,response.content)
+        return result
+
+    def invalidate_cached_profiles(self) -> None:
+        """
+        Drops the cached GetProfiles response of the device, the next get_profiles requests it from the device.
+        """
+        metadata_cache = device_metadata_cache.METADATA_CACHE
+        identity = get_device_identity(self.device_info)
+        if metadata_cache != None and identity != None:
+            metadata_cache.remove(identity,f"{self.ip}:{self.port}",get_operation_key("{" + MEDIA_SERVICE_NS + "}MediaBinding","GetProfiles"))
+
+    def handle_notification(self,message) -> bool:
+        """
+        Invalidates the cached stream uris and profiles of the device on its profile change, configuration change and reboot events.
+        - requirements:
+            - message [NotificationMessage] : message of a PullMessages response
+        - return:
+            - status [boolean] : True when the caches were invalidated
+        """
+        if not self.media_uri_cache.handle_notification(message): return False
+        self.invalidate_cached_profiles()
+        return True
+
+    def notify_reboot(self) -> None:
+        """
+        Drops the cached data which is invalid after a reboot of the device.
+        """
+        self.media_uri_cache.notify_reboot()
+        self.invalidate_cached_profiles()
+
+    def validate_metadata_cache(self) -> None:
+        """
+        Drops the cached metadata of the device when its firmware version changed since it was cached.
+        """
+        metadata_cache = device_metadata_cache.METADATA_CACHE
+        identity = get_device_identity(self.device_info)
+        if metadata_cache != None and identity != None:
+            metadata_cache.validate_device(identity, str(getattr(self.device_info, "FirmwareVersion", "")))
+
+    def get_service_index(self) -> ServiceIndex:
+        """
+        Returns the ServiceIndex of the GetServices response of the device (see lib/service_index.py).
+        """
+        service_index = self.service_index
+        if service_index.services is not self.services:
+            service_index = ServiceIndex(self.services)
+            self.service_index = service_index
+        return service_index
+
     def get_first_profile(self) -> dict:
         first_profile = None
         try:
             first_profile = self.profiles[0]    
         except Exception as emsg:
-            logger.error(f"can not get_first_profile : \n{emsg}")
+            self.logger.error("can not get_first_profile : \n%s", emsg)
         return first_profile
             
     def get_device_information(self,xaddr = "http://192.168.1.168:80/onvif/device_service"):
@@ -163,50 +568,170 @@ class OnvifService:
         global DEVICE_SERVICE_NS
         device_info = {}
         try:
-            zeep_client_device = get_caching_client(isAuth = True,wsdl_URL= self.wsdl_directory + "/devicemgmt.wsdl",username_token=self.get_username_token())
-            ws_client_device = zeep_client_device.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", xaddr)
+            ws_client_device = get_service_proxy(wsdl_URL = self.wsdl_directory + "/devicemgmt.wsdl",binding = "{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr = xaddr,username_token = self.get_username_token())
             device_info = ws_client_device.GetDeviceInformation() 
         except Exception as emsg:
-            logger.error(f'Get device info error : \n{emsg}\n')
+            self.logger.error("Get device info error : \n%s\n", emsg)
         return device_info
 
-    def connect_onvif(self):
+    def run_connect_stage(self,stage : str,function,**kwargs):
+        """
+        Calls the connect stage function and records its duration in connect_timings.
+        """
+        stage_start = time.perf_counter()
+        try:
+            return function(**kwargs)
+        finally:
+            self.connect_timings[stage] = time.perf_counter() - stage_start
+
+    def get_capabilities_and_profiles(self) -> tuple:
+        capabilities = self.run_connect_stage("GetCapabilities",self.get_capabilities,xaddr=self.get_con_xaddr())
+        profiles = []
+        if capabilities:
+            profiles = self.run_connect_stage("GetProfiles",self.get_profiles,xaddr=capabilities["Media"]["XAddr"])
+        return capabilities, profiles
+
+    def connect_onvif(self,concurrent = False):
+        """
+        Connects to the device, the clock is synchronized first since every later request is signed with the device time.
+        - requirements:
+            - concurrent [bool] : False runs the requests one after another and stops on the first failure,
+                                  True runs GetDeviceInformation, GetServices and GetCapabilities -> GetProfiles concurrently after the clock sync
+        """
         global DEVICE_SERVICE_NS  
-        logger.info(f"Try to connect onvif device : {str(self.ip)}")
-        self.get_device_time(xaddr=self.get_con_xaddr())
+        self.logger.info("Try to connect onvif device : %s", str(self.ip))
+        # service objects hold the xaddrs and capabilities of the previous connection
+        self.service_objects = {}
+        self.connect_timings = {}
+        connect_start = time.perf_counter()
+        self.run_connect_stage("GetSystemDateAndTime",self.get_device_time,xaddr=self.get_con_xaddr())
         if self.get_con_status():
-            logger.info(f"Device connection successful : {str(self.ip)}")
-            logger.info(f"Onvif device connection complete with succes.. {str(self.ip)}")
-            logger.info(f"Try to get device informations..")
-            self.device_info = self.get_device_information(xaddr=self.get_con_xaddr())
-            if self.device_info:
-                logger.info(f"Getting device informations complete with success..")
-                logger.info(f"Try to get device capabilities..")
-                self.capabilities = self.get_capabilities(xaddr=self.get_con_xaddr())
-                if self.capabilities:
-                    logger.info(f"Getting device capabilities complete with success..")
-                    logger.info(f"Try to get device profiles..")
-                    self.profiles = self.get_profiles(xaddr= self.capabilities["Media"]["XAddr"])
-                    if self.profiles:
-                        logger.info(f"Getting device profiles complete with success..")
-                        logger.info(f"Try to get device services..")
-                        self.services = self.get_services(xaddr=self.get_con_xaddr(),include_capability=False)
-                        if self.services:
-                            logger.info(f"Getting device services complete with success..")
-                        else:
-                            logger.error(f'Can not Getting device services for {self.ip}\n')
+            self.logger.info("Device connection successful : %s", str(self.ip))
+            self.logger.info("Onvif device connection complete with succes.. %s", str(self.ip))
+            if concurrent:
+                self.connect_onvif_concurrent()
+            else:
+                self.connect_onvif_sequential()
+            self.get_service_index()
+        else:
+            self.logger.error("No onvif connection to : %s\n", self.ip)
+        self.connect_timings["Total"] = time.perf_counter() - connect_start
+
+    def connect_onvif_sequential(self):
+        self.logger.info("Try to get device informations..")
+        self.device_info = self.run_connect_stage("GetDeviceInformation",self.get_device_information,xaddr=self.get_con_xaddr())
+        if self.device_info:
+            self.logger.info("Getting device informations complete with success..")
+            self.validate_metadata_cache()
+            self.logger.info("Try to get device capabilities..")
+            self.capabilities = self.run_connect_stage("GetCapabilities",self.get_capabilities,xaddr=self.get_con_xaddr())
+            if self.capabilities:
+                self.logger.info("Getting device capabilities complete with success..")
+                self.logger.info("Try to get device profiles..")
+                self.profiles = self.run_connect_stage("GetProfiles",self.get_profiles,xaddr= self.capabilities["Media"]["XAddr"])
+                if self.profiles:
+                    self.logger.info("Getting device profiles complete with success..")
+                    self.logger.info("Try to get device services..")
+                    self.services = self.run_connect_stage("GetServices",self.get_services,xaddr=self.get_con_xaddr(),include_capability=False)
+                    if self.services:
+                        self.logger.info("Getting device services complete with success..")
                     else:
-                        logger.error(f'Can not Getting device profiles for {self.ip}\n')
+                        self.logger.error("Can not Getting device services for %s\n", self.ip)
                 else:
-                    logger.error(f'Can not Getting device capabilities for {self.ip}\n')
+                    self.logger.error("Can not Getting device profiles for %s\n", self.ip)
             else:
-                logger.error(f'Can not Getting device information for {self.ip}\n')
+                self.logger.error("Can not Getting device capabilities for %s\n", self.ip)
         else:
-            logger.error(f'No onvif connection to : {self.ip}\n')
+            self.logger.error("Can not Getting device information for %s\n", self.ip)
+
+    def connect_onvif_concurrent(self):
+        self.logger.info("Try to get device informations, capabilities, profiles and services concurrently..")
+        # the cached responses are keyed by the device information, it is requested first when a metadata cache is set
+        use_metadata_cache = device_metadata_cache.METADATA_CACHE != None
+        if use_metadata_cache:
+            self.device_info = self.run_connect_stage("GetDeviceInformation",self.get_device_information,xaddr=self.get_con_xaddr())
+            self.validate_metadata_cache()
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            if not use_metadata_cache:
+                device_info_future = executor.submit(self.run_connect_stage,"GetDeviceInformation",self.get_device_information,xaddr=self.get_con_xaddr())
+            services_future = executor.submit(self.run_connect_stage,"GetServices",self.get_services,xaddr=self.get_con_xaddr(),include_capability=False)
+            # profiles are requested from the media xaddr of the capabilities
+            capabilities_future = executor.submit(self.get_capabilities_and_profiles)
+            if not use_metadata_cache: self.device_info = device_info_future.result()
+            self.services = services_future.result()
+            self.capabilities, self.profiles = capabilities_future.result()
+        if not self.device_info: self.logger.error("Can not Getting device information for %s\n", self.ip)
+        if not self.capabilities: self.logger.error("Can not Getting device capabilities for %s\n", self.ip)
+        elif not self.profiles: self.logger.error("Can not Getting device profiles for %s\n", self.ip)
+        if not self.services: self.logger.error("Can not Getting device services for %s\n", self.ip)
+        if self.device_info and self.capabilities and self.profiles and self.services:
+            self.logger.info("Getting device informations, capabilities, profiles and services complete with success..")
+
+    def enable_history(self,max_entries = 100,sample_rate = 1.0) -> RequestHistory:
+        """
+        Starts capturing the envelopes of the requests sent to the device host into a bounded ring buffer.
+        - requirements:
+            - max_entries [int] : maximum kept exchanges
+            - sample_rate [float] : 0.0 - 1.0, part of the exchanges which are captured
+        - return:
+            - RequestHistory
+        """
+        global REQUEST_HISTORIES
+        self.history = RequestHistory(max_entries = max_entries,sample_rate = sample_rate)
+        # every request of the device is signed with its token, whichever host or port the service is on
+        REQUEST_HISTORIES[self.get_device_username_token()] = self.history
+        return self.history
+
+    def disable_history(self) -> None:
+        global REQUEST_HISTORIES
+        REQUEST_HISTORIES.pop(self.username_token, None)
+        self.history = None
+
+    def get_snapshot_fetcher(self,timeout = None) -> SnapshotFetcher:
+        """
+        Returns the SnapshotFetcher of the device, its http session is created once and kept for the snapshot uris of the device.
+        - requirements:
+            - timeout [float or tuple] : optional, sets the request timeout of the fetcher
+        """
+        with self.service_objects_lock:
+            snapshot_fetcher = self.snapshot_fetcher
+            if snapshot_fetcher == None or snapshot_fetcher.username != self.username or snapshot_fetcher.password != self.password:
+                if snapshot_fetcher != None: snapshot_fetcher.close()
+                snapshot_fetcher = SnapshotFetcher(username = self.username,password = self.password)
+                self.snapshot_fetcher = snapshot_fetcher
+            if timeout != None: snapshot_fetcher.timeout = timeout
+        return snapshot_fetcher
+
+    def close_snapshot_fetcher(self) -> None:
+        with self.service_objects_lock:
+            if self.snapshot_fetcher != None: self.snapshot_fetcher.close()
+            self.snapshot_fetcher = None
+
+    def get_ptz_channel(self,profile_token = None):
+        """
+        Returns the PTZControlChannel of the device, it is created once and sends the queued moves and stops in order.
+        - requirements:
+            - profile_token [str] : optional, profile of the moves, defaults to the profile token of the ptz service
+        """
+        from lib.ptz_control_channel import PTZControlChannel
+        with self.service_objects_lock:
+            if self.ptz_channel == None:
+                self.ptz_channel = PTZControlChannel(self,profile_token = profile_token)
+            elif profile_token != None:
+                self.ptz_channel.profile_token = profile_token
+            return self.ptz_channel
+
+    def close_ptz_channel(self,stop = True) -> None:
+        with self.service_objects_lock:
+            ptz_channel = self.ptz_channel
+            self.ptz_channel = None
+        if ptz_channel != None: ptz_channel.close(stop = stop)
 
-    def get_history(self):
-        global HISTORY
-        return HISTORY
+    def get_history(self) -> RequestHistory:
+        """
+        Returns the RequestHistory of the device, None when the history is not enabled.
+        """
+        return self.history
             
             
 
@@ -1,18 +1,23 @@
 import datetime
 from enum import Enum
 import json
+import sys
 
 class PullMessageEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, datetime.datetime):
             return obj.isoformat()
-        elif isinstance(obj, EventRequestParams.NotificationMessage):
-            return obj.__dict__
-        elif isinstance(obj, EventRequestParams.SimpleItem):
-            return obj.__dict__
+        elif isinstance(obj, (EventRequestParams.NotificationMessage, EventRequestParams.SimpleItem)):
+            return obj.to_dict()
         else:
             return super().default(obj)
 
+def dumps_notification_messages(notification_messages : list) -> str:
+    """
+    Serializes NotificationMessages to compact json (no indentation and whitespace) to ship events downstream.
+    """
+    return json.dumps([message.to_dict() for message in notification_messages],separators = (",", ":"),default = PullMessageEncoder().default)
+
 class EventEnumParams:
     pass
 
@@ -21,28 +26,64 @@ class EventRequestParams:
         pass
 
     class SimpleItem:
+        # slotted, a PullMessages response creates several items per message
+        __slots__ = ("Name", "Value")
+
         def __init__(self,name = None,value = None) -> None:
-            self.Name = name
+            self.Name = sys.intern(name) if type(name) == str else name
             self.Value = value
 
+        def to_dict(self) -> dict:
+            return {"Name": self.Name, "Value": self.Value}
+
         def __str__(self) -> str:
-            return str(self.__dict__)
+            return str(self.to_dict())
 
         def __repr__(self) -> str:
-            return str(self.__dict__)
+            return str(self.to_dict())
 
     class NotificationMessage:
-        def __init__(self,source : 'EventRequestParams.SimpleItem',data : 'EventRequestParams.SimpleItem',topic = "",message = {}) -> None:
-            self.Topic = topic
-            self.Message = message
+        # slotted, the topic and the message attribute names are interned since they repeat on every message of a topic
+        __slots__ = ("Topic", "Message", "Source", "Data", "SourceItems", "KeyItems", "DataItems", "ElementItems")
+
+        def __init__(self,source : 'EventRequestParams.SimpleItem',data : 'EventRequestParams.SimpleItem',topic = "",message = {},\
+                    source_items = None,key_items = None,data_items = None,element_items = None) -> None:
+            """
+            - requirements;
+                - source, data [SimpleItem] : first SimpleItem of the Source and Data of the message
+                - source_items, key_items, data_items [list] : every SimpleItem of the Source, Key and Data of the message
+                - element_items [list] : every ElementItem of the message as SimpleItem, the value is the xml of its content
+            """
+            self.Topic = sys.intern(topic) if type(topic) == str else topic
+            self.Message = {sys.intern(name): value for name, value in message.items()} if hasattr(message, "items") else message
             self.Source = source
             self.Data = data
+            self.SourceItems = source_items if source_items != None else []
+            self.KeyItems = key_items if key_items != None else []
+            self.DataItems = data_items if data_items != None else []
+            self.ElementItems = element_items if element_items != None else []
+
+        def to_dict(self) -> dict:
+            simple_item = EventRequestParams.SimpleItem
+            return {"Topic": self.Topic, "Message": self.Message,
+                    "Source": self.Source.to_dict() if isinstance(self.Source, simple_item) else self.Source,
+                    "Data": self.Data.to_dict() if isinstance(self.Data, simple_item) else self.Data,
+                    "SourceItems": [item.to_dict() for item in self.SourceItems],
+                    "KeyItems": [item.to_dict() for item in self.KeyItems],
+                    "DataItems": [item.to_dict() for item in self.DataItems],
+                    "ElementItems": [item.to_dict() for item in self.ElementItems]}
+
+        def to_json(self) -> str:
+            """
+            Compact json of the message, see dumps_notification_messages.
+            """
+            return json.dumps(self.to_dict(),separators = (",", ":"),default = PullMessageEncoder().default)
 
         def __repr__(self) -> str:
-            return json.dumps(self.__dict__,cls=PullMessageEncoder,indent=4) # json.dumps(self.__dict__, indent=4)
+            return json.dumps(self.to_dict(),cls=PullMessageEncoder,indent=4)
         
         def __str__(self) -> str:
-            return json.dumps(self.__dict__,cls=PullMessageEncoder,indent=4)
+            return json.dumps(self.to_dict(),cls=PullMessageEncoder,indent=4)
 
     class EventBrokerConfig:
         def __init__(self,address : str,topic_perifix : str,username = None,password = None,certificate_id = None,\
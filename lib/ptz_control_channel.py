@@ -0,0 +1,203 @@
+"""
+Created to drive the continuous movements of a PTZ device from a joystick without blocking on every SOAP round trip.
+
+    ptz_channel = onvif_device.get_ptz_channel()
+    while joystick.is_active():
+        ptz_channel.move(PTZRequestParams.PTZSpeed(pantilt = PTZRequestParams.Vector2D(None, joystick.x, joystick.y)))
+    ptz_channel.stop()
+    print(ptz_channel.get_stats())
+    onvif_device.close_ptz_channel()
+
+move and stop only queue the command, one worker thread of the channel sends them in order over the pooled connection of the device.
+Moves queued while a request is in flight are coalesced to the latest velocity, so a slow device gets the newest vector next
+instead of a backlog. A stop drops the moves queued before it and is sent before the moves queued after it.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import threading
+import time
+from collections import deque
+
+from lib.onvif import get_service_proxy
+from lib.log_config import get_logger, get_device_logger
+
+logger = get_logger('ptz_control_channel')
+
+MOVE = "ContinuousMove"
+STOP = "Stop"
+
+# seconds after which an unchanged velocity is sent again, devices stop a continuous move after their default ptz timeout
+PTZ_REPEAT_INTERVAL = 1.0
+
+class PTZCommand:
+    __slots__ = ("operation", "profile_token", "velocity", "timeout", "pantilt", "zoom", "queued_at")
+
+    def __init__(self,operation : str,profile_token : str,velocity = None,timeout = None,pantilt = True,zoom = True) -> None:
+        self.operation = operation
+        self.profile_token = profile_token
+        self.velocity = velocity
+        self.timeout = timeout
+        self.pantilt = pantilt
+        self.zoom = zoom
+        self.queued_at = time.perf_counter()
+
+    def get_params(self) -> dict:
+        if self.operation == MOVE:
+            params = {"ProfileToken": self.profile_token, "Velocity": self.velocity}
+            if self.timeout != None: params["Timeout"] = self.timeout
+            return params
+        return {"ProfileToken": self.profile_token, "PanTilt": self.pantilt, "Zoom": self.zoom}
+
+class PTZControlChannel:
+    def __init__(self,onvif_service,profile_token = None,repeat_interval = PTZ_REPEAT_INTERVAL) -> None:
+        """
+        Ordered, coalescing command queue of the PTZ service of one device.
+        - requirements:
+            - onvif_service [OnvifService] : connected device, its ptz service object is used for the xaddr and the namespace
+            - profile_token [str] : optional, defaults to the profile token of the ptz service
+            - repeat_interval [float] : seconds, a move with the velocity and profile of the last sent move is skipped within this interval
+        """
+        self.onvif_service = onvif_service
+        self.logger = get_device_logger(logger,onvif_service)
+        self.profile_token = profile_token
+        self.repeat_interval = repeat_interval
+        self.commands = deque()
+        self.condition = threading.Condition()
+        self.worker_thread = None
+        self.is_running = False
+        self.is_sending = False
+        # velocity and profile token of the last sent move, None after a stop or an error since the device state is not known
+        self.last_velocity = None
+        self.last_profile_token = None
+        self.last_velocity_time = 0.0
+        self.queued_count = 0
+        self.sent_count = 0
+        self.coalesced_count = 0
+        self.skipped_count = 0
+        self.error_count = 0
+        # seconds from queuing to the response of the sent commands
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.last_error = ""
+
+    def get_profile_token(self,profile_token = None) -> str:
+        if profile_token != None: return profile_token
+        if self.profile_token != None: return self.profile_token
+        return self.onvif_service.ptz.profile_token
+
+    def start_worker(self) -> None:
+        # called with the condition held
+        if self.worker_thread == None or not self.worker_thread.is_alive():
+            self.is_running = True
+            self.worker_thread = threading.Thread(target = self.run,name = f"ptz_control_channel_{self.onvif_service.ip}:{self.onvif_service.port}",daemon = True)
+            self.worker_thread.start()
+
+    def move(self,velocity,timeout = None,profile_token = None) -> None:
+        """
+        Queues a ContinuousMove, it replaces a move which is still queued.
+        - requirements:
+            - velocity [PTZSpeed or dict] : pan, tilt and zoom velocity
+            - timeout [duration] : optional, e.g. "PT1S"
+            - profile_token [str] : optional, defaults to the profile token of the channel
+        """
+        command = PTZCommand(MOVE, self.get_profile_token(profile_token), velocity = velocity if type(velocity) == dict else velocity.to_dict(), timeout = timeout)
+        with self.condition:
+            self.queued_count += 1
+            if self.commands and self.commands[-1].operation == MOVE and self.commands[-1].profile_token == command.profile_token:
+                self.commands[-1] = command
+                self.coalesced_count += 1
+            else:
+                self.commands.append(command)
+            self.start_worker()
+            self.condition.notify_all()
+
+    def stop(self,pantilt = True,zoom = True,profile_token = None) -> None:
+        """
+        Queues a Stop, the moves of the profile queued before it are dropped.
+        """
+        command = PTZCommand(STOP, self.get_profile_token(profile_token), pantilt = pantilt, zoom = zoom)
+        with self.condition:
+            self.queued_count += 1
+            queued_count = len(self.commands)
+            self.commands = deque(queued for queued in self.commands if queued.operation != MOVE or queued.profile_token != command.profile_token)
+            self.coalesced_count += queued_count - len(self.commands)
+            if self.commands and self.commands[-1].operation == STOP and self.commands[-1].profile_token == command.profile_token:
+                command.pantilt = command.pantilt or self.commands[-1].pantilt
+                command.zoom = command.zoom or self.commands[-1].zoom
+                self.commands[-1] = command
+                self.coalesced_count += 1
+            else:
+                self.commands.append(command)
+            self.start_worker()
+            self.condition.notify_all()
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                while not self.commands and self.is_running:
+                    self.condition.wait()
+                if not self.commands: break
+                command = self.commands.popleft()
+                self.is_sending = True
+            try:
+                self.send(command)
+            finally:
+                with self.condition:
+                    self.is_sending = False
+                    self.condition.notify_all()
+
+    def send(self,command : PTZCommand) -> None:
+        if command.operation == MOVE and command.timeout == None and command.velocity == self.last_velocity and \
+                command.profile_token == self.last_profile_token and time.perf_counter() - self.last_velocity_time < self.repeat_interval:
+            with self.condition: self.skipped_count += 1
+            return
+        try:
+            ptz_service = self.onvif_service.ptz
+            ws_client_ptz = get_service_proxy(wsdl_URL=ptz_service.wsdlUrl,binding="{" + str(ptz_service.ptz_name_space) + "}PTZBinding",xaddr=ptz_service.xAddr,username_token=self.onvif_service.get_username_token())
+            ws_client_ptz[command.operation](**command.get_params())
+        except Exception as emsg:
+            self.last_velocity = None
+            self.last_profile_token = None
+            with self.condition:
+                self.error_count += 1
+                self.last_error = str(emsg) or type(emsg).__name__
+            self.logger.warning("%s unsuccess.. -> %s", command.operation, emsg)
+            return
+        completed_at = time.perf_counter()
+        self.last_velocity = command.velocity if command.operation == MOVE else None
+        self.last_profile_token = command.profile_token if command.operation == MOVE else None
+        self.last_velocity_time = completed_at
+        with self.condition:
+            self.sent_count += 1
+            latency = completed_at - command.queued_at
+            self.latency_sum += latency
+            if latency > self.latency_max: self.latency_max = latency
+
+    def flush(self,timeout = None) -> bool:
+        """
+        Waits until the queued commands are sent.
+        - return:
+            - status [boolean] : False when the timeout is over first
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.commands and not self.is_sending, timeout = timeout)
+
+    def close(self,stop = True,timeout = 5.0) -> None:
+        """
+        Stops the worker thread after the queued commands, with stop a final Stop is sent first.
+        """
+        with self.condition:
+            worker_thread = self.worker_thread
+        if worker_thread == None: return
+        if stop: self.stop()
+        with self.condition:
+            self.is_running = False
+            self.condition.notify_all()
+        worker_thread.join(timeout)
+
+    def get_stats(self) -> dict:
+        with self.condition:
+            return {"queued": self.queued_count, "sent": self.sent_count, "coalesced": self.coalesced_count, "skipped": self.skipped_count,
+                    "errors": self.error_count, "pending": len(self.commands), "last_error": self.last_error,
+                    "mean_latency_ms": self.latency_sum / self.sent_count * 1000 if self.sent_count else 0.0, "max_latency_ms": self.latency_max * 1000}
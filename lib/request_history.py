@@ -0,0 +1,98 @@
+"""
+Created to capture the SOAP envelopes of one device on demand.
+
+    onvif_device.enable_history(max_entries = 50,sample_rate = 0.1)
+    onvif_device.ptz.GetStatus(profile_token = "Profile_1")
+    history = onvif_device.get_history()
+    print(history.last_sent, history.last_received)
+    for entry in history.get_entries(): print(entry["operation"], entry["time"])
+    onvif_device.disable_history()
+
+A device without a history adds no zeep plugin to its clients, so nothing is captured or locked per request.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import contextvars
+import threading
+import time
+from collections import deque
+from lxml import etree
+from zeep.plugins import Plugin
+
+# entry of the exchange running in the current thread or task, ingress completes the entry egress started
+CURRENT_ENTRY = contextvars.ContextVar("onvif_history_entry", default = None)
+
+class RequestHistory(Plugin):
+    def __init__(self,max_entries = 100,sample_rate = 1.0) -> None:
+        """
+        Bounded ring buffer of the sent and received envelopes of a device, a zeep plugin.
+        - requirements:
+            - max_entries [int] : maximum kept exchanges, the oldest one is dropped first
+            - sample_rate [float] : 0.0 - 1.0, part of the exchanges which are captured, e.g. 0.1 keeps every tenth exchange
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate should be between 0.0 and 1.0")
+        self.entries = deque(maxlen = max_entries)
+        self.sample_rate = sample_rate
+        # sampling is deterministic, an exchange is captured whenever the credit reaches 1
+        self.sample_credit = 1.0 - sample_rate
+        self.lock = threading.Lock()
+        self.exchange_count = 0
+
+    def is_sampled(self) -> bool:
+        with self.lock:
+            self.exchange_count += 1
+            self.sample_credit += self.sample_rate
+            if self.sample_credit >= 1.0:
+                self.sample_credit -= 1.0
+                return True
+        return False
+
+    def egress(self,envelope,http_headers,operation,binding_options):
+        if self.is_sampled():
+            entry = {"time": time.time(), "operation": getattr(operation, "name", None), "sent": {"envelope": envelope, "http_headers": http_headers}, "received": None}
+            self.entries.append(entry)
+            CURRENT_ENTRY.set(entry)
+        else:
+            CURRENT_ENTRY.set(None)
+        return envelope, http_headers
+
+    def ingress(self,envelope,http_headers,operation):
+        entry = CURRENT_ENTRY.get()
+        if entry != None:
+            entry["received"] = {"envelope": envelope, "http_headers": http_headers}
+            CURRENT_ENTRY.set(None)
+        return envelope, http_headers
+
+    @property
+    def last_sent(self) -> dict:
+        """
+        Returns {"envelope", "http_headers"} of the last captured request like zeep HistoryPlugin, None when nothing is captured.
+        """
+        entries = list(self.entries)
+        return entries[-1]["sent"] if entries else None
+
+    @property
+    def last_received(self) -> dict:
+        entries = list(self.entries)
+        return entries[-1]["received"] if entries else None
+
+    def get_entries(self,operation = None) -> list:
+        """
+        Returns the captured exchanges from the oldest to the newest, all of them or the ones of the given operation.
+        """
+        return [entry for entry in list(self.entries) if operation == None or entry["operation"] == operation]
+
+    def to_xml_strings(self,operation = None) -> list:
+        """
+        Returns the captured exchanges with their envelopes serialized, e.g. to write them to a log file.
+        """
+        def serialize(message):
+            if message == None: return None
+            return etree.tostring(message["envelope"], pretty_print = True).decode("utf-8")
+        return [{"time": entry["time"], "operation": entry["operation"], "sent": serialize(entry["sent"]), "received": serialize(entry["received"])}
+                for entry in self.get_entries(operation)]
+
+    def clear(self) -> None:
+        self.entries.clear()
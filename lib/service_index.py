@@ -0,0 +1,95 @@
+"""
+Created to look up the namespaces, xaddrs and versions of the GetServices response of a device without scanning it.
+
+    service_index = onvif_device.get_service_index()
+    service_index.get_namespace(onvif_device.capabilities.PTZ.XAddr,"ptz")     # http://www.onvif.org/ver20/ptz/wsdl
+    service_index.get_xaddr("http://www.onvif.org/ver10/media/wsdl")
+    service_index.get_version("http://www.onvif.org/ver20/ptz/wsdl")            # (2, 60)
+
+Services are grouped by the name after the version of their namespace, e.g. http://www.onvif.org/ver20/media/wsdl -> media,
+so a device advertising ver10 and ver20 namespaces of a service is resolved to the namespace of the local wsdl.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import re
+
+VERSION_PATTERN = re.compile(r"ver\d+")
+
+# target namespaces of the wsdl files the service classes use, preferred over the other versions of the same service
+WSDL_NAMESPACES = {
+    "device": "http://www.onvif.org/ver10/device/wsdl",
+    "media": "http://www.onvif.org/ver10/media/wsdl",
+    "ptz": "http://www.onvif.org/ver20/ptz/wsdl",
+    "imaging": "http://www.onvif.org/ver20/imaging/wsdl",
+    "events": "http://www.onvif.org/ver10/events/wsdl",
+    "analytics": "http://www.onvif.org/ver20/analytics/wsdl",
+}
+
+def get_service_name(namespace : str) -> str:
+    """
+    Returns the service name of an onvif namespace, e.g. http://www.onvif.org/ver10/events/wsdl -> events, else the namespace.
+    """
+    parts = str(namespace).rstrip("/").split("/")
+    for index, part in enumerate(parts[:-1]):
+        if VERSION_PATTERN.fullmatch(part): return parts[index + 1]
+    return str(namespace)
+
+class ServiceIndex:
+    def __init__(self,services = None) -> None:
+        """
+        Dict index of a GetServices response.
+        - requirements:
+            - services [list] : GetServices response, the index keeps a reference to detect a new response
+        """
+        self.services = services
+        # namespace -> (xaddr, (major, minor))
+        self.namespaces = {}
+        # (xaddr, service name) -> namespaces in the advertised order
+        self.xaddr_services = {}
+        # service name -> namespaces in the advertised order
+        self.service_namespaces = {}
+        for service in services or []:
+            namespace = str(getattr(service, "Namespace", "") or "")
+            if not namespace: continue
+            xaddr = getattr(service, "XAddr", None)
+            version = getattr(service, "Version", None)
+            self.namespaces.setdefault(namespace, (xaddr, (getattr(version, "Major", None), getattr(version, "Minor", None))))
+            name = get_service_name(namespace)
+            self.xaddr_services.setdefault((xaddr, name), []).append(namespace)
+            self.service_namespaces.setdefault(name, []).append(namespace)
+
+    def get_namespace(self,xaddr : str,service : str,preferred_namespace = None) -> str:
+        """
+        Returns the namespace of the service advertised at the xaddr.
+        - requirements:
+            - xaddr [str] : service address, e.g. capabilities.PTZ.XAddr
+            - service [str] : service name, e.g. media, ptz, imaging, events, analytics
+            - preferred_namespace [str] : returned when the device advertises it, defaults to the namespace of the local wsdl
+        - return:
+            - namespace [str] : the advertised namespace at the xaddr, else the one at an other xaddr, None if the service is not advertised
+        """
+        namespaces = self.xaddr_services.get((xaddr, service)) or self.service_namespaces.get(service)
+        if not namespaces: return None
+        if preferred_namespace == None: preferred_namespace = WSDL_NAMESPACES.get(service)
+        return preferred_namespace if preferred_namespace in namespaces else namespaces[0]
+
+    def get_xaddr(self,namespace : str) -> str:
+        entry = self.namespaces.get(namespace)
+        return entry[0] if entry != None else None
+
+    def get_version(self,namespace : str) -> tuple:
+        """
+        Returns (major, minor) of the advertised service version, None if the namespace is not advertised.
+        """
+        entry = self.namespaces.get(namespace)
+        return entry[1] if entry != None else None
+
+    def get_namespaces(self,service : str) -> list:
+        """
+        Returns every advertised namespace of the service, e.g. the ver10 and ver20 media namespaces.
+        """
+        return list(self.service_namespaces.get(service, []))
+
+    def is_supported(self,namespace : str) -> bool:
+        return namespace in self.namespaces
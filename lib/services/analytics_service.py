@@ -4,45 +4,23 @@ Created to control Onvif Analitic service properties.
 craeted by : enstns
 created time : 20.05.23
 """
-import logging
-
-from lib.onvif import OnvifService, get_caching_client
+from lib.onvif import OnvifService, get_service_proxy
 from lib.requests_messages.analytics_request_messages import AnalyticsRequestMessages
+from lib.log_config import get_logger, get_device_logger
+from lib.service_index import ServiceIndex
 
-DEBUG = True
-LOG = False
-
-logger = logging.getLogger('analytics_service')
-logger.setLevel(logging.DEBUG)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = get_logger('analytics_service')
 
 ANALYTIC_SERVICE_NS = "http://www.onvif.org/ver20/analytics/wsdl"
 
-if DEBUG:
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
-    ch.setFormatter(formatter)
-    logger.addHandler(ch)
-
-if LOG: 
-    log = logging.FileHandler(filename="log/onvif_service.log", mode='a', encoding=None, delay=False, errors=None)
-    log.setLevel(logging.DEBUG)
-    log.setFormatter(formatter)
-    logger.addHandler(log)
-
 def get_analytics_namespace(services = [],xaddr=""):
-    if services and services != None:
-        for serv in services:
-            ns = str(serv.Namespace)
-            if serv.XAddr == xaddr and "analytics" in ns:
-                return serv.Namespace
-    else:
-        return None
-        
+    return ServiceIndex(services).get_namespace(xaddr,"analytics") if services else None
+
 class AnalyticsService:
     def __init__(self,onvif_service = OnvifService()) -> None:
         self.is_analytics_service_supported = False
         self.onvif_service = onvif_service
+        self.logger = get_device_logger(logger,onvif_service)
         self.wsdlUrl = self.onvif_service.wsdl_directory + "/analytics.wsdl"
         self.xAddr = "" 
         self.analytics_name_space = ""
@@ -53,10 +31,10 @@ class AnalyticsService:
         if self.onvif_service.get_con_status() and self.onvif_service.capabilities.Analytics != None:
             self.is_analytics_service_supported = True
             self.xAddr = self.onvif_service.capabilities.Analytics.XAddr
-            self.analytics_name_space = get_analytics_namespace(services = self.onvif_service.services,xaddr = self.xAddr)
+            self.analytics_name_space = self.onvif_service.get_service_index().get_namespace(self.xAddr,"analytics")
             self.capabilities = self.GetServiceCapabilities()
         else:
-            logger.error(f"Analytics service not sported from {self.onvif_service.ip}")
+            self.logger.error("Analytics service not sported from %s", self.onvif_service.ip)
     # AnalyticsEngineBinding
     def GetServiceCapabilities(self) -> dict:
         """
@@ -68,17 +46,15 @@ class AnalyticsService:
         service_cap = {}
         if self.onvif_service.get_con_status():
             if self.is_analytics_service_supported:
-                logger.info(f"Try to GetServiceCapabilities information..")
+                self.logger.info("Try to GetServiceCapabilities information..")
                 try:
-                    zeepAnalyticsClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_analytics = zeepAnalyticsClient.create_service("{" + self.analytics_name_space + "}AnalyticsEngineBinding", self.xAddr)
-                    service_cap = ws_client_analytics.GetServiceCapabilities()
+                    service_cap = self.onvif_service.call_metadata_operation("GetServiceCapabilities",wsdl_URL=self.wsdlUrl,binding="{" + self.analytics_name_space + "}AnalyticsEngineBinding",xaddr=self.xAddr)
                 except Exception as emsg:
-                    logger.error(f"GetServiceCapabilities unsuccess.. -> {emsg}")
+                    self.logger.error("GetServiceCapabilities unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"GetServiceCapabilities complete with success..")
-            else: logger.error(f"Analytics Service not supported..")
-        else: logger.warning(f"No Onvif Connection!")
+                    self.logger.info("GetServiceCapabilities complete with success..")
+            else: self.logger.error("Analytics Service not supported..")
+        else: self.logger.warning("No Onvif Connection!")
         return service_cap
     # AnalyticsEngineBinding
     def GetSupportedAnalyticsModules(self,configuration_token : str) -> list:
@@ -94,17 +70,16 @@ class AnalyticsService:
         supported_analytics_modules = []
         if self.onvif_service.get_con_status():
             if self.is_analytics_service_supported:
-                logger.info(f"Try to GetSupportedAnalyticsModules information..")
+                self.logger.info("Try to GetSupportedAnalyticsModules information..")
                 try:
-                    zeepAnalyticsClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_analytics = zeepAnalyticsClient.create_service("{" + self.analytics_name_space + "}AnalyticsEngineBinding", self.xAddr)
+                    ws_client_analytics = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.analytics_name_space + "}AnalyticsEngineBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     supported_analytics_modules = ws_client_analytics.GetSupportedAnalyticsModules(ConfigurationToken = configuration_token)
                 except Exception as emsg:
-                    logger.error(f"GetSupportedAnalyticsModules unsuccess.. -> {emsg}")
+                    self.logger.error("GetSupportedAnalyticsModules unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"GetSupportedAnalyticsModules complete with success..")
-            else: logger.error(f"Analytics Service not supported..")
-        else: logger.warning(f"No Onvif Connection!")
+                    self.logger.info("GetSupportedAnalyticsModules complete with success..")
+            else: self.logger.error("Analytics Service not supported..")
+        else: self.logger.warning("No Onvif Connection!")
         return supported_analytics_modules
     # AnalyticsEngineBinding
     def CreateAnalyticsModules(self,request_message : AnalyticsRequestMessages.CreateAnalyticsModulesMessage) -> dict: # Not Tested
@@ -120,20 +95,19 @@ class AnalyticsService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to CreateAnalyticsModules request..")
+            self.logger.info("Try to CreateAnalyticsModules request..")
             if self.is_analytics_service_supported:
                 try:
-                    zeepAnalyticsClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_analytics = zeepAnalyticsClient.create_service("{" + self.analytics_name_space + "}AnalyticsEngineBinding", self.xAddr)
+                    ws_client_analytics = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.analytics_name_space + "}AnalyticsEngineBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_analytics.CreateAnalyticsModules(**request_message.to_dict())
                 except Exception as emsg:
-                    logger.error(f"CreateAnalyticsModules unsuccess.. -> {emsg}")
+                    self.logger.error("CreateAnalyticsModules unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"CreateAnalyticsModules complete with success..")
+                    self.logger.info("CreateAnalyticsModules complete with success..")
             else:
-                logger.error(f"Analytics Service not supported..")
-        else: logger.warning(f"No Onvif Connection!")
+                self.logger.error("Analytics Service not supported..")
+        else: self.logger.warning("No Onvif Connection!")
         return status
     # AnalyticsEngineBinding
     def DeleteAnalyticsModules(self,configuration_token : str,analytics_module_name  : str) -> bool: # Not Tested
@@ -150,18 +124,17 @@ class AnalyticsService:
         delete_status = False
         if self.onvif_service.get_con_status():
             if self.is_analytics_service_supported:
-                logger.info(f"Try to DeleteAnalyticsModules {analytics_module_name}..")
+                self.logger.info("Try to DeleteAnalyticsModules %s..", analytics_module_name)
                 try:
-                    zeepAnalyticsClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_analytics = zeepAnalyticsClient.create_service("{" + self.analytics_name_space + "}AnalyticsEngineBinding", self.xAddr)
+                    ws_client_analytics = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.analytics_name_space + "}AnalyticsEngineBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_analytics.DeleteAnalyticsModules(ConfigurationToken  = configuration_token,AnalyticsModuleName = analytics_module_name)
                 except Exception as emsg:
-                    logger.error(f"DeleteAnalyticsModules unsuccess.. -> {emsg}")
+                    self.logger.error("DeleteAnalyticsModules unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"DeleteAnalyticsModules complete with success..")
+                    self.logger.info("DeleteAnalyticsModules complete with success..")
                     delete_status = True
-            else: logger.warning(f"Analytics is not supported !")
-        else: logger.warning(f"No Onvif Connection!")
+            else: self.logger.warning("Analytics is not supported !")
+        else: self.logger.warning("No Onvif Connection!")
         return delete_status
     # AnalyticsEngineBinding
     def GetAnalyticsModuleOptions(self,configuration_token : str,analytics_type = None) -> bool: # Not Tested
@@ -179,20 +152,19 @@ class AnalyticsService:
         options = {}
         if self.onvif_service.get_con_status():
             if self.is_analytics_service_supported:
-                logger.info(f"Try to GetAnalyticsModuleOptions information..")
+                self.logger.info("Try to GetAnalyticsModuleOptions information..")
                 try:
-                    zeepAnalyticsClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_analytics = zeepAnalyticsClient.create_service("{" + self.analytics_name_space + "}AnalyticsEngineBinding", self.xAddr)
+                    ws_client_analytics = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.analytics_name_space + "}AnalyticsEngineBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     if analytics_type != None:
                         options = ws_client_analytics.GetAnalyticsModuleOptions(ConfigurationToken = configuration_token,Type = analytics_type)
                     else:
                         options = ws_client_analytics.GetAnalyticsModuleOptions(ConfigurationToken = configuration_token)
                 except Exception as emsg:
-                    logger.error(f"GetAnalyticsModuleOptions unsuccess.. -> {emsg}")
+                    self.logger.error("GetAnalyticsModuleOptions unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"GetAnalyticsModuleOptions complete with success..")
-            else: logger.error(f"Analytics Service not supported..")
-        else: logger.warning(f"No Onvif Connection!")
+                    self.logger.info("GetAnalyticsModuleOptions complete with success..")
+            else: self.logger.error("Analytics Service not supported..")
+        else: self.logger.warning("No Onvif Connection!")
         return options
     # AnalyticsEngineBinding
     def GetAnalyticsModules(self,configuration_token : str) -> list: # Not Tested
@@ -208,17 +180,16 @@ class AnalyticsService:
         analytics_modules = []
         if self.onvif_service.get_con_status():
             if self.is_analytics_service_supported:
-                logger.info(f"Try to GetAnalyticsModules information..")
+                self.logger.info("Try to GetAnalyticsModules information..")
                 try:
-                    zeepAnalyticsClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_analytics = zeepAnalyticsClient.create_service("{" + self.analytics_name_space + "}AnalyticsEngineBinding", self.xAddr)
+                    ws_client_analytics = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.analytics_name_space + "}AnalyticsEngineBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     analytics_modules = ws_client_analytics.GetAnalyticsModules(ConfigurationToken = configuration_token)
                 except Exception as emsg:
-                    logger.error(f"GetAnalyticsModules unsuccess.. -> {emsg}")
+                    self.logger.error("GetAnalyticsModules unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"GetAnalyticsModules complete with success..")
-            else: logger.error(f"Analytics Service not supported..")
-        else: logger.warning(f"No Onvif Connection!")
+                    self.logger.info("GetAnalyticsModules complete with success..")
+            else: self.logger.error("Analytics Service not supported..")
+        else: self.logger.warning("No Onvif Connection!")
         return analytics_modules
     # AnalyticsEngineBinding
     def GetSupportedMetadata(self,type_name = None) -> dict: # Not Tested
@@ -235,20 +206,19 @@ class AnalyticsService:
         supported_metadata = {}
         if self.onvif_service.get_con_status():
             if self.is_analytics_service_supported:
-                logger.info(f"Try to GetSupportedMetadata information..")
+                self.logger.info("Try to GetSupportedMetadata information..")
                 try:
-                    zeepAnalyticsClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_analytics = zeepAnalyticsClient.create_service("{" + self.analytics_name_space + "}AnalyticsEngineBinding", self.xAddr)
+                    ws_client_analytics = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.analytics_name_space + "}AnalyticsEngineBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     if type_name != None:
                         supported_metadata = ws_client_analytics.GetSupportedMetadata(Type = type_name)
                     else:
                         supported_metadata = ws_client_analytics.GetSupportedMetadata()
                 except Exception as emsg:
-                    logger.error(f"GetSupportedMetadata unsuccess.. -> {emsg}")
+                    self.logger.error("GetSupportedMetadata unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"GetSupportedMetadata complete with success..")
-            else: logger.error(f"Analytics Service not supported..")
-        else: logger.warning(f"No Onvif Connection!")
+                    self.logger.info("GetSupportedMetadata complete with success..")
+            else: self.logger.error("Analytics Service not supported..")
+        else: self.logger.warning("No Onvif Connection!")
         return supported_metadata
     # AnalyticsEngineBinding
     def ModifyAnalyticsModules(self,request_message : AnalyticsRequestMessages.ModifyAnalyticsModulesMessage) -> bool: # Not Tested
@@ -263,19 +233,18 @@ class AnalyticsService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to ModifyAnalyticsModules request..")
+            self.logger.info("Try to ModifyAnalyticsModules request..")
             if self.is_analytics_service_supported:
                 try:
-                    zeepAnalyticsClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_analytics = zeepAnalyticsClient.create_service("{" + self.analytics_name_space + "}AnalyticsEngineBinding", self.xAddr)
+                    ws_client_analytics = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.analytics_name_space + "}AnalyticsEngineBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_analytics.ModifyAnalyticsModules(**request_message.to_dict())
                 except Exception as emsg:
-                    logger.error(f"ModifyAnalyticsModules unsuccess.. -> {emsg}")
+                    self.logger.error("ModifyAnalyticsModules unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"ModifyAnalyticsModules complete with success..")
-            else: logger.error(f"Analytics Service not supported..")
-        else: logger.warning(f"No Onvif Connection!")
+                    self.logger.info("ModifyAnalyticsModules complete with success..")
+            else: self.logger.error("Analytics Service not supported..")
+        else: self.logger.warning("No Onvif Connection!")
         return status
     # RuleEngineBinding
     def CreateRules(self,request_message : AnalyticsRequestMessages.CreateRulesMessage) -> bool:
@@ -291,19 +260,18 @@ class AnalyticsService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to CreateRules request..")
+            self.logger.info("Try to CreateRules request..")
             if self.is_analytics_service_supported:
                 try:
-                    zeepAnalyticsClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_analytics = zeepAnalyticsClient.create_service("{" + self.analytics_name_space + "}RuleEngineBinding", self.xAddr)
+                    ws_client_analytics = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.analytics_name_space + "}RuleEngineBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_analytics.CreateRules(**request_message.to_dict())
                 except Exception as emsg:
-                    logger.error(f"CreateRules unsuccess.. -> {emsg}")
+                    self.logger.error("CreateRules unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"CreateRules complete with success..")
-            else: logger.error(f"Analytics Service not supported..")
-        else: logger.warning(f"No Onvif Connection!")
+                    self.logger.info("CreateRules complete with success..")
+            else: self.logger.error("Analytics Service not supported..")
+        else: self.logger.warning("No Onvif Connection!")
         return status
     # RuleEngineBinding
     def DeleteRules(self,configuration_token : str,rule_name : str) -> bool:
@@ -320,18 +288,17 @@ class AnalyticsService:
         delete_status = False
         if self.onvif_service.get_con_status():
             if self.is_analytics_service_supported:
-                logger.info(f"Try to DeleteRules {rule_name}..")
+                self.logger.info("Try to DeleteRules %s..", rule_name)
                 try:
-                    zeepAnalyticsClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_analytics = zeepAnalyticsClient.create_service("{" + self.analytics_name_space + "}RuleEngineBinding", self.xAddr)
+                    ws_client_analytics = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.analytics_name_space + "}RuleEngineBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_analytics.DeleteRules(ConfigurationToken = configuration_token,RuleName = rule_name)
                 except Exception as emsg:
-                    logger.error(f"DeleteRules unsuccess.. -> {emsg}")
+                    self.logger.error("DeleteRules unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"DeleteRules complete with success..")
+                    self.logger.info("DeleteRules complete with success..")
                     delete_status = True
-            else: logger.error(f"Analytics Service not supported..")
-        else: logger.warning(f"No Onvif Connection!")
+            else: self.logger.error("Analytics Service not supported..")
+        else: self.logger.warning("No Onvif Connection!")
         return delete_status
     # RuleEngineBinding
     def GetRuleOptions(self,configuration_token : str,rule_type = None) -> dict:
@@ -351,19 +318,18 @@ class AnalyticsService:
         rule_options = {}
         if self.onvif_service.get_con_status():
             if self.is_analytics_service_supported:
-                logger.info(f"Try to GetRuleOptions information..")
+                self.logger.info("Try to GetRuleOptions information..")
                 try:
-                    zeepAnalyticsClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_analytics = zeepAnalyticsClient.create_service("{" + self.analytics_name_space + "}RuleEngineBinding", self.xAddr)
+                    ws_client_analytics = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.analytics_name_space + "}RuleEngineBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     if rule_type != None: 
                         rule_options = ws_client_analytics.GetRuleOptions(ConfigurationToken = configuration_token,RuleType = rule_type)
                     else: 
                         rule_options = ws_client_analytics.GetRuleOptions(ConfigurationToken = configuration_token)
                 except Exception as emsg:
-                    logger.error(f"GetRuleOptions unsuccess.. -> {emsg}")
-                else: logger.info(f"GetRuleOptions complete with success..")
-            else: logger.error(f"Analytics Service not supported..")
-        else: logger.warning(f"No Onvif Connection!")
+                    self.logger.error("GetRuleOptions unsuccess.. -> %s", emsg)
+                else: self.logger.info("GetRuleOptions complete with success..")
+            else: self.logger.error("Analytics Service not supported..")
+        else: self.logger.warning("No Onvif Connection!")
         return rule_options
     # RuleEngineBinding
     def GetRules(self,configuration_token : str) -> list:
@@ -379,17 +345,16 @@ class AnalyticsService:
         rules = []
         if self.onvif_service.get_con_status():
             if self.is_analytics_service_supported:
-                logger.info(f"Try to GetRules information..")
+                self.logger.info("Try to GetRules information..")
                 try:
-                    zeepAnalyticsClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_analytics = zeepAnalyticsClient.create_service("{" + self.analytics_name_space + "}RuleEngineBinding", self.xAddr)
+                    ws_client_analytics = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.analytics_name_space + "}RuleEngineBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     rules = ws_client_analytics.GetRules(ConfigurationToken = configuration_token)
                 except Exception as emsg:
-                    logger.error(f"GetRules unsuccess.. -> {emsg}")
+                    self.logger.error("GetRules unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"GetRules complete with success..")
-            else: logger.error(f"Analytics Service not supported..")
-        else: logger.warning(f"No Onvif Connection!")
+                    self.logger.info("GetRules complete with success..")
+            else: self.logger.error("Analytics Service not supported..")
+        else: self.logger.warning("No Onvif Connection!")
         return rules
     # RuleEngineBinding
     def GetSupportedRules(self,configuration_token : str) -> list:
@@ -405,17 +370,16 @@ class AnalyticsService:
         supported_rules = []
         if self.onvif_service.get_con_status():
             if self.is_analytics_service_supported:
-                logger.info(f"Try to GetSupportedRules information..")
+                self.logger.info("Try to GetSupportedRules information..")
                 try:
-                    zeepAnalyticsClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_analytics = zeepAnalyticsClient.create_service("{" + self.analytics_name_space + "}RuleEngineBinding", self.xAddr)
+                    ws_client_analytics = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.analytics_name_space + "}RuleEngineBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     supported_rules = ws_client_analytics.GetSupportedRules(ConfigurationToken = configuration_token)
                 except Exception as emsg:
-                    logger.error(f"GetSupportedRules unsuccess.. -> {emsg}")
+                    self.logger.error("GetSupportedRules unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"GetSupportedRules complete with success..")
-            else: logger.error(f"Analytics Service not supported..")
-        else: logger.warning(f"No Onvif Connection!")
+                    self.logger.info("GetSupportedRules complete with success..")
+            else: self.logger.error("Analytics Service not supported..")
+        else: self.logger.warning("No Onvif Connection!")
         return supported_rules
     # RuleEngineBinding
     def ModifyRules(self,request_message : AnalyticsRequestMessages.ModifyRulesMessage) -> bool:
@@ -429,17 +393,16 @@ class AnalyticsService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to ModifyRules request..")
+            self.logger.info("Try to ModifyRules request..")
             if self.is_analytics_service_supported:
                 try:
-                    zeepAnalyticsClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_analytics = zeepAnalyticsClient.create_service("{" + self.analytics_name_space + "}RuleEngineBinding", self.xAddr)
+                    ws_client_analytics = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.analytics_name_space + "}RuleEngineBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_analytics.ModifyRules(**request_message.to_dict())
                 except Exception as emsg:
-                    logger.error(f"ModifyRules unsuccess.. -> {emsg}")
+                    self.logger.error("ModifyRules unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"ModifyRules complete with success..")
-            else: logger.error(f"Analytics Service not supported..")
-        else: logger.warning(f"No Onvif Connection!")
+                    self.logger.info("ModifyRules complete with success..")
+            else: self.logger.error("Analytics Service not supported..")
+        else: self.logger.warning("No Onvif Connection!")
         return status
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Created to control Onvif Analytics service properties from asyncio.
+The methods take the same arguments and return the same values as AnalyticsService.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+from lib.async_onvif import AsyncOnvifService, AsyncServiceBase
+from lib.requests_messages.analytics_request_messages import AnalyticsRequestMessages
+from lib.services.analytics_service import logger
+
+class AsyncAnalyticsService(AsyncServiceBase):
+    def __init__(self,onvif_service : AsyncOnvifService) -> None:
+        super().__init__(onvif_service = onvif_service,service_name = "Analytics",logger = logger)
+        self.wsdlUrl = self.onvif_service.wsdl_directory + "/analytics.wsdl"
+        self.analytics_name_space = ""
+        self.set_analytics_service_variables()
+
+    def set_analytics_service_variables(self) -> None:
+        if self.onvif_service.get_con_status() and self.onvif_service.capabilities.Analytics != None:
+            self.is_service_supported = True
+            self.xAddr = self.onvif_service.capabilities.Analytics.XAddr
+            self.analytics_name_space = self.onvif_service.get_service_index().get_namespace(self.xAddr,"analytics")
+            # rules and analytics modules are separate bindings of analytics.wsdl
+            self.binding = "{" + str(self.analytics_name_space) + "}AnalyticsEngineBinding"
+            self.rule_binding = "{" + str(self.analytics_name_space) + "}RuleEngineBinding"
+        else:
+            self.logger.error("Analytics service not sported from %s", self.onvif_service.ip)
+
+    async def GetServiceCapabilities(self) -> dict:
+        """
+        Returns the capabilities of the analytics service.
+        """
+        return await self.call("GetServiceCapabilities",{},use_metadata_cache = True)
+
+    async def GetSupportedAnalyticsModules(self,configuration_token : str) -> list:
+        """
+        Returns the analytics modules supported by the video analytics configuration.
+        """
+        return await self.call("GetSupportedAnalyticsModules",[],ConfigurationToken = configuration_token)
+
+    async def CreateAnalyticsModules(self,request_message : AnalyticsRequestMessages.CreateAnalyticsModulesMessage) -> bool:
+        """
+        Adds analytics modules to the video analytics configuration.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("CreateAnalyticsModules",**request_message.to_dict())
+
+    async def DeleteAnalyticsModules(self,configuration_token : str,analytics_module_name : str) -> bool:
+        """
+        Removes the analytics module from the video analytics configuration.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("DeleteAnalyticsModules",ConfigurationToken = configuration_token,AnalyticsModuleName = analytics_module_name)
+
+    async def GetAnalyticsModuleOptions(self,configuration_token : str,analytics_type = None) -> dict:
+        """
+        Returns the options of the analytics modules of the video analytics configuration.
+        """
+        request_params = {"ConfigurationToken": configuration_token}
+        if analytics_type != None: request_params["Type"] = analytics_type
+        return await self.call("GetAnalyticsModuleOptions",{},**request_params)
+
+    async def GetAnalyticsModules(self,configuration_token : str) -> list:
+        """
+        Returns the analytics modules of the video analytics configuration.
+        """
+        return await self.call("GetAnalyticsModules",[],ConfigurationToken = configuration_token)
+
+    async def GetSupportedMetadata(self,type_name = None) -> dict:
+        """
+        Returns the metadata description of the analytics modules.
+        """
+        request_params = {}
+        if type_name != None: request_params["Type"] = type_name
+        return await self.call("GetSupportedMetadata",{},**request_params)
+
+    async def ModifyAnalyticsModules(self,request_message : AnalyticsRequestMessages.ModifyAnalyticsModulesMessage) -> bool:
+        """
+        Modifies analytics modules of the video analytics configuration.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("ModifyAnalyticsModules",**request_message.to_dict())
+
+    async def CreateRules(self,request_message : AnalyticsRequestMessages.CreateRulesMessage) -> bool:
+        """
+        Adds rules to the video analytics configuration.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("CreateRules",binding = self.rule_binding,**request_message.to_dict())
+
+    async def DeleteRules(self,configuration_token : str,rule_name : str) -> bool:
+        """
+        Removes the rule from the video analytics configuration.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("DeleteRules",binding = self.rule_binding,ConfigurationToken = configuration_token,RuleName = rule_name)
+
+    async def GetRuleOptions(self,configuration_token : str,rule_type = None) -> dict:
+        """
+        Returns the options of the rules of the video analytics configuration.
+        """
+        request_params = {"ConfigurationToken": configuration_token}
+        if rule_type != None: request_params["RuleType"] = rule_type
+        return await self.call("GetRuleOptions",{},binding = self.rule_binding,**request_params)
+
+    async def GetRules(self,configuration_token : str) -> list:
+        """
+        Returns the rules of the video analytics configuration.
+        """
+        return await self.call("GetRules",[],binding = self.rule_binding,ConfigurationToken = configuration_token)
+
+    async def GetSupportedRules(self,configuration_token : str) -> list:
+        """
+        Returns the rules supported by the video analytics configuration.
+        """
+        return await self.call("GetSupportedRules",[],binding = self.rule_binding,ConfigurationToken = configuration_token)
+
+    async def ModifyRules(self,request_message : AnalyticsRequestMessages.ModifyRulesMessage) -> bool:
+        """
+        Modifies rules of the video analytics configuration.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("ModifyRules",binding = self.rule_binding,**request_message.to_dict())
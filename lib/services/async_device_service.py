@@ -0,0 +1,127 @@
+"""
+Created to control Onvif Device service properties from asyncio.
+The methods take the same arguments and return the same values as DeviceService.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+from lib.async_onvif import AsyncOnvifService, AsyncServiceBase
+from lib.params.device_request_params import DeviceEnumParams
+from lib.requests_messages.device_request_messages import DeviceRequestMessages
+from lib.services.device_service import DEVICE_SERVICE_NS, logger
+
+class AsyncDeviceService(AsyncServiceBase):
+    def __init__(self,onvif_service : AsyncOnvifService) -> None:
+        super().__init__(onvif_service = onvif_service,service_name = "Device",logger = logger)
+        # the device service is available on every onvif device
+        self.is_service_supported = True
+        self.wsdlUrl = self.onvif_service.wsdl_directory + "/devicemgmt.wsdl"
+        self.xAddr = self.onvif_service.get_con_xaddr()
+        self.binding = "{" + DEVICE_SERVICE_NS + "}DeviceBinding"
+
+    async def CreateUsers(self,request_message : DeviceRequestMessages.CreateUsersMessage) -> bool:
+        """
+        Creates new device users.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("CreateUsers",**request_message.to_dict())
+
+    async def DeleteUsers(self,username : str) -> bool:
+        """
+        Deletes the device user with the given name.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("DeleteUsers",Username = username)
+
+    async def GetUsers(self) -> list:
+        """
+        Returns the users of the device.
+        """
+        return await self.call("GetUsers",[])
+
+    async def GetDeviceInformation(self) -> dict:
+        """
+        Returns the manufacturer, model, firmware version, serial number and hardware id of the device.
+        """
+        return await self.call("GetDeviceInformation",{})
+
+    async def SetDiscoveryMode(self,discovery_mode : DeviceEnumParams.DiscoveryMode) -> bool:
+        """
+        Sets the discovery mode of the device.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("SetDiscoveryMode",DiscoveryMode = discovery_mode.value)
+
+    async def GetDiscoveryMode(self) -> dict:
+        """
+        Returns the discovery mode of the device.
+        """
+        return await self.call("GetDiscoveryMode",{})
+
+    async def SetHostname(self,name : str) -> bool:
+        """
+        Sets the hostname of the device.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("SetHostname",Name = name)
+
+    async def GetHostname(self) -> dict:
+        """
+        Returns the hostname of the device.
+        """
+        return await self.call("GetHostname",{})
+
+    async def SystemReboot(self) -> dict:
+        """
+        Reboots the device.
+        """
+        status, reboot_message = await self.call_operation("SystemReboot",{})
+        if not status: return {}
+        self.onvif_service.notify_reboot()
+        return reboot_message
+
+    async def SetSystemDateAndTime(self,request_message : DeviceRequestMessages.SetSystemDateAndTimeMessage) -> bool:
+        """
+        Sets the date and time of the device.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("SetSystemDateAndTime",**request_message.to_dict())
+
+    async def GetSystemDateAndTime(self) -> dict:
+        """
+        Returns the date and time of the device.
+        """
+        return await self.call("GetSystemDateAndTime",{})
+
+    async def SetRemoteDiscoveryMode(self,remote_discovery_mode : DeviceEnumParams.DiscoveryMode) -> bool:
+        """
+        Sets the remote discovery mode of the device.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("SetRemoteDiscoveryMode",RemoteDiscoveryMode = remote_discovery_mode.value)
+
+    async def GetRemoteDiscoveryMode(self) -> dict:
+        """
+        Returns the remote discovery mode of the device.
+        """
+        return await self.call("GetRemoteDiscoveryMode",{})
+
+    async def SetNTP(self,request_message : DeviceRequestMessages.SetNTPMessage) -> bool:
+        """
+        Sets the NTP settings of the device.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("SetNTP",**request_message.to_dict())
+
+    async def GetNTP(self) -> dict:
+        """
+        Returns the NTP settings of the device.
+        """
+        return await self.call("GetNTP",{})
@@ -0,0 +1,142 @@
+"""
+Created to control Onvif Event service properties from asyncio.
+The methods take the same arguments and return the same values as EventService.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import datetime
+from zeep import xsd
+
+from lib.async_onvif import AsyncOnvifService, AsyncServiceBase
+from lib.requests_messages.event_request_messages import EventRequestMessages
+from lib.services.event_service import check_pull_response, pull_response_parser, logger, SETTINGS, PULL_SETTINGS
+
+class AsyncEventService(AsyncServiceBase):
+    def __init__(self,onvif_service : AsyncOnvifService) -> None:
+        super().__init__(onvif_service = onvif_service,service_name = "Event",logger = logger)
+        self.wsdlUrl = self.onvif_service.wsdl_directory + "/events.wsdl"
+        self.event_name_space = ""
+        # loaded on the first request that depends on them
+        self.event_service_capabilities = None
+        self.set_event_service_variables()
+
+    def set_event_service_variables(self) -> None:
+        if self.onvif_service.get_con_status() and self.onvif_service.capabilities.Events != None:
+            self.is_service_supported = True
+            self.xAddr = self.onvif_service.capabilities.Events.XAddr
+            self.event_name_space = self.onvif_service.get_service_index().get_namespace(self.xAddr,"events")
+            self.binding = "{" + str(self.event_name_space) + "}EventBinding"
+            self.pull_point_binding = "{" + str(self.event_name_space) + "}PullPointSubscriptionBinding"
+            self.subscription_manager_binding = "{" + str(self.event_name_space) + "}SubscriptionManagerBinding"
+        else:
+            self.logger.error("Event service not sported from %s", self.onvif_service.ip)
+
+    async def is_capability_supported(self,capability : str) -> bool:
+        if self.event_service_capabilities == None:
+            self.event_service_capabilities = await self.GetServiceCapabilities()
+        try:
+            return bool(getattr(self.event_service_capabilities, capability))
+        except Exception:
+            return False
+
+    async def GetServiceCapabilities(self) -> dict:
+        """
+        Returns the capabilities of the event service.
+        """
+        return await self.call("GetServiceCapabilities",{},use_metadata_cache = True)
+
+    async def AddEventBroker(self,request_message : EventRequestMessages.AddEventBrokerRequestMessage) -> bool:
+        """
+        Adds an event broker configuration to the device.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        if not await self.is_capability_supported("EventBrokerProtocols"):
+            self.logger.error("Event Service not supported..")
+            return False
+        return await self.call_status("AddEventBroker",**request_message.to_dict())
+
+    async def DeleteEventBroker(self,address : str) -> bool:
+        """
+        Deletes the event broker configuration with the given address.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        if not await self.is_capability_supported("EventBrokerProtocols"):
+            self.logger.error("Event Service not supported..")
+            return False
+        return await self.call_status("DeleteEventBroker",Address = address)
+
+    async def GetEventBrokers(self,address : str) -> list:
+        """
+        Returns the event broker configurations of the device.
+        """
+        if not await self.is_capability_supported("EventBrokerProtocols"):
+            self.logger.error("Event Service not supported..")
+            return []
+        return await self.call("GetEventBrokers",[],Address = address)
+
+    async def GetEventProperties(self) -> dict:
+        """
+        Returns the topics and message descriptions the device supports.
+        """
+        return await self.call("GetEventProperties",{})
+
+    async def CreatePullPointSubscription(self,request_message = None) -> dict:
+        """
+        Creates a pull point subscription, the response holds the SubscriptionReference address.
+        """
+        request_params = request_message.to_dict() if request_message != None else {}
+        return await self.call("CreatePullPointSubscription",{},**request_params)
+
+    async def PullMessages(self,address : str,timeout : str,message_limit : int,topic_filter = None) -> dict:
+        """
+        Pulls the messages of the pull point subscription at the given address, messages not matching the optional TopicFilter are dropped.
+        - return:
+            - PullMessagesResponse or {}
+        """
+        header = xsd.ComplexType(xsd.Sequence([xsd.Element('{http://www.w3.org/2005/08/addressing}Address', xsd.String())]))
+        header_value = header(Address='http://www.w3.org/2005/08/addressing/anonymous')
+        response = await self.call("PullMessages",None,binding = self.pull_point_binding,xaddr = address,settings = PULL_SETTINGS,_soapheaders = [header_value],Timeout = timeout,MessageLimit = message_limit)
+        if response == None:
+            return {}
+        try:
+            check_pull_response(self.onvif_service.get_async_service_proxy(wsdl_URL = self.wsdlUrl,binding = self.pull_point_binding,xaddr = address,settings = PULL_SETTINGS),response)
+        except Exception as emsg:
+            self.logger.error("PullMessages unsuccess.. -> %s", emsg)
+            return {}
+        return pull_response_parser(response.content,topic_filter)
+
+    async def Renew(self,address : str,termination_time : str) -> dict:
+        """
+        Extends the termination time of the subscription at the given address.
+        """
+        return await self.call("Renew",{},binding = self.subscription_manager_binding,xaddr = address,settings = SETTINGS,TerminationTime = termination_time)
+
+    async def Seek(self,utctime : datetime.datetime,reverse : bool) -> bool:
+        """
+        Moves the read pointer of the pull point to the given time.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("Seek",binding = self.pull_point_binding,UtcTime = utctime,Reverse = reverse)
+
+    async def SetSynchronizationPoint(self) -> bool:
+        """
+        Requests the current state of the properties from the device.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("SetSynchronizationPoint",binding = self.pull_point_binding)
+
+    async def Unsubscribe(self,address : str) -> bool:
+        """
+        Terminates the subscription at the given address.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        if not await self.is_capability_supported("WSPullPointSupport"):
+            self.logger.error("Event Service not supported..")
+            return False
+        return await self.call_status("Unsubscribe",binding = self.pull_point_binding,xaddr = address)
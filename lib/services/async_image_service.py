@@ -0,0 +1,112 @@
+"""
+Created to control Onvif Imaging service properties from asyncio.
+The methods take the same arguments and return the same values as ImageService.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+from lib.async_onvif import AsyncOnvifService, AsyncServiceBase
+from lib.requests_messages.image_request_messages import ImageRequestMessages
+from lib.services.image_service import logger
+
+class AsyncImageService(AsyncServiceBase):
+    def __init__(self,onvif_service : AsyncOnvifService) -> None:
+        super().__init__(onvif_service = onvif_service,service_name = "Image",logger = logger)
+        self.image_name_space = ""
+        self.video_source_token = None
+        self.set_image_service_variables()
+
+    def set_image_service_variables(self) -> None:
+        if self.onvif_service.get_con_status() and self.onvif_service.capabilities.Imaging != None:
+            self.wsdlUrl = self.onvif_service.wsdl_directory + "/imaging.wsdl"
+            self.xAddr = self.onvif_service.capabilities.Imaging.XAddr
+            self.image_name_space = self.onvif_service.get_service_index().get_namespace(self.xAddr,"imaging")
+            self.binding = "{" + str(self.image_name_space) + "}ImagingBinding"
+            if self.onvif_service.get_first_profile() != None:
+                self.video_source_token = self.onvif_service.get_first_profile().VideoSourceConfiguration.SourceToken
+            # every imaging request is bound to a video source
+            self.is_service_supported = self.video_source_token != None
+        else:
+            self.logger.error("Imaging service not sported from %s", self.onvif_service.ip)
+
+    async def GetServiceCapabilities(self) -> dict:
+        """
+        Returns the capabilities of the imaging service.
+        """
+        return await self.call("GetServiceCapabilities",{},use_metadata_cache = True)
+
+    async def GetImagingSettings(self,vs_token = None) -> dict:
+        """
+        Returns the imaging configuration of the video source.
+        """
+        if vs_token == None: vs_token = self.video_source_token
+        return await self.call("GetImagingSettings",{},VideoSourceToken = vs_token)
+
+    async def SetImagingSettings(self,request_message : ImageRequestMessages.SetImagingSettingsMessage) -> bool:
+        """
+        Sets the imaging configuration of the video source.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("SetImagingSettings",**request_message.to_dict())
+
+    async def GetCurrentPreset(self,vs_token = None) -> dict:
+        """
+        Returns the last imaging preset applied to the video source.
+        """
+        if vs_token == None: vs_token = self.video_source_token
+        return await self.call("GetCurrentPreset",{},VideoSourceToken = vs_token)
+
+    async def SetCurrentPreset(self,preset_token : str,vs_token = None) -> bool:
+        """
+        Applies the imaging preset to the video source.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        if vs_token == None: vs_token = self.video_source_token
+        return await self.call_status("SetCurrentPreset",VideoSourceToken = vs_token,PresetToken = preset_token)
+
+    async def GetPresets(self,vs_token = None) -> list:
+        """
+        Returns the imaging presets of the video source.
+        """
+        if vs_token == None: vs_token = self.video_source_token
+        return await self.call("GetPresets",{},VideoSourceToken = vs_token)
+
+    async def GetMoveOptions(self,vs_token = None) -> dict:
+        """
+        Returns the focus move options of the video source.
+        """
+        if vs_token == None: vs_token = self.video_source_token
+        return await self.call("GetMoveOptions",{},VideoSourceToken = vs_token)
+
+    async def GetOptions(self,vs_token = None) -> dict:
+        """
+        Returns the valid ranges of the imaging parameters of the video source.
+        """
+        if vs_token == None: vs_token = self.video_source_token
+        return await self.call("GetOptions",{},VideoSourceToken = vs_token)
+
+    async def GetStatus(self,vs_token = None) -> dict:
+        """
+        Returns the focus status of the video source.
+        """
+        if vs_token == None: vs_token = self.video_source_token
+        return await self.call("GetStatus",{},VideoSourceToken = vs_token)
+
+    async def Move(self,request_message : ImageRequestMessages.MoveMessage) -> bool:
+        """
+        Moves the focus lens.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("Move",**request_message.to_dict())
+
+    async def Stop(self,vs_token = None) -> bool:
+        """
+        Stops the focus lens movement.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        if vs_token == None: vs_token = self.video_source_token
+        return await self.call_status("Stop",VideoSourceToken = vs_token)
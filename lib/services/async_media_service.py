@@ -0,0 +1,190 @@
+"""
+Created to control Onvif Media service properties from asyncio.
+The methods take the same arguments and return the same values as MediaService.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import datetime
+import os
+
+from lib.async_onvif import AsyncOnvifService, AsyncServiceBase
+from lib.requests_messages.media_request_messages import MediaRequestMessages
+from lib.services.media_service import logger
+from lib.media_uri_cache import GET_STREAM_URI, GET_SNAPSHOT_URI
+from lib.snapshot_fetcher import SNAPSHOT_CHUNK_SIZE, SNAPSHOT_MAX_BYTES, SNAPSHOT_TIMEOUT, SnapshotTooLarge
+
+class AsyncMediaService(AsyncServiceBase):
+    def __init__(self,onvif_service : AsyncOnvifService) -> None:
+        super().__init__(onvif_service = onvif_service,service_name = "Media",logger = logger)
+        self.media_name_space = ""
+        self.profiles = None
+        # loaded on the first OSD request
+        self.media_capabilities = None
+        self.set_media_service_variables()
+
+    def set_media_service_variables(self) -> None:
+        if self.onvif_service.get_con_status() and self.onvif_service.capabilities.Media != None:
+            self.is_service_supported = True
+            self.xAddr = self.onvif_service.capabilities.Media.XAddr
+            self.wsdlUrl = self.onvif_service.wsdl_directory + "/media.wsdl"
+            self.media_name_space = self.onvif_service.get_service_index().get_namespace(self.xAddr,"media")
+            self.binding = "{" + str(self.media_name_space) + "}MediaBinding"
+            self.profiles = self.onvif_service.profiles
+        else:
+            self.logger.error("Media service not sported from %s", self.onvif_service.ip)
+
+    async def is_osd_supported(self) -> bool:
+        if self.media_capabilities == None:
+            self.media_capabilities = await self.GetServiceCapabilities()
+        try:
+            return bool(self.media_capabilities.OSD)
+        except Exception:
+            return False
+
+    async def GetServiceCapabilities(self) -> dict:
+        """
+        Returns the capabilities of the media service.
+        """
+        return await self.call("GetServiceCapabilities",{},use_metadata_cache = True)
+
+    async def GetVideoSources(self) -> list:
+        """
+        Returns the video sources of the device.
+        """
+        return await self.call("GetVideoSources",{})
+
+    async def GetProfiles(self) -> dict:
+        """
+        Returns the media profiles of the device.
+        """
+        status, profiles = await self.call_operation("GetProfiles",{})
+        if not status: return {}
+        self.onvif_service.media_uri_cache.update_profiles(profiles)
+        return profiles
+
+    async def GetStreamUri(self,request_message : MediaRequestMessages.GetStreamUriMessage,use_cache = True) -> dict:
+        """
+        Returns the stream uri of the media profile, from OnvifService.media_uri_cache while it is valid unless use_cache is False.
+        """
+        media_uri_cache = self.onvif_service.media_uri_cache
+        if use_cache:
+            cached_uri = media_uri_cache.get(GET_STREAM_URI,request_message.ProfileToken,request_message.StreamSetup)
+            if cached_uri != None: return cached_uri
+        status, stream_uri = await self.call_operation("GetStreamUri",{},**request_message.to_dict())
+        if not status: return {}
+        media_uri_cache.put(GET_STREAM_URI,request_message.ProfileToken,request_message.StreamSetup,stream_uri)
+        return stream_uri
+
+    async def GetSnapshotUri(self,profile_token : str,use_cache = True) -> dict:
+        """
+        Returns the snapshot uri of the media profile, from OnvifService.media_uri_cache while it is valid unless use_cache is False.
+        """
+        media_uri_cache = self.onvif_service.media_uri_cache
+        if use_cache:
+            cached_uri = media_uri_cache.get(GET_SNAPSHOT_URI,profile_token)
+            if cached_uri != None: return cached_uri
+        status, snapshot_uri = await self.call_operation("GetSnapshotUri",None,ProfileToken = profile_token)
+        if not status: return None
+        media_uri_cache.put(GET_SNAPSHOT_URI,profile_token,None,snapshot_uri)
+        return snapshot_uri
+
+    async def DownloadSnapshot(self,snap_shot_uri : str,path = "download",timeout = SNAPSHOT_TIMEOUT,buffer = None) -> bool:
+        """
+        Downloads the image of the snapshot uri to the given location path over the http connections of the device.
+        - requirements:
+            - snap_shot_uri -> GetSnapshotUri response
+            - path -> Download location
+            - timeout [float] : request timeout in seconds
+            - buffer -> optional object with a write method, e.g. io.BytesIO, the image is written to it instead of a file
+        - return:
+            - status [boolean] : Download image status
+        """
+        download_status = False
+        image_location = buffer if buffer != None else f'{path}/{self.onvif_service.ip}_{datetime.datetime.now().strftime(f"%y%m%dT%H%M%S")}.jpg'
+        self.logger.info("Try to DownloadSnapshot image -> %s ..", image_location)
+        part_path = None if buffer != None else f"{image_location}.part"
+        try:
+            http_client = self.onvif_service.get_transport().client
+            async with http_client.stream("GET", snap_shot_uri.Uri, auth = self.onvif_service.get_snapshot_auth(), timeout = timeout) as response:
+                if response.status_code == 200:
+                    outfile = buffer if buffer != None else open(part_path, 'wb')
+                    try:
+                        size = 0
+                        async for chunk in response.aiter_bytes(SNAPSHOT_CHUNK_SIZE):
+                            size += len(chunk)
+                            if size > SNAPSHOT_MAX_BYTES: raise SnapshotTooLarge(f"Snapshot is larger than {SNAPSHOT_MAX_BYTES} bytes")
+                            outfile.write(chunk)
+                    finally:
+                        if buffer == None: outfile.close()
+                    if part_path != None: os.replace(part_path, image_location)
+                    download_status = True
+                else:
+                    self.logger.error("DownloadSnapshot image Request unsuccess -> %s - %s", response.status_code, response.reason_phrase)
+        except Exception as emsg:
+            self.logger.error("DownloadSnapshot image unsuccess.. -> %s", emsg)
+        if part_path != None and os.path.exists(part_path): os.remove(part_path)
+        if download_status: self.logger.info("DownloadSnapshot image complete with success %s", image_location)
+        return download_status
+
+    async def GetVideoSourceConfigurations(self) -> list:
+        """
+        Returns the video source configurations of the device.
+        """
+        return await self.call("GetVideoSourceConfigurations",[])
+
+    async def GetCompatibleVideoAnalyticsConfigurations(self,profile_token : str) -> list:
+        """
+        Returns the video analytics configurations that can be added to the media profile.
+        """
+        return await self.call("GetCompatibleVideoAnalyticsConfigurations",[],ProfileToken = profile_token)
+
+    async def GetOSD(self,osd_token : str) -> dict:
+        """
+        Returns the OSD configuration with the given token.
+        """
+        if not await self.is_osd_supported():
+            self.logger.warning("GetOSD is not supported !")
+            return {}
+        return await self.call("GetOSD",{},OSDToken = osd_token)
+
+    async def GetOSDs(self,configuration_token = None) -> list:
+        """
+        Returns the OSD configurations of the video source configuration.
+        """
+        if not await self.is_osd_supported():
+            self.logger.warning("GetOSDs is not supported !")
+            return []
+        return await self.call("GetOSDs",[],ConfigurationToken = configuration_token)
+
+    async def GetOSDOptions(self,configuration_token : str) -> dict:
+        """
+        Returns the OSD options of the video source configuration.
+        """
+        if not await self.is_osd_supported():
+            self.logger.warning("GetOSDOptions is not supported !")
+            return {}
+        return await self.call("GetOSDOptions",{},ConfigurationToken = configuration_token)
+
+    async def DeleteOSD(self,osd_token : str) -> bool:
+        """
+        Deletes the OSD configuration with the given token.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        if not await self.is_osd_supported():
+            self.logger.warning("DeleteOSD is not supported !")
+            return False
+        return await self.call_status("DeleteOSD",OSDToken = osd_token)
+
+    async def CreateOSD(self,request_message : MediaRequestMessages.CreateOSDMessage) -> str:
+        """
+        Creates an OSD configuration.
+        - return:
+            - OSDToken [str] or empty string
+        """
+        if not await self.is_osd_supported():
+            self.logger.warning("CreateOSD is not supported !")
+            return ""
+        osd_token_response = await self.call("CreateOSD",None,**request_message.to_dict())
+        return osd_token_response.OSDToken if osd_token_response != None else ""
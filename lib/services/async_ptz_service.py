@@ -0,0 +1,256 @@
+"""
+Created to control Onvif PTZ service properties from asyncio.
+The methods take the same arguments and return the same values as PTZService.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+from lib.async_onvif import AsyncOnvifService, AsyncServiceBase
+from lib.requests_messages.ptz_request_messages import PTZRequestMessages
+from lib.params.ptz_request_params import PTZEnumParams
+from lib.services.ptz_service import logger
+
+class AsyncPTZService(AsyncServiceBase):
+    def __init__(self,onvif_service : AsyncOnvifService) -> None:
+        super().__init__(onvif_service = onvif_service,service_name = "PTZ",logger = logger)
+        self.wsdlUrl = self.onvif_service.wsdl_directory + "/ptz.wsdl"
+        self.ptz_name_space = ""
+        self.profile_token = None
+        self.set_ptz_service_variables()
+
+    def set_ptz_service_variables(self) -> None:
+        if self.onvif_service.get_con_status() and self.onvif_service.capabilities.PTZ != None:
+            self.is_service_supported = True
+            self.xAddr = self.onvif_service.capabilities.PTZ.XAddr
+            self.ptz_name_space = self.onvif_service.get_service_index().get_namespace(self.xAddr,"ptz")
+            self.binding = "{" + str(self.ptz_name_space) + "}PTZBinding"
+            if self.onvif_service.get_first_profile() != None: self.profile_token = self.onvif_service.get_first_profile().token
+        else:
+            self.logger.error("PTZ service not sported from %s", self.onvif_service.ip)
+
+    async def GetServiceCapabilities(self) -> dict:
+        """
+        Returns the capabilities of the PTZ service.
+        """
+        return await self.call("GetServiceCapabilities",{},use_metadata_cache = True)
+
+    async def GetConfigurations(self) -> list:
+        """
+        Returns all existing PTZConfigurations of the device.
+        """
+        return await self.call("GetConfigurations",[])
+
+    async def GetConfiguration(self,ptz_configuration_token : str) -> dict:
+        """
+        Returns the PTZConfiguration with the given token.
+        """
+        return await self.call("GetConfiguration",{},PTZConfigurationToken = ptz_configuration_token)
+
+    async def GetCompatibleConfigurations(self,profile_token = None) -> dict:
+        """
+        Returns the PTZConfigurations that can be added to the media profile.
+        """
+        if profile_token == None: profile_token = self.profile_token
+        return await self.call("GetCompatibleConfigurations",{},ProfileToken = profile_token)
+
+    async def GetNodes(self) -> list:
+        """
+        Returns the descriptions of the available PTZ Nodes.
+        """
+        return await self.call("GetNodes",[])
+
+    async def GetNode(self,node_token : str) -> dict:
+        """
+        Returns the PTZ Node with the given token.
+        """
+        return await self.call("GetNode",{},NodeToken = node_token)
+
+    async def AbsoluteMove(self,request_message : PTZRequestMessages.AbsoluteMoveRequestMessage) -> bool:
+        """
+        Moves pan, tilt or zoom to an absolute destination.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("AbsoluteMove",**request_message.to_dict())
+
+    async def ContinuousMove(self,request_message : PTZRequestMessages.ContinuousMoveRequestMessage) -> bool:
+        """
+        Starts a continuous pan, tilt or zoom move with the given velocity.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("ContinuousMove",**request_message.to_dict())
+
+    async def RelativeMove(self,request_message : PTZRequestMessages.RelativeMoveRequestMessage) -> bool:
+        """
+        Moves pan, tilt or zoom relative to the current position.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("RelativeMove",**request_message.to_dict())
+
+    async def GeoMove(self,request_message : PTZRequestMessages.GeoMoveRequestMessage) -> bool:
+        """
+        Moves to the given geographic location.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("GeoMove",**request_message.to_dict())
+
+    async def MoveAndStartTracking(self,request_message : PTZRequestMessages.MoveAndStartTrackingRequestMessage) -> bool:
+        """
+        Moves to the given position and starts tracking.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("MoveAndStartTracking",**request_message.to_dict())
+
+    async def Stop(self,profile_token = None,pantilt = False,zoom = False) -> bool:
+        """
+        Stops the ongoing pan, tilt and zoom movements.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        if profile_token == None: profile_token = self.profile_token
+        return await self.call_status("Stop",ProfileToken = profile_token,PanTilt = pantilt,Zoom = zoom)
+
+    async def GetStatus(self,profile_token = None) -> dict:
+        """
+        Returns the position and move status of the PTZ unit.
+        """
+        if profile_token == None: profile_token = self.profile_token
+        return await self.call("GetStatus",{},ProfileToken = profile_token)
+
+    async def GetPresets(self,profile_token = None) -> list:
+        """
+        Returns the presets of the media profile.
+        """
+        if profile_token == None: profile_token = self.profile_token
+        return await self.call("GetPresets",[],ProfileToken = profile_token)
+
+    async def SetPreset(self,profile_token = None,preset_name = None,preset_token = None) -> dict:
+        """
+        Saves the current position as a preset.
+        - return:
+            - PresetToken or None
+        """
+        request_params = {}
+        if profile_token == None: profile_token = self.profile_token
+        request_params["ProfileToken"] = profile_token
+        if preset_name != None: request_params["PresetName"] = preset_name
+        if preset_token != None: request_params["PresetToken"] = preset_token
+        return await self.call("SetPreset",None,**request_params)
+
+    async def RemovePreset(self,preset_token : str,profile_token = None) -> bool:
+        """
+        Removes the preset with the given token.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        if profile_token == None: profile_token = self.profile_token
+        return await self.call_status("RemovePreset",ProfileToken = profile_token,PresetToken = preset_token)
+
+    async def GotoPreset(self,preset_token : str,speed = None,profile_token = None) -> bool:
+        """
+        Moves to the preset with the given token.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        request_params = {}
+        if profile_token == None: profile_token = self.profile_token
+        request_params["ProfileToken"] = profile_token
+        request_params["PresetToken"] = preset_token
+        if speed != None: request_params["Speed"] = speed
+        return await self.call_status("GotoPreset",**request_params)
+
+    async def SetHomePosition(self,profile_token = None) -> bool:
+        """
+        Saves the current position as the home position.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        if profile_token == None: profile_token = self.profile_token
+        return await self.call_status("SetHomePosition",ProfileToken = profile_token)
+
+    async def GotoHomePosition(self,speed = None,profile_token = None) -> bool:
+        """
+        Moves to the home position.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        request_params = {}
+        if profile_token == None: profile_token = self.profile_token
+        request_params["ProfileToken"] = profile_token
+        if speed != None: request_params["Speed"] = speed
+        return await self.call_status("GotoHomePosition",**request_params)
+
+    async def GetPresetTours(self,profile_token = None) -> list:
+        """
+        Returns the preset tours of the media profile.
+        """
+        if profile_token == None: profile_token = self.profile_token
+        return await self.call("GetPresetTours",[],ProfileToken = profile_token)
+
+    async def GetPresetTour(self,preset_tour_token : str,profile_token = None) -> dict:
+        """
+        Returns the preset tour with the given token.
+        """
+        if profile_token == None: profile_token = self.profile_token
+        return await self.call("GetPresetTour",{},ProfileToken = profile_token,PresetTourToken = preset_tour_token)
+
+    async def GetPresetTourOptions(self,preset_tour_token : str,profile_token = None) -> dict:
+        """
+        Returns the options of the preset tour with the given token.
+        """
+        if profile_token == None: profile_token = self.profile_token
+        return await self.call("GetPresetTourOptions",{},ProfileToken = profile_token,PresetTourToken = preset_tour_token)
+
+    async def CreatePresetTour(self,profile_token = None) -> str:
+        """
+        Creates an empty preset tour.
+        - return:
+            - PresetTourToken or None
+        """
+        if profile_token == None: profile_token = self.profile_token
+        return await self.call("CreatePresetTour",None,ProfileToken = profile_token)
+
+    async def ModifyPresetTour(self,request_message : PTZRequestMessages.ModifyPresetTourRequestMessage) -> bool:
+        """
+        Modifies a preset tour.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("ModifyPresetTour",**request_message.to_dict())
+
+    async def RemovePresetTour(self,preset_tour_token : str,profile_token = None) -> bool:
+        """
+        Removes the preset tour with the given token.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        if profile_token == None: profile_token = self.profile_token
+        return await self.call_status("RemovePresetTour",ProfileToken = profile_token,PresetTourToken = preset_tour_token)
+
+    async def OperatePresetTour(self,preset_tour_token : str,operation : PTZEnumParams.PTZPresetTourOperation,profile_token = None) -> bool:
+        """
+        Starts, stops or pauses the preset tour with the given token.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        if profile_token == None: profile_token = self.profile_token
+        return await self.call_status("OperatePresetTour",ProfileToken = profile_token,PresetTourToken = preset_tour_token,Opetation = operation)
+
+    async def SendAuxiliaryCommand(self,auxilary_data : str,profile_token = None) -> dict:
+        """
+        Sends an auxiliary command to the PTZ unit.
+        """
+        if profile_token == None: profile_token = self.profile_token
+        return await self.call("SendAuxiliaryCommand",{},ProfileToken = profile_token,AuxiliaryData = auxilary_data)
+
+    async def SetConfiguration(self,request_message : PTZRequestMessages.SetConfigurationRequestMessage) -> bool:
+        """
+        Sets a PTZConfiguration.
+        - return:
+            - status [boolean] : True means OK else False
+        """
+        return await self.call_status("SetConfiguration",**request_message.to_dict())
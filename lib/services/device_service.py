@@ -5,33 +5,16 @@ craeted by : enstns
 created time : 01.04.23
 """
 from zeep.client import Settings
-import logging
 
-from lib.onvif import OnvifService, get_caching_client
+from lib.onvif import OnvifService, get_service_proxy
 from lib.params.device_request_params import DeviceEnumParams
 from lib.requests_messages.device_request_messages import DeviceRequestMessages
+from lib.log_config import get_logger, get_device_logger
 
-DEBUG = True
-LOG = False
-
-logger = logging.getLogger('device_service')
-logger.setLevel(logging.DEBUG)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = get_logger('device_service')
 
 DEVICE_SERVICE_NS = "http://www.onvif.org/ver10/device/wsdl"
 
-if DEBUG:
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
-    ch.setFormatter(formatter)
-    logger.addHandler(ch)
-
-if LOG: 
-    log = logging.FileHandler(filename="log/onvif_service.log", mode='a', encoding=None, delay=False, errors=None)
-    log.setLevel(logging.DEBUG)
-    log.setFormatter(formatter)
-    logger.addHandler(log)
-
 settings = Settings()
 settings.strict = False
 settings.xml_huge_tree = True
@@ -48,6 +31,7 @@ def get_image_addr_namespace(services = []):
 class DeviceService:
     def __init__(self,onvif_service = OnvifService()) -> None:
         self.onvif_service = onvif_service
+        self.logger = get_device_logger(logger,onvif_service)
         self.wsdlUrl = self.onvif_service.wsdl_directory + "/devicemgmt.wsdl"
         self.xAddr = self.onvif_service.get_con_xaddr()
 
@@ -64,16 +48,15 @@ class DeviceService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to CreateUsers information..")
+            self.logger.info("Try to CreateUsers information..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 ws_client_device.CreateUsers(**request_message.to_dict())
             except Exception as emsg:
-                logger.error(f"CreateUsers unsuccess.. -> {emsg}")
+                self.logger.error("CreateUsers unsuccess.. -> %s", emsg)
             else:
                 status = True
-                logger.info(f"CreateUsers complete with success..")
+                self.logger.info("CreateUsers complete with success..")
         return status
 
     def DeleteUsers(self,username = str) -> bool:
@@ -89,16 +72,15 @@ class DeviceService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to DeleteUsers information..")
+            self.logger.info("Try to DeleteUsers information..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 ws_client_device.DeleteUsers(Username=username)
             except Exception as emsg:
-                logger.error(f"DeleteUsers unsuccess.. -> {emsg}")
+                self.logger.error("DeleteUsers unsuccess.. -> %s", emsg)
             else:
                 status = True
-                logger.info(f"DeleteUsers complete with success..")
+                self.logger.info("DeleteUsers complete with success..")
         return status
 
     def GetUsers(self) -> list:
@@ -111,15 +93,14 @@ class DeviceService:
         """
         users = []
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to GetUsers information..")
+            self.logger.info("Try to GetUsers information..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 users = ws_client_device.GetUsers()
             except Exception as emsg:
-                logger.error(f"GetUsers unsuccess.. -> {emsg}")
+                self.logger.error("GetUsers unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetUsers complete with success..")
+                self.logger.info("GetUsers complete with success..")
         return users
 
     def GetDeviceInformation(self) -> dict:
@@ -139,15 +120,14 @@ class DeviceService:
         """
         device_info = {}
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to GetDeviceInformation information..")
+            self.logger.info("Try to GetDeviceInformation information..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 device_info = ws_client_device.GetDeviceInformation()
             except Exception as emsg:
-                logger.error(f"GetDeviceInformation unsuccess.. -> {emsg}")
+                self.logger.error("GetDeviceInformation unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetDeviceInformation complete with success..")
+                self.logger.info("GetDeviceInformation complete with success..")
         return device_info
 
     def SetDiscoveryMode(self,discovery_mode = DeviceEnumParams.DiscoveryMode)-> bool:
@@ -162,16 +142,15 @@ class DeviceService:
         '''
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to SetDiscoveryMode information..")
+            self.logger.info("Try to SetDiscoveryMode information..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 ws_client_device.SetDiscoveryMode(DiscoveryMode  = discovery_mode.value)
             except Exception as emsg:
-                logger.error(f"SetDiscoveryMode unsuccess.. -> {emsg}")
+                self.logger.error("SetDiscoveryMode unsuccess.. -> %s", emsg)
             else:
                 status = True
-                logger.info(f"SetDiscoveryMode complete with success..")
+                self.logger.info("SetDiscoveryMode complete with success..")
         return status
 
     def GetDiscoveryMode(self) -> dict:
@@ -183,15 +162,14 @@ class DeviceService:
         """
         discovery_mode = {}
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to GetDiscoveryMode information..")
+            self.logger.info("Try to GetDiscoveryMode information..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 discovery_mode = ws_client_device.GetDiscoveryMode()
             except Exception as emsg:
-                logger.error(f"GetDiscoveryMode unsuccess.. -> {emsg}")
+                self.logger.error("GetDiscoveryMode unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetDiscoveryMode complete with success..")
+                self.logger.info("GetDiscoveryMode complete with success..")
         return discovery_mode
 
     def SetHostname(self,name : str) -> bool:
@@ -206,16 +184,15 @@ class DeviceService:
         '''
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to SetHostname information..")
+            self.logger.info("Try to SetHostname information..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 ws_client_device.SetHostname(Name = name)
             except Exception as emsg:
-                logger.error(f"SetHostname unsuccess.. -> {emsg}")
+                self.logger.error("SetHostname unsuccess.. -> %s", emsg)
             else:
                 status = True
-                logger.info(f"SetHostname complete with success..")
+                self.logger.info("SetHostname complete with success..")
         return status
 
     def GetHostname(self) -> dict:
@@ -228,15 +205,14 @@ class DeviceService:
         """
         hostname_info = {}
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to GetHostname information..")
+            self.logger.info("Try to GetHostname information..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 hostname_info = ws_client_device.GetHostname()
             except Exception as emsg:
-                logger.error(f"GetHostname unsuccess.. -> {emsg}")
+                self.logger.error("GetHostname unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetHostname complete with success..")
+                self.logger.info("GetHostname complete with success..")
         return hostname_info
 
     def SystemReboot(self) -> dict:
@@ -248,15 +224,15 @@ class DeviceService:
         '''
         reboot_message = {}
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to SystemReboot..")
+            self.logger.info("Try to SystemReboot..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 reboot_message = ws_client_device.SystemReboot()
             except Exception as emsg:
-                logger.error(f"SystemReboot unsuccess.. -> {emsg}")
+                self.logger.error("SystemReboot unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"SystemReboot complete with success..")
+                self.logger.info("SystemReboot complete with success..")
+                self.onvif_service.notify_reboot()
         return reboot_message
 
     def SetSystemDateAndTime(self,request_message : DeviceRequestMessages.SetSystemDateAndTimeMessage) -> bool:
@@ -271,16 +247,15 @@ class DeviceService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to SetSystemDateAndTime..")
+            self.logger.info("Try to SetSystemDateAndTime..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 ws_client_device.SetSystemDateAndTime(**request_message.to_dict())
             except Exception as emsg:
-                logger.error(f"SetSystemDateAndTime unsuccess.. -> {emsg}")
+                self.logger.error("SetSystemDateAndTime unsuccess.. -> %s", emsg)
             else:
                 status = True
-                logger.info(f"SetSystemDateAndTime complete with success..")
+                self.logger.info("SetSystemDateAndTime complete with success..")
         return status
 
     def GetSystemDateAndTime(self) -> dict:
@@ -295,15 +270,14 @@ class DeviceService:
         """
         date_time_info = {}
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to GetSystemDateAndTime information..")
+            self.logger.info("Try to GetSystemDateAndTime information..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 date_time_info = ws_client_device.GetSystemDateAndTime()
             except Exception as emsg:
-                logger.error(f"GetSystemDateAndTime unsuccess.. -> {emsg}")
+                self.logger.error("GetSystemDateAndTime unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetSystemDateAndTime complete with success..")
+                self.logger.info("GetSystemDateAndTime complete with success..")
         return date_time_info
 
     def SetRemoteDiscoveryMode(self,remote_discovery_mode = DeviceEnumParams.DiscoveryMode)-> bool:
@@ -318,16 +292,15 @@ class DeviceService:
         '''
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to SetRemoteDiscoveryMode information..")
+            self.logger.info("Try to SetRemoteDiscoveryMode information..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 ws_client_device.SetRemoteDiscoveryMode(RemoteDiscoveryMode = remote_discovery_mode.value)
             except Exception as emsg:
-                logger.error(f"SetRemoteDiscoveryMode unsuccess.. -> {emsg}")
+                self.logger.error("SetRemoteDiscoveryMode unsuccess.. -> %s", emsg)
             else:
                 status = True
-                logger.info(f"SetRemoteDiscoveryMode complete with success..")
+                self.logger.info("SetRemoteDiscoveryMode complete with success..")
         return status
     
     def GetRemoteDiscoveryMode(self) -> dict:
@@ -339,15 +312,14 @@ class DeviceService:
         """
         remote_discoverymode_info = {}
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to GetRemoteDiscoveryMode information..")
+            self.logger.info("Try to GetRemoteDiscoveryMode information..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 remote_discoverymode_info = ws_client_device.GetRemoteDiscoveryMode()
             except Exception as emsg:
-                logger.error(f"GetRemoteDiscoveryMode unsuccess.. -> {emsg}")
+                self.logger.error("GetRemoteDiscoveryMode unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetRemoteDiscoveryMode complete with success..")
+                self.logger.info("GetRemoteDiscoveryMode complete with success..")
         return remote_discoverymode_info
 
     def SetNTP(self,request_message = DeviceRequestMessages.SetNTPMessage)-> bool:
@@ -363,16 +335,15 @@ class DeviceService:
         '''
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to SetNTP..")
+            self.logger.info("Try to SetNTP..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 ws_client_device.SetNTP(**request_message.to_dict())
             except Exception as emsg:
-                logger.error(f"SetNTP unsuccess.. -> {emsg}")
+                self.logger.error("SetNTP unsuccess.. -> %s", emsg)
             else:
                 status = True
-                logger.info(f"SetNTP complete with success..")
+                self.logger.info("SetNTP complete with success..")
         return status
     
     def GetNTP(self) -> dict:
@@ -385,13 +356,12 @@ class DeviceService:
         """
         ntp_information = {}
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to GetNTP information..")
+            self.logger.info("Try to GetNTP information..")
             try:
-                zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_device = zeep_device_client.create_service("{" + DEVICE_SERVICE_NS + "}DeviceBinding", self.xAddr)
+                ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + DEVICE_SERVICE_NS + "}DeviceBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 ntp_information = ws_client_device.GetNTP()
             except Exception as emsg:
-                logger.error(f"GetNTP unsuccess.. -> {emsg}")
+                self.logger.error("GetNTP unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetNTP complete with success..")
+                self.logger.info("GetNTP complete with success..")
         return ntp_information
\ No newline at end of file
@@ -5,106 +5,146 @@ craeted by : enstns
 created time : 01.04.23
 """
 import datetime
-import logging
-from zeep import CachingClient, Settings, xsd
-import xml.etree.ElementTree as ET
+import io
+from lxml import etree
+from zeep import Settings, xsd
 
-from lib.onvif import HISTORY, OnvifService, isfile_exist
+from lib.onvif import OnvifService, get_service_proxy
 from lib.requests_messages.event_request_messages import EventRequestMessages
 from lib.params.event_request_params import EventEnumParams, EventRequestParams
 from lib.response_messages.event_response_messages import EventResponseMessages
-from zeep.wsse.username import UsernameToken
-
-DEBUG = True
-LOG = False
-
+from lib.log_config import get_logger, get_device_logger
+from lib.service_index import ServiceIndex
 
 SETTINGS = Settings()
 SETTINGS.strict = False
 SETTINGS.xml_huge_tree = True
-# SETTINGS.raw_response = True
-
-logger = logging.getLogger('event_service')
-logger.setLevel(logging.DEBUG)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-if DEBUG:
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
-    ch.setFormatter(formatter)
-    logger.addHandler(ch)
+# PullMessages responses are parsed from the raw xml by pull_response_parser
+PULL_SETTINGS = Settings()
+PULL_SETTINGS.strict = False
+PULL_SETTINGS.xml_huge_tree = True
+PULL_SETTINGS.raw_response = True
 
-if LOG: 
-    log = logging.FileHandler(filename="log/onvif_service.log", mode='a', encoding=None, delay=False, errors=None)
-    log.setLevel(logging.DEBUG)
-    log.setFormatter(formatter)
-    logger.addHandler(log)
+logger = get_logger('event_service')
 
 def get_event_namespace(services = [],xaddr=""):
-    if services and services != None:
-        for serv in services:
-            ns = str(serv.Namespace)
-            if serv.XAddr == xaddr and "event" in ns:
-                return serv.Namespace
-    else:
-        return None
-        
-def get_caching_client(isAuth : bool,wsdl_URL : str,username_token : UsernameToken,settings = SETTINGS):
-    caching_client = None
-    if isfile_exist(wsdl_URL) or wsdl_URL.find("http://www.onvif.org") != -1:
-        try:
-            if isAuth: 
-                caching_client = CachingClient(wsdl=wsdl_URL, wsse=username_token, settings=settings,plugins=[HISTORY])
-            else: 
-                caching_client = CachingClient(wsdl=wsdl_URL, settings=settings,plugins=[HISTORY])
-        except Exception as emsg:
-            logger.error(f"create caching client exception : -> {emsg}")
-    else:
-        logger.error(f"no such a file directory : {str(wsdl_URL)}")
-    return caching_client
+    return ServiceIndex(services).get_namespace(xaddr,"events") if services else None
 
-def pull_response_parser(pull_response_xml : str) -> EventResponseMessages.PullMessagesResponse:
+WSNT_NS = "http://docs.oasis-open.org/wsn/b-2"
+TEV_NS = "http://www.onvif.org/ver10/events/wsdl"
+TT_NS = "http://www.onvif.org/ver10/schema"
+NOTIFICATION_MESSAGE_TAG = "{" + WSNT_NS + "}NotificationMessage"
+CURRENT_TIME_TAG = "{" + TEV_NS + "}CurrentTime"
+TERMINATION_TIME_TAG = "{" + TEV_NS + "}TerminationTime"
+TOPIC_TAG = "{" + WSNT_NS + "}Topic"
+WSNT_MESSAGE_TAG = "{" + WSNT_NS + "}Message"
+SOURCE_TAG = "{" + TT_NS + "}Source"
+KEY_TAG = "{" + TT_NS + "}Key"
+DATA_TAG = "{" + TT_NS + "}Data"
+SIMPLE_ITEM_TAG = "{" + TT_NS + "}SimpleItem"
+ELEMENT_ITEM_TAG = "{" + TT_NS + "}ElementItem"
+
+def parse_event_time(time_text : str) -> datetime.datetime:
+    """
+    Parses an xs:dateTime of the event service to a naive utc datetime, e.g. 2000-01-01T00:00:00Z or 2000-01-01T00:00:00.123+03:00
+    """
+    event_time = datetime.datetime.fromisoformat(time_text.strip().replace("Z", "+00:00"))
+    if event_time.tzinfo != None:
+        event_time = event_time.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return event_time
+
+def parse_notification_message(notification_element) -> EventRequestParams.NotificationMessage:
     """
-        TODO: Parse PullMessages xml response message
-        - parameters : [str] xml response string
-        - return : [dict] PullMessages
+    Decodes one wsnt:NotificationMessage element, walking its children once.
+    """
+    topic = ""
+    message_attributes = {}
+    items = {SOURCE_TAG: [], KEY_TAG: [], DATA_TAG: []}
+    element_items = []
+    for child in notification_element:
+        if child.tag == TOPIC_TAG:
+            topic = (child.text or "").strip()
+        elif child.tag == WSNT_MESSAGE_TAG:
+            for onvif_message in child:
+                # copied to a dict with interned names by NotificationMessage
+                message_attributes = onvif_message.attrib
+                for section in onvif_message:
+                    section_items = items.get(section.tag)
+                    if section_items == None: continue
+                    for item in section:
+                        if item.tag == SIMPLE_ITEM_TAG:
+                            section_items.append(EventRequestParams.SimpleItem(name = item.get("Name"),value = item.get("Value")))
+                        elif item.tag == ELEMENT_ITEM_TAG:
+                            value = etree.tostring(item[0], encoding = "unicode") if len(item) else None
+                            element_items.append(EventRequestParams.SimpleItem(name = item.get("Name"),value = value))
+    source_items, key_items, data_items = items[SOURCE_TAG], items[KEY_TAG], items[DATA_TAG]
+    return EventRequestParams.NotificationMessage(source = source_items[0] if source_items else EventRequestParams.SimpleItem(),
+                                                  data = data_items[0] if data_items else EventRequestParams.SimpleItem(),
+                                                  topic = topic,message = message_attributes,source_items = source_items,
+                                                  key_items = key_items,data_items = data_items,element_items = element_items)
+
+def get_notification_topic(notification_element) -> str:
+    for child in notification_element:
+        if child.tag == TOPIC_TAG: return (child.text or "").strip()
+    return ""
+
+def iter_pull_messages(pull_response_xml,pull_response = None,topic_filter = None):
+    """
+    Streams the NotificationMessages of a PullMessages xml response, every message is yielded as soon as it is decoded
+    and its element is released, so large responses are walked once in near constant memory.
+    - parameters :
+        - pull_response_xml [bytes or str] : xml response
+        - pull_response [PullMessagesResponse] : optional, CurrentTime and TerminationTime are set on it while parsing
+        - topic_filter [TopicFilter] : optional, messages of other topics are released without being decoded
+    - return : NotificationMessage generator
+    """
+    if isinstance(pull_response_xml, str): pull_response_xml = pull_response_xml.encode("utf-8")
+    for _, element in etree.iterparse(io.BytesIO(pull_response_xml), events = ("end",), tag = (NOTIFICATION_MESSAGE_TAG, CURRENT_TIME_TAG, TERMINATION_TIME_TAG), huge_tree = True):
+        if element.tag == NOTIFICATION_MESSAGE_TAG:
+            if topic_filter == None or topic_filter.match(get_notification_topic(element)):
+                yield parse_notification_message(element)
+        elif pull_response != None:
+            try:
+                if element.tag == CURRENT_TIME_TAG: pull_response.CurrentTime = parse_event_time(element.text)
+                else: pull_response.TerminationTime = parse_event_time(element.text)
+            except Exception as emsg:
+                logger.error("pull_response_parser - %s", emsg)
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+def check_pull_response(service_proxy,response) -> None:
+    """
+    Raises the zeep Fault of a raw PullMessages response which is not a 200, zeep skips the reply processing of raw responses
+    so a fault would be parsed as an empty pull and the username token would not see the authentication and time skew faults.
+    - requirements:
+        - service_proxy [ServiceProxy or AsyncServiceProxy] : PullPointSubscriptionBinding proxy the request was sent with
+        - response [requests.Response or httpx.Response] : raw response
+    """
+    if response.status_code != 200:
+        service_proxy._binding.process_reply(service_proxy._client, service_proxy._binding.get("PullMessages"), response)
+
+def pull_response_parser(pull_response_xml,topic_filter = None) -> EventResponseMessages.PullMessagesResponse:
+    """
+        Parse PullMessages xml response message
+        - parameters : [bytes or str] xml response, [TopicFilter] optional topic filter
+        - return : [PullMessagesResponse] PullMessages
     """
     pull_response = EventResponseMessages.PullMessagesResponse()
     try:
-        tree = ET.fromstring(pull_response_xml)  
-        current_time = tree.find('.//{http://www.onvif.org/ver10/events/wsdl}CurrentTime').text
-        termination_time = tree.find('.//{http://www.onvif.org/ver10/events/wsdl}TerminationTime').text
-        try:
-            pull_response.CurrentTime = datetime.datetime.strptime(current_time, '%Y-%m-%dT%H:%M:%SZ') #2000-01-01T00:00:00Z
-            pull_response.TerminationTime = datetime.datetime.strptime(termination_time, '%Y-%m-%dT%H:%M:%SZ') #2000-01-01T00:00:00Z
-        except Exception as emsg:
-            logger.error(f"pull_response_parser - {emsg}")
-        else:
-            notification_messages = tree.findall('.//{http://docs.oasis-open.org/wsn/b-2}NotificationMessage')
-            messages = []
-            for notif_mes in notification_messages:
-                message = EventRequestParams.NotificationMessage(source=EventRequestParams.SimpleItem,data=EventRequestParams.SimpleItem)
-                message.Topic = notif_mes.find('.//{http://docs.oasis-open.org/wsn/b-2}Topic').text
-                mes = notif_mes.find('.//{http://docs.oasis-open.org/wsn/b-2}Message').find('.//{http://www.onvif.org/ver10/schema}Message')
-                message.Message = mes.attrib
-                # message.Source = mes.find('.//{http://www.onvif.org/ver10/schema}Source').find(".//{http://www.onvif.org/ver10/schema}SimpleItem").attrib
-                source = mes.find('.//{http://www.onvif.org/ver10/schema}Source').find(".//{http://www.onvif.org/ver10/schema}SimpleItem").attrib
-                message.Source = EventRequestParams.SimpleItem(name = source["Name"],value=source["Value"])
-                # message.Data = mes.find('.//{http://www.onvif.org/ver10/schema}Data').find(".//{http://www.onvif.org/ver10/schema}SimpleItem").attrib
-                data = mes.find('.//{http://www.onvif.org/ver10/schema}Data').find(".//{http://www.onvif.org/ver10/schema}SimpleItem").attrib
-                message.Data = EventRequestParams.SimpleItem(name = data["Name"],value=data["Value"])
-                messages.append(message)
-            pull_response.NotificationMessage = messages
+        pull_response.NotificationMessage = list(iter_pull_messages(pull_response_xml,pull_response,topic_filter))
     except Exception as emsg:
-        logger.error(f"pull_response_parser - PullMessages Unsuccess, XML parse Error! - {emsg}")
+        logger.error("pull_response_parser - PullMessages Unsuccess, XML parse Error! - %s", emsg)
     else:
-        logger.info(f"PullMessages, XML parsing complete with success..")
+        logger.info("PullMessages, XML parsing complete with success..")
     return pull_response
 
 class EventService:
     def __init__(self,onvif_service = OnvifService()) -> None:
         self.is_event_service_supported = False
         self.onvif_service = onvif_service
+        self.logger = get_device_logger(logger,onvif_service)
         self.event_name_space = ""
         self.wsdlUrl = self.onvif_service.wsdl_directory + "/events.wsdl"
         self.xAddr = "" 
@@ -115,10 +155,10 @@ class EventService:
         if self.onvif_service.get_con_status() and self.onvif_service.capabilities.Events != None:
             self.is_event_service_supported = True
             self.xAddr = self.onvif_service.capabilities.Events.XAddr
-            self.event_name_space = get_event_namespace(services = self.onvif_service.services,xaddr = self.xAddr)
+            self.event_name_space = self.onvif_service.get_service_index().get_namespace(self.xAddr,"events")
             self.event_service_capabilities = self.GetServiceCapabilities()
         else:
-            logger.error(f"Event service not sported from {self.onvif_service.ip}")
+            self.logger.error("Event service not sported from %s", self.onvif_service.ip)
 
     # EventBinding & NOT Tested
     def GetServiceCapabilities(self) -> dict:
@@ -130,15 +170,13 @@ class EventService:
         """
         service_cap = {}
         if self.is_event_service_supported:
-            logger.info(f"Try to GetServiceCapabilities information..")
+            self.logger.info("Try to GetServiceCapabilities information..")
             try:
-                zeepEventClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_event = zeepEventClient.create_service("{" + self.event_name_space + "}EventBinding", self.xAddr)
-                service_cap = ws_client_event.GetServiceCapabilities()
+                service_cap = self.onvif_service.call_metadata_operation("GetServiceCapabilities",wsdl_URL=self.wsdlUrl,binding="{" + self.event_name_space + "}EventBinding",xaddr=self.xAddr)
             except Exception as emsg:
-                logger.error(f"GetServiceCapabilities unsuccess.. -> {emsg}")
+                self.logger.error("GetServiceCapabilities unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetServiceCapabilities complete with success..")
+                self.logger.info("GetServiceCapabilities complete with success..")
         return service_cap
 
     # EventBinding & NOT Tested  
@@ -152,19 +190,18 @@ class EventService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to AddEventBroker request..")
+            self.logger.info("Try to AddEventBroker request..")
             if self.is_event_service_supported and self.event_service_capabilities.EventBrokerProtocols:
                 try:
-                    zeep_event_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_event = zeep_event_client.create_service("{" + self.event_name_space + "}EventBinding", self.xAddr)
+                    ws_client_event = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.event_name_space + "}EventBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_event.AddEventBroker(**request_message.to_dict())
                 except Exception as emsg:
-                    logger.error(f"AddEventBroker unsuccess.. -> {emsg}")
+                    self.logger.error("AddEventBroker unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"AddEventBroker complete with success..")
+                    self.logger.info("AddEventBroker complete with success..")
                     status = True
             else:
-                logger.error(f"Event Service not supported..")
+                self.logger.error("Event Service not supported..")
         return status
 
     # EventBinding & NOT Tested  
@@ -178,19 +215,18 @@ class EventService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to DeleteEventBroker request..")
+            self.logger.info("Try to DeleteEventBroker request..")
             if self.is_event_service_supported and self.event_service_capabilities.EventBrokerProtocols:
                 try:
-                    zeepEventClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_event = zeepEventClient.create_service("{" + self.event_name_space + "}EventBinding", self.xAddr)
+                    ws_client_event = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.event_name_space + "}EventBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_event.DeleteEventBroker(Address = address)
                 except Exception as emsg:
-                    logger.error(f"DeleteEventBroker unsuccess.. -> {emsg}")
+                    self.logger.error("DeleteEventBroker unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"DeleteEventBroker complete with success..")
+                    self.logger.info("DeleteEventBroker complete with success..")
             else:
-                logger.error(f"Event Service not supported..")
+                self.logger.error("Event Service not supported..")
         return status
 
     # EventBinding & NOT Tested  
@@ -225,18 +261,17 @@ class EventService:
         """
         brokers = []
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to GetEventBrokers request..")
+            self.logger.info("Try to GetEventBrokers request..")
             if self.is_event_service_supported and self.event_service_capabilities.EventBrokerProtocols:
                 try:
-                    zeepEventClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_event = zeepEventClient.create_service("{" + self.event_name_space + "}EventBinding", self.xAddr)
+                    ws_client_event = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.event_name_space + "}EventBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     brokers = ws_client_event.GetEventBrokers(Address = address)
                 except Exception as emsg:
-                    logger.error(f"GetEventBrokers unsuccess.. -> {emsg}")
+                    self.logger.error("GetEventBrokers unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"GetEventBrokers complete with success..")
+                    self.logger.info("GetEventBrokers complete with success..")
             else:
-                logger.error(f"Event Service not supported..")
+                self.logger.error("Event Service not supported..")
         return brokers
 
     # EventBinding  
@@ -271,18 +306,17 @@ class EventService:
         """
         event_properties = {}
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to GetEventProperties request..")
+            self.logger.info("Try to GetEventProperties request..")
             if self.is_event_service_supported:
                 try:
-                    zeepEventClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_event = zeepEventClient.create_service("{" + self.event_name_space + "}EventBinding", self.xAddr)
+                    ws_client_event = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.event_name_space + "}EventBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     event_properties = ws_client_event.GetEventProperties()
                 except Exception as emsg:
-                    logger.error(f"GetEventProperties unsuccess.. -> {emsg}")
+                    self.logger.error("GetEventProperties unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"GetEventProperties complete with success..")
+                    self.logger.info("GetEventProperties complete with success..")
             else:
-                logger.error(f"Event Service not supported..")
+                self.logger.error("Event Service not supported..")
         return event_properties
 
     # EventBinding
@@ -303,23 +337,22 @@ class EventService:
         """
         response = {}
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to CreatePullPointSubscription request..")
+            self.logger.info("Try to CreatePullPointSubscription request..")
             if self.is_event_service_supported:
                 try:
-                    zeep_event_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_event = zeep_event_client.create_service("{" + self.event_name_space + "}EventBinding", self.xAddr)
+                    ws_client_event = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.event_name_space + "}EventBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     if request_message != None: response = ws_client_event.CreatePullPointSubscription(**request_message.to_dict())
                     else: response = ws_client_event.CreatePullPointSubscription()
                 except Exception as emsg:
-                    logger.error(f"CreatePullPointSubscription unsuccess.. -> {emsg}")
+                    self.logger.error("CreatePullPointSubscription unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"CreatePullPointSubscription complete with success..")
+                    self.logger.info("CreatePullPointSubscription complete with success..")
             else:
-                logger.error(f"Event Service not supported..")
+                self.logger.error("Event Service not supported..")
         return response
     
     # PullPointSubscription
-    def PullMessages(self,address : str,timeout : str, message_limit : int) -> dict:
+    def PullMessages(self,address : str,timeout : str, message_limit : int,topic_filter = None) -> dict:
         """
         This method pulls one or more messages from a PullPoint. The device shall provide the following PullMessages command for all SubscriptionManager endpoints returned by the CreatePullPointSubscription command. This method shall not wait until the requested number of messages is available but return as soon as at least one message is available.
 
@@ -329,6 +362,8 @@ class EventService:
                 Maximum time to block until this method returns.
             - MessageLimit [int]
                 Upper limit for the number of messages to return at once. A server implementation may decide to return less messages.
+            - topic_filter - optional; [TopicFilter]
+                Messages of other topics are dropped while the response is parsed.
         - return: [dict]
             - CurrentTime [dateTime]
                 The date and time when the messages have been delivered by the web server to the client.
@@ -339,7 +374,7 @@ class EventService:
         """
         pull_response = {}
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to PullMessages request..")
+            self.logger.info("Try to PullMessages request..")
             if self.is_event_service_supported:
                 try:
                     # <a:ReplyTo>
@@ -354,16 +389,16 @@ class EventService:
                     )
                     header_value = header(Address="http://www.w3.org/2005/08/addressing/anonymous")
                     # TODO: get message raw xml
-                    zeepEventClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token(),settings=Settings(strict = False,xml_huge_tree = True,raw_response = True))
-                    ws_client_event = zeepEventClient.create_service("{" + self.event_name_space + "}PullPointSubscriptionBinding", address = address)
-                    pull_response_xml = ws_client_event.PullMessages(_soapheaders=[header_value],Timeout = timeout,MessageLimit = message_limit).text
-                    pull_response = pull_response_parser(pull_response_xml)            
+                    ws_client_event = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.event_name_space + "}PullPointSubscriptionBinding",xaddr=address,username_token=self.onvif_service.get_username_token(),settings=PULL_SETTINGS)
+                    response = ws_client_event.PullMessages(_soapheaders=[header_value],Timeout = timeout,MessageLimit = message_limit)
+                    check_pull_response(ws_client_event,response)
+                    pull_response = pull_response_parser(response.content,topic_filter)            
                 except Exception as emsg:
-                    logger.error(f"PullMessages unsuccess.. -> {emsg}")
+                    self.logger.error("PullMessages unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"PullMessages complete with success..")
+                    self.logger.info("PullMessages complete with success..")
             else:
-                logger.error(f"Event Service not supported..")
+                self.logger.error("Event Service not supported..")
         return pull_response
 
     # SubscriptionManagerBinding
@@ -384,19 +419,18 @@ class EventService:
         """
         renew_response = {}
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to Renew request..")
+            self.logger.info("Try to Renew request..")
             if self.is_event_service_supported:
                 try:
                     # TODO: get message raw xml
-                    zeepEventClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token(),settings=SETTINGS)
-                    ws_client_event = zeepEventClient.create_service("{" + self.event_name_space + "}SubscriptionManagerBinding", address = address)
+                    ws_client_event = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.event_name_space + "}SubscriptionManagerBinding",xaddr=address,username_token=self.onvif_service.get_username_token(),settings=SETTINGS)
                     renew_response = ws_client_event.Renew(TerminationTime = termination_time)
                 except Exception as emsg:
-                    logger.error(f"Renew unsuccess.. -> {emsg}")
+                    self.logger.error("Renew unsuccess.. -> %s", emsg)
                 else:
-                    logger.info(f"Renew complete with success..")
+                    self.logger.info("Renew complete with success..")
             else:
-                logger.error(f"Event Service not supported..")
+                self.logger.error("Event Service not supported..")
         return renew_response
     
     # PullPointSubscription & NOT Tested  
@@ -411,19 +445,18 @@ class EventService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to Seek request..")
+            self.logger.info("Try to Seek request..")
             if self.is_event_service_supported:
                 try:
-                    zeepEventClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_event = zeepEventClient.create_service("{" + self.event_name_space + "}PullPointSubscriptionBinding", self.xAddr)
+                    ws_client_event = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.event_name_space + "}PullPointSubscriptionBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_event.Seek(UtcTime = utctime,Reverse = reverse)
                 except Exception as emsg:
-                    logger.error(f"Seek unsuccess.. -> {emsg}")
+                    self.logger.error("Seek unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"Seek complete with success..")
+                    self.logger.info("Seek complete with success..")
             else:
-                logger.error(f"Event Service not supported..")
+                self.logger.error("Event Service not supported..")
         return status
 
     # PullPointSubscription & NOT Tested  
@@ -441,19 +474,18 @@ class EventService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to SetSynchronizationPoint request..")
+            self.logger.info("Try to SetSynchronizationPoint request..")
             if self.is_event_service_supported:
                 try:
-                    zeepEventClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_event = zeepEventClient.create_service("{" + self.event_name_space + "}PullPointSubscriptionBinding", self.xAddr)
+                    ws_client_event = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.event_name_space + "}PullPointSubscriptionBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_event.SetSynchronizationPoint()
                 except Exception as emsg:
-                    logger.error(f"SetSynchronizationPoint unsuccess.. -> {emsg}")
+                    self.logger.error("SetSynchronizationPoint unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"SetSynchronizationPoint complete with success..")
+                    self.logger.info("SetSynchronizationPoint complete with success..")
             else:
-                logger.error(f"Event Service not supported..")
+                self.logger.error("Event Service not supported..")
         return status
 
     # PullPointSubscription  
@@ -466,18 +498,17 @@ class EventService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to Unsubscribe request..")
+            self.logger.info("Try to Unsubscribe request..")
             if self.is_event_service_supported and self.event_service_capabilities.WSPullPointSupport:
                 try:
-                    zeepEventClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_event = zeepEventClient.create_service("{" + self.event_name_space + "}PullPointSubscriptionBinding", address=address)
+                    ws_client_event = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.event_name_space + "}PullPointSubscriptionBinding",xaddr=address,username_token=self.onvif_service.get_username_token())
                     ws_client_event.Unsubscribe()
                 except Exception as emsg:
-                    logger.error(f"Unsubscribe unsuccess.. -> {emsg}")
+                    self.logger.error("Unsubscribe unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"Unsubscribe complete with success..")
+                    self.logger.info("Unsubscribe complete with success..")
             else:
-                logger.error(f"Event Service not supported..")
+                self.logger.error("Event Service not supported..")
         return status
     
\ No newline at end of file
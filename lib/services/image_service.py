@@ -5,50 +5,29 @@ craeted by : enstns
 created time : 01.04.23
 """
 from zeep.client import Settings
-import logging
 from zeep.wsse.utils import WSU
 
-from lib.onvif import OnvifService, get_caching_client
+from lib.onvif import OnvifService, get_service_proxy
 from lib.requests_messages.image_request_messages import ImageRequestMessages
+from lib.log_config import get_logger, get_device_logger
+from lib.service_index import ServiceIndex
 
-DEBUG = True
-LOG = False
-
-logger = logging.getLogger('imaging_service')
-logger.setLevel(logging.DEBUG)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = get_logger('imaging_service')
 
 IMAGING_SERVICE_NS = "http://www.onvif.org/ver10/image/wsdl"
 
-if DEBUG:
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
-    ch.setFormatter(formatter)
-    logger.addHandler(ch)
-
-if LOG: 
-    log = logging.FileHandler(filename="log/onvif_service.log", mode='a', encoding=None, delay=False, errors=None)
-    log.setLevel(logging.DEBUG)
-    log.setFormatter(formatter)
-    logger.addHandler(log)
-
 settings = Settings()
 settings.strict = False
 settings.xml_huge_tree = True
 
 def get_image_namespace(services = [],xaddr=""):
-    if services and services != None:
-        for serv in services:
-            ns = str(serv.Namespace)
-            if serv.XAddr == xaddr and "imaging" in ns:
-                return serv.Namespace
-    else:
-        return None
+    return ServiceIndex(services).get_namespace(xaddr,"imaging") if services else None
 
 class ImageService:
     def __init__(self,onvif_service = OnvifService()) -> None:
         self.is_imaging_service_supported = False
         self.onvif_service = onvif_service
+        self.logger = get_device_logger(logger,onvif_service)
         self.wsdlUrl = ""
         self.xAddr = ""
         self.image_name_space = ""
@@ -60,10 +39,10 @@ class ImageService:
             self.is_imaging_service_supported = True
             self.wsdlUrl = self.onvif_service.wsdl_directory + "/imaging.wsdl"
             self.xAddr = self.onvif_service.capabilities.Imaging.XAddr
-            self.image_name_space = get_image_namespace(services = self.onvif_service.services,xaddr=self.xAddr)
+            self.image_name_space = self.onvif_service.get_service_index().get_namespace(self.xAddr,"imaging")
             self.video_source_token = self.onvif_service.get_first_profile().VideoSourceConfiguration.SourceToken
         else:
-            logger.error(f"Imaging service not sported from {self.onvif_service.ip}")
+            self.logger.error("Imaging service not sported from %s", self.onvif_service.ip)
             
     def GetImagingSettings(self,vs_token = None) -> dict:
         """
@@ -78,15 +57,14 @@ class ImageService:
         image_settings = {}
         if vs_token == None: vs_token = self.video_source_token
         if self.is_imaging_service_supported and self.video_source_token != None:
-            logger.info(f"Try to GetImagingSettings information..")
+            self.logger.info("Try to GetImagingSettings information..")
             try:
-                zeepImageClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_image = zeepImageClient.create_service("{" + self.image_name_space + "}ImagingBinding", self.xAddr)
+                ws_client_image = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.image_name_space + "}ImagingBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 image_settings = ws_client_image.GetImagingSettings(VideoSourceToken = vs_token)
             except Exception as emsg:
-                logger.error(f"GetImagingSettings unsuccess.. -> {emsg}")
+                self.logger.error("GetImagingSettings unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetImagingSettings complete with success..")
+                self.logger.info("GetImagingSettings complete with success..")
         return image_settings
 
     def GetCurrentPreset(self,vs_token = None) -> dict:
@@ -102,15 +80,14 @@ class ImageService:
         current_preset = {}
         if vs_token == None: vs_token = self.video_source_token
         if self.is_imaging_service_supported and self.video_source_token != None:
-            logger.info(f"Try to GetCurrentPreset information..")
+            self.logger.info("Try to GetCurrentPreset information..")
             try:
-                zeepImageClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_image = zeepImageClient.create_service("{" + self.image_name_space + "}ImagingBinding", self.xAddr)
+                ws_client_image = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.image_name_space + "}ImagingBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 current_preset = ws_client_image.GetCurrentPreset(VideoSourceToken = vs_token)
             except Exception as emsg:
-                logger.error(f"GetCurrentPreset unsuccess.. -> {emsg}")
+                self.logger.error("GetCurrentPreset unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetCurrentPreset complete with success..")
+                self.logger.info("GetCurrentPreset complete with success..")
         return current_preset
 
     def GetMoveOptions(self,vs_token = None) -> dict:
@@ -126,17 +103,16 @@ class ImageService:
         move_options = {}
         if vs_token == None: vs_token = self.video_source_token
         if self.is_imaging_service_supported and self.video_source_token != None:
-            logger.info(f"Try to GetMoveOptions information..")
+            self.logger.info("Try to GetMoveOptions information..")
             try:
-                zeepImageClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_image = zeepImageClient.create_service("{" + self.image_name_space + "}ImagingBinding", self.xAddr)
+                ws_client_image = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.image_name_space + "}ImagingBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 message = zeepImageClient.get_element("ns0:GetMoveOptions")
                 message.VideoSourceToken = vs_token
                 move_options = ws_client_image.GetMoveOptions(VideoSourceToken=vs_token)
             except Exception as emsg:
-                logger.error(f"GetMoveOptions unsuccess.. -> {emsg}")
+                self.logger.error("GetMoveOptions unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetMoveOptions complete with success..")
+                self.logger.info("GetMoveOptions complete with success..")
         return move_options
 
     def GetOptions(self,vs_token = None) -> dict:
@@ -154,15 +130,14 @@ class ImageService:
         options = {}
         if vs_token == None: vs_token = self.video_source_token
         if self.is_imaging_service_supported and self.video_source_token != None:
-            logger.info(f"Try to GetOptions information..")
+            self.logger.info("Try to GetOptions information..")
             try:
-                zeepImageClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_image = zeepImageClient.create_service("{" + self.image_name_space + "}ImagingBinding", self.xAddr)
+                ws_client_image = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.image_name_space + "}ImagingBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 options = ws_client_image.GetOptions(VideoSourceToken = vs_token)
             except Exception as emsg:
-                logger.error(f"GetOptions unsuccess.. -> {emsg}")
+                self.logger.error("GetOptions unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetOptions complete with success..")
+                self.logger.info("GetOptions complete with success..")
         return options
 
     def GetPresets(self,vs_token = None) -> list:
@@ -178,15 +153,14 @@ class ImageService:
         presets = {}
         if vs_token == None: vs_token = self.video_source_token
         if self.is_imaging_service_supported and self.video_source_token != None:
-            logger.info(f"Try to GetPresets information..")
+            self.logger.info("Try to GetPresets information..")
             try:
-                zeepImageClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_image = zeepImageClient.create_service("{" + self.image_name_space + "}ImagingBinding", self.xAddr)
+                ws_client_image = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.image_name_space + "}ImagingBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 presets = ws_client_image.GetPresets(VideoSourceToken = vs_token)
             except Exception as emsg:
-                logger.error(f"GetPresets unsuccess.. -> {emsg}")
+                self.logger.error("GetPresets unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetPresets complete with success..")
+                self.logger.info("GetPresets complete with success..")
         return presets
 
     def GetServiceCapabilities(self) -> dict:
@@ -198,15 +172,13 @@ class ImageService:
         """
         service_cap = {}
         if self.is_imaging_service_supported and self.video_source_token != None:
-            logger.info(f"Try to GetServiceCapabilities information..")
+            self.logger.info("Try to GetServiceCapabilities information..")
             try:
-                zeepImageClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_image = zeepImageClient.create_service("{" + self.image_name_space + "}ImagingBinding", self.xAddr)
-                service_cap = ws_client_image.GetServiceCapabilities()
+                service_cap = self.onvif_service.call_metadata_operation("GetServiceCapabilities",wsdl_URL=self.wsdlUrl,binding="{" + self.image_name_space + "}ImagingBinding",xaddr=self.xAddr)
             except Exception as emsg:
-                logger.error(f"GetServiceCapabilities unsuccess.. -> {emsg}")
+                self.logger.error("GetServiceCapabilities unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetServiceCapabilities complete with success..")
+                self.logger.info("GetServiceCapabilities complete with success..")
         return service_cap
 
     def GetStatus(self,vs_token = None) -> dict:
@@ -223,15 +195,14 @@ class ImageService:
         status_info = {}
         if vs_token == None: vs_token = self.video_source_token
         if self.is_imaging_service_supported and self.video_source_token != None:
-            logger.info(f"Try to GetStatus information..")
+            self.logger.info("Try to GetStatus information..")
             try:
-                zeepImageClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_image = zeepImageClient.create_service("{" + self.image_name_space + "}ImagingBinding", self.xAddr)
+                ws_client_image = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.image_name_space + "}ImagingBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 status_info = ws_client_image.GetStatus(VideoSourceToken = vs_token)
             except Exception as emsg:
-                logger.error(f"GetStatus unsuccess.. -> {emsg}")
+                self.logger.error("GetStatus unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetStatus complete with success..")
+                self.logger.info("GetStatus complete with success..")
         return status_info
 
     def GetServiceCapabilities(self) -> dict:
@@ -243,15 +214,13 @@ class ImageService:
         """
         service_cap = {}
         if self.is_imaging_service_supported and self.video_source_token != None:
-            logger.info(f"Try to GetServiceCapabilities information..")
+            self.logger.info("Try to GetServiceCapabilities information..")
             try:
-                zeepImageClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_image = zeepImageClient.create_service("{" + self.image_name_space + "}ImagingBinding", self.xAddr)
-                service_cap = ws_client_image.GetServiceCapabilities()
+                service_cap = self.onvif_service.call_metadata_operation("GetServiceCapabilities",wsdl_URL=self.wsdlUrl,binding="{" + self.image_name_space + "}ImagingBinding",xaddr=self.xAddr)
             except Exception as emsg:
-                logger.error(f"GetServiceCapabilities unsuccess.. -> {emsg}")
+                self.logger.error("GetServiceCapabilities unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetServiceCapabilities complete with success..")
+                self.logger.info("GetServiceCapabilities complete with success..")
         return service_cap
 
     def SetCurrentPreset(self,preset_token : str,vs_token = None) -> bool: # not tested
@@ -271,17 +240,16 @@ class ImageService:
         """
         if vs_token == None: vs_token = self.video_source_token
         if self.is_imaging_service_supported and self.video_source_token != None:
-            logger.info(f"Try to SetCurrentPreset with {preset_token}..")
+            self.logger.info("Try to SetCurrentPreset with %s..", preset_token)
             try:
-                zeepImageClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_image = zeepImageClient.create_service("{" + self.image_name_space + "}ImagingBinding", self.xAddr)
+                ws_client_image = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.image_name_space + "}ImagingBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 ws_client_image.SetCurrentPreset(VideoSourceToken = vs_token,PresetToken = preset_token)
             except Exception as emsg:
-                logger.error(f"SetCurrentPreset unsuccess.. -> {emsg}")
+                self.logger.error("SetCurrentPreset unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"SetCurrentPreset complete with success..")
+                self.logger.info("SetCurrentPreset complete with success..")
         else:
-            logger.warning(f"SetCurrentPreset unsuccess, please define a preset_token!")
+            self.logger.warning("SetCurrentPreset unsuccess, please define a preset_token!")
 
     def SetImagingSettings(self,request_message : ImageRequestMessages.SetImagingSettingsMessage) -> bool:
         """
@@ -295,18 +263,17 @@ class ImageService:
         """
         set_image_status = False
         if self.is_imaging_service_supported and self.video_source_token != None:
-            logger.info(f"Try to SetImagingSettings..")
+            self.logger.info("Try to SetImagingSettings..")
             try:
-                zeepImageClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_image = zeepImageClient.create_service("{" + self.image_name_space + "}ImagingBinding", self.xAddr)
+                ws_client_image = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.image_name_space + "}ImagingBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 ws_client_image.SetImagingSettings(**request_message.to_dict())
             except Exception as emsg:
-                logger.error(f"SetImagingSettings unsuccess.. -> {emsg}")
+                self.logger.error("SetImagingSettings unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"SetImagingSettings complete with success..")
+                self.logger.info("SetImagingSettings complete with success..")
                 set_image_status = True
         else:
-            logger.warning(f"SetImagingSettings unsuccess, please define a focus dict!")
+            self.logger.warning("SetImagingSettings unsuccess, please define a focus dict!")
         return set_image_status
 
     def Move(self,request_message : ImageRequestMessages.MoveMessage) -> bool: # control move options
@@ -322,19 +289,18 @@ class ImageService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to Move request..")
+            self.logger.info("Try to Move request..")
             if self.is_imaging_service_supported and self.video_source_token != None:
                 try:
-                    zeep_device_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_device = zeep_device_client.create_service("{" + self.image_name_space + "}ImagingBinding", self.xAddr)
+                    ws_client_device = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.image_name_space + "}ImagingBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_device.Move(**request_message.to_dict())
                 except Exception as emsg:
-                    logger.error(f"Move unsuccess.. -> {emsg}")
+                    self.logger.error("Move unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"Move complete with success..")
+                    self.logger.info("Move complete with success..")
             else:
-                logger.error(f"Image Service not supported..")
+                self.logger.error("Image Service not supported..")
         return status
 
     def Stop(self,vs_token = None) -> bool:
@@ -351,15 +317,14 @@ class ImageService:
         stop_status = False
         if vs_token == None: vs_token = self.video_source_token
         if self.is_imaging_service_supported and self.video_source_token != None:
-            logger.info(f"Try to Stop moving..")
+            self.logger.info("Try to Stop moving..")
             try:
-                zeepImageClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_image = zeepImageClient.create_service("{" + self.image_name_space + "}ImagingBinding", self.xAddr)
+                ws_client_image = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.image_name_space + "}ImagingBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 ws_client_image.Stop(VideoSourceToken = vs_token)
             except Exception as emsg:
-                logger.error(f"Stop moving unsuccess.. -> {emsg}")
+                self.logger.error("Stop moving unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"Stop moving complete with success..")
+                self.logger.info("Stop moving complete with success..")
                 stop_status = True
         return stop_status
 
@@ -5,47 +5,26 @@ craeted by : enstns
 created time : 01.04.23
 """
 import datetime
-import logging
 import requests
-from requests.auth import HTTPDigestAuth
 
-from lib.onvif import OnvifService, get_caching_client
+from lib.onvif import OnvifService, get_service_proxy
 from lib.requests_messages.media_request_messages import MediaRequestMessages
+from lib.media_uri_cache import GET_STREAM_URI, GET_SNAPSHOT_URI
+from lib.log_config import get_logger, get_device_logger
+from lib.service_index import ServiceIndex
 
-DEBUG = True
-LOG = False
-
-logger = logging.getLogger('media_service')
-logger.setLevel(logging.DEBUG)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = get_logger('media_service')
 
 MEDIA_SERVICE_NS = "http://www.onvif.org/ver10/media/wsdl"
 
-if DEBUG:
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
-    ch.setFormatter(formatter)
-    logger.addHandler(ch)
-
-if LOG: 
-    log = logging.FileHandler(filename="log/onvif_service.log", mode='a', encoding=None, delay=False, errors=None)
-    log.setLevel(logging.DEBUG)
-    log.setFormatter(formatter)
-    logger.addHandler(log)
-
 def get_media_namespace(services = [],xaddr=""):
-    if services and services != None:
-        for serv in services:
-            ns = str(serv.Namespace)
-            if serv.XAddr == xaddr and "media" in ns:
-                return serv.Namespace
-    else:
-        return None
-     
+    return ServiceIndex(services).get_namespace(xaddr,"media") if services else None
+
 class MediaService:
     def __init__(self,onvif_service = OnvifService()) -> None:
         self.is_media_service_supported = False
         self.onvif_service = onvif_service
+        self.logger = get_device_logger(logger,onvif_service)
         self.wsdlUrl = ""
         self.xAddr = "" 
         self.media_name_space = ""
@@ -58,12 +37,12 @@ class MediaService:
             self.is_media_service_supported = True
             self.xAddr = self.onvif_service.capabilities.Media.XAddr
             self.wsdlUrl = self.onvif_service.wsdl_directory + "/media.wsdl"
-            self.media_name_space = get_media_namespace(services = self.onvif_service.services,xaddr = self.xAddr)
+            self.media_name_space = self.onvif_service.get_service_index().get_namespace(self.xAddr,"media")
             # self.media_name_space = "http://www.onvif.org/ver10/media/wsdl"
             self.profiles = self.GetProfiles()
             self.media_capabilities = self.GetServiceCapabilities()
         else:
-            logger.error(f"Imaging service not sported from {self.onvif_service.ip}")
+            self.logger.error("Imaging service not sported from %s", self.onvif_service.ip)
      
     def GetServiceCapabilities(self) -> dict:
         """
@@ -80,15 +59,13 @@ class MediaService:
         """
         service_cap = {}
         if self.is_media_service_supported:
-            logger.info(f"Try to GetServiceCapabilities information..")
+            self.logger.info("Try to GetServiceCapabilities information..")
             try:
-                zeepMediaClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_media = zeepMediaClient.create_service("{" + self.media_name_space + "}MediaBinding", self.xAddr)
-                service_cap = ws_client_media.GetServiceCapabilities()
+                service_cap = self.onvif_service.call_metadata_operation("GetServiceCapabilities",wsdl_URL=self.wsdlUrl,binding="{" + self.media_name_space + "}MediaBinding",xaddr=self.xAddr)
             except Exception as emsg:
-                logger.error(f"GetServiceCapabilities unsuccess.. -> {emsg}")
+                self.logger.error("GetServiceCapabilities unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetServiceCapabilities complete with success..")
+                self.logger.info("GetServiceCapabilities complete with success..")
         return service_cap
     
     def GetVideoSources(self) -> list:
@@ -100,15 +77,14 @@ class MediaService:
         """
         video_sources = {}
         if self.is_media_service_supported:
-            logger.info(f"Try to GetVideoSources information..")
+            self.logger.info("Try to GetVideoSources information..")
             try:
-                zeepMediaClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_media = zeepMediaClient.create_service("{" + self.media_name_space + "}MediaBinding", self.xAddr)
+                ws_client_media = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.media_name_space + "}MediaBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 video_sources = ws_client_media.GetVideoSources()
             except Exception as emsg:
-                logger.error(f"GetVideoSources unsuccess.. -> {emsg}")
+                self.logger.error("GetVideoSources unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetVideoSources complete with success..")
+                self.logger.info("GetVideoSources complete with success..")
         return video_sources
 
     def GetProfiles(self) -> dict:
@@ -120,18 +96,18 @@ class MediaService:
         """
         profiles = {}
         if self.is_media_service_supported:
-            logger.info(f"Try to GetProfiles information..")
+            self.logger.info("Try to GetProfiles information..")
             try:
-                zeepMediaClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_media = zeepMediaClient.create_service("{" + self.media_name_space + "}MediaBinding", self.xAddr)
+                ws_client_media = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.media_name_space + "}MediaBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 profiles = ws_client_media.GetProfiles()
             except Exception as emsg:
-                logger.error(f"GetProfiles unsuccess.. -> {emsg}")
+                self.logger.error("GetProfiles unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetProfiles complete with success..")
+                self.logger.info("GetProfiles complete with success..")
+                self.onvif_service.media_uri_cache.update_profiles(profiles)
         return profiles
 
-    def GetStreamUri(self,request_message : MediaRequestMessages.GetStreamUriMessage) -> dict:
+    def GetStreamUri(self,request_message : MediaRequestMessages.GetStreamUriMessage,use_cache = True) -> dict:
         """        
         This operation requests a URI that can be used to initiate a live media stream using RTSP as the control protocol. The returned URI shall remain valid indefinitely even if the profile is changed. The ValidUntilConnect, ValidUntilReboot and Timeout Parameter shall be set accordingly (ValidUntilConnect=false, ValidUntilReboot=false, timeout=PT0S).
 
@@ -146,6 +122,7 @@ class MediaService:
 
         - reqirements;
             - request_message -> [GetStreamUriRequestParams] 
+            - use_cache [bool] : False requests the uri from the device even if it is in OnvifService.media_uri_cache
         - return:
             - [dict] GetStreamUriResponse;
                 - MediaUri [MediaUri]
@@ -160,69 +137,80 @@ class MediaService:
         """
         stream_uri = {}
         if self.is_media_service_supported:
-            logger.info(f"Try to GetStreamUri..")
+            media_uri_cache = self.onvif_service.media_uri_cache
+            if use_cache:
+                cached_uri = media_uri_cache.get(GET_STREAM_URI,request_message.ProfileToken,request_message.StreamSetup)
+                if cached_uri != None:
+                    self.logger.debug("GetStreamUri from cache : %s", cached_uri.Uri)
+                    return cached_uri
+            self.logger.info("Try to GetStreamUri..")
             try:
-                zeepMediaClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_media = zeepMediaClient.create_service("{" + self.media_name_space + "}MediaBinding", self.xAddr)
+                ws_client_media = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.media_name_space + "}MediaBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 stream_uri = ws_client_media.GetStreamUri(**request_message.to_dict())
             except Exception as emsg:
-                logger.error(f"GetStreamUri unsuccess.. -> {emsg}")
+                self.logger.error("GetStreamUri unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetStreamUri complete with success..")
-                logger.info(f"Stream URI : {stream_uri.Uri}")
+                self.logger.info("GetStreamUri complete with success..")
+                self.logger.info("Stream URI : %s", stream_uri.Uri)
+                media_uri_cache.put(GET_STREAM_URI,request_message.ProfileToken,request_message.StreamSetup,stream_uri)
         else:
-            logger.warning(f"GetStreamUri unsuccess, Media service not supported!")
+            self.logger.warning("GetStreamUri unsuccess, Media service not supported!")
         return stream_uri
 
-    def GetSnapshotUri(self,profile_token : str) -> dict:
+    def GetSnapshotUri(self,profile_token : str,use_cache = True) -> dict:
         """
         This command lists all available physical video inputs of the device.
         - requirements; 
             - profile_token : [string] 
                 The ProfileToken element indicates the media profile to use and will define the source and dimensions of the snapshot.
+            - use_cache [bool] : False requests the uri from the device even if it is in OnvifService.media_uri_cache
         - return;
             - GetSnapshotUri [dict]
         """
         snapshot_uri = None
         if self.is_media_service_supported:
-            logger.info(f"Try to GetSnapshotUri information..")
+            media_uri_cache = self.onvif_service.media_uri_cache
+            if use_cache:
+                cached_uri = media_uri_cache.get(GET_SNAPSHOT_URI,profile_token)
+                if cached_uri != None:
+                    self.logger.debug("GetSnapshotUri from cache : %s", cached_uri.Uri)
+                    return cached_uri
+            self.logger.info("Try to GetSnapshotUri information..")
             try:
-                zeepMediaClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_media = zeepMediaClient.create_service("{" + self.media_name_space + "}MediaBinding", self.xAddr)
+                ws_client_media = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.media_name_space + "}MediaBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 snapshot_uri = ws_client_media.GetSnapshotUri(ProfileToken=profile_token)
             except Exception as emsg:
-                logger.error(f"GetSnapshotUri unsuccess.. -> {emsg}")
+                self.logger.error("GetSnapshotUri unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetSnapshotUri complete with success..")
+                self.logger.info("GetSnapshotUri complete with success..")
+                media_uri_cache.put(GET_SNAPSHOT_URI,profile_token,None,snapshot_uri)
         return snapshot_uri
     
-    def DownloadSnapshot(self,snap_shot_uri : str,path = "download") -> bool:
+    def DownloadSnapshot(self,snap_shot_uri : str,path = "download",timeout = None,buffer = None) -> bool:
         """
         This download image from and URI to the given location path
+        The image is streamed in chunks over the pooled http session of the device (see OnvifService.get_snapshot_fetcher).
         - requirements:
             - snap_shot_uri -> Image URL
             - path -> Download location
+            - timeout [float or tuple] -> optional request timeout in seconds, the fetcher default is lib.snapshot_fetcher.SNAPSHOT_TIMEOUT
+            - buffer -> optional object with a write method, e.g. io.BytesIO, the image is written to it instead of a file
         - return;
             - status [boolean]
                 Download image status
         """
-        cam_auth=HTTPDigestAuth(self.onvif_service.username, self.onvif_service.password)
         download_status = False
-        image_location = f'{path}/{self.onvif_service.ip}_{datetime.datetime.now().strftime(f"%y%m%dT%H%M%S")}.jpg'
-        logger.info(f"Try to DownloadSnapshot image -> {image_location} ..")
+        image_location = buffer if buffer != None else f'{path}/{self.onvif_service.ip}_{datetime.datetime.now().strftime(f"%y%m%dT%H%M%S")}.jpg'
+        self.logger.info("Try to DownloadSnapshot image -> %s ..", image_location)
         try:
-            response = requests.get(snap_shot_uri.Uri, stream = True,auth=cam_auth,timeout=1)
-            if response.status_code == 200:
-                response.raw.decode_content = True
-                with open(image_location, 'wb') as outfile:
-                    outfile.write(response.content)
-            else:
-                logger.error(f"DownloadSnapshot image Request unsuccess -> {response.status_code} - {response.reason}")
+            size = self.onvif_service.get_snapshot_fetcher().fetch(snap_shot_uri.Uri,image_location,timeout = timeout)
+        except requests.HTTPError as emsg:
+            self.logger.error("DownloadSnapshot image Request unsuccess -> %s - %s", emsg.response.status_code, emsg.response.reason)
         except Exception as emsg:
-            logger.error(f"DownloadSnapshot image unsuccess.. -> {emsg}")
+            self.logger.error("DownloadSnapshot image unsuccess.. -> %s", emsg)
         else:
             download_status = True
-            logger.info(f"DownloadSnapshot image complete with success {image_location}")
+            self.logger.info("DownloadSnapshot image complete with success %s (%s bytes)", image_location, size)
         return download_status
 
     def GetVideoSourceConfigurations(self) -> list:
@@ -234,15 +222,14 @@ class MediaService:
         """
         videosource_configs = []
         if self.is_media_service_supported:
-            logger.info(f"Try to GetVideoSourceConfigurations information..")
+            self.logger.info("Try to GetVideoSourceConfigurations information..")
             try:
-                zeepMediaClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_media = zeepMediaClient.create_service("{" + self.media_name_space + "}MediaBinding", self.xAddr)
+                ws_client_media = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.media_name_space + "}MediaBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 videosource_configs = ws_client_media.GetVideoSourceConfigurations()
             except Exception as emsg:
-                logger.error(f"GetVideoSourceConfigurations unsuccess.. -> {emsg}")
+                self.logger.error("GetVideoSourceConfigurations unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetVideoSourceConfigurations complete with success..")
+                self.logger.info("GetVideoSourceConfigurations complete with success..")
         return videosource_configs
 
     def GetCompatibleVideoAnalyticsConfigurations(self,profile_token : str) -> list:
@@ -259,15 +246,14 @@ class MediaService:
         """
         configurations = []
         if self.is_media_service_supported:
-            logger.info(f"Try to GetCompatibleVideoAnalyticsConfigurations information..")
+            self.logger.info("Try to GetCompatibleVideoAnalyticsConfigurations information..")
             try:
-                zeepMediaClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_media = zeepMediaClient.create_service("{" + self.media_name_space + "}MediaBinding", self.xAddr)
+                ws_client_media = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.media_name_space + "}MediaBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 configurations = ws_client_media.GetCompatibleVideoAnalyticsConfigurations(ProfileToken  = profile_token)
             except Exception as emsg:
-                logger.error(f"GetCompatibleVideoAnalyticsConfigurations unsuccess.. -> {emsg}")
+                self.logger.error("GetCompatibleVideoAnalyticsConfigurations unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetCompatibleVideoAnalyticsConfigurations complete with success..")
+                self.logger.info("GetCompatibleVideoAnalyticsConfigurations complete with success..")
         return configurations
     
     def GetOSD(self,osd_token : str) -> dict:
@@ -282,16 +268,15 @@ class MediaService:
         """
         osd = {}
         if self.is_media_service_supported and self.media_capabilities.OSD:
-            logger.info(f"Try to GetOSD information..")
+            self.logger.info("Try to GetOSD information..")
             try:
-                zeepMediaClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_media = zeepMediaClient.create_service("{" + self.media_name_space + "}MediaBinding", self.xAddr)
+                ws_client_media = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.media_name_space + "}MediaBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 osd = ws_client_media.GetOSD(OSDToken = osd_token)
             except Exception as emsg:
-                logger.error(f"GetOSD unsuccess.. -> {emsg}")
+                self.logger.error("GetOSD unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetOSD complete with success..")
-        else: logger.warning(f"GetOSD is not supported !")
+                self.logger.info("GetOSD complete with success..")
+        else: self.logger.warning("GetOSD is not supported !")
         return osd
 
     def GetOSDs(self,configuration_token = None) -> dict:
@@ -305,16 +290,15 @@ class MediaService:
         """
         osds = []
         if self.is_media_service_supported and self.media_capabilities.OSD:
-            logger.info(f"Try to GetOSDs information..")
+            self.logger.info("Try to GetOSDs information..")
             try:
-                zeepMediaClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_media = zeepMediaClient.create_service("{" + self.media_name_space + "}MediaBinding",self.xAddr)
+                ws_client_media = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.media_name_space + "}MediaBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 osds = ws_client_media.GetOSDs(ConfigurationToken=configuration_token)
             except Exception as emsg:
-                logger.error(f"GetOSDs unsuccess.. -> {emsg}")
+                self.logger.error("GetOSDs unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetOSDs complete with success..")
-        else: logger.warning(f"GetOSDs is not supported !")
+                self.logger.info("GetOSDs complete with success..")
+        else: self.logger.warning("GetOSDs is not supported !")
         return osds
     
     def GetOSDOptions(self,configuration_token : str) -> dict:
@@ -328,16 +312,15 @@ class MediaService:
         """
         osd_options = {}
         if self.is_media_service_supported and self.media_capabilities.OSD:
-            logger.info(f"Try to GetOSDOptions information..")
+            self.logger.info("Try to GetOSDOptions information..")
             try:
-                zeepMediaClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_media = zeepMediaClient.create_service("{" + self.media_name_space + "}MediaBinding", self.xAddr)
+                ws_client_media = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.media_name_space + "}MediaBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 osd_options = ws_client_media.GetOSDOptions(ConfigurationToken=configuration_token)
             except Exception as emsg:
-                logger.error(f"GetOSDOptions unsuccess.. -> {emsg}")
+                self.logger.error("GetOSDOptions unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetOSDOptions complete with success..")
-        else: logger.warning(f"GetOSDOptions is not supported !")
+                self.logger.info("GetOSDOptions complete with success..")
+        else: self.logger.warning("GetOSDOptions is not supported !")
         return osd_options
     
     def DeleteOSD(self,osd_token : str) -> bool:
@@ -351,17 +334,16 @@ class MediaService:
         """
         delete_status = False
         if self.is_media_service_supported and self.media_capabilities.OSD:
-            logger.info(f"Try to DeleteOSD information..")
+            self.logger.info("Try to DeleteOSD information..")
             try:
-                zeepMediaClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_media = zeepMediaClient.create_service("{" + self.media_name_space + "}MediaBinding", self.xAddr)
+                ws_client_media = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.media_name_space + "}MediaBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 ws_client_media.DeleteOSD(OSDToken = osd_token)
             except Exception as emsg:
-                logger.error(f"DeleteOSD unsuccess.. -> {emsg}")
+                self.logger.error("DeleteOSD unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"DeleteOSD complete with success..")
+                self.logger.info("DeleteOSD complete with success..")
                 delete_status = True
-        else: logger.warning(f"DeleteOSD is not supported !")
+        else: self.logger.warning("DeleteOSD is not supported !")
         return delete_status
     
     def CreateOSD(self,request_message : MediaRequestMessages.CreateOSDMessage) -> str:
@@ -375,17 +357,16 @@ class MediaService:
         """
         osd_token = ""
         if self.is_media_service_supported and self.media_capabilities.OSD:
-            logger.info(f"Try to CreateOSD request..")
+            self.logger.info("Try to CreateOSD request..")
             try:
-                zeepMediaClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_media = zeepMediaClient.create_service("{" + self.media_name_space + "}MediaBinding", self.xAddr)
+                ws_client_media = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.media_name_space + "}MediaBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 osd_token_response = ws_client_media.CreateOSD(**request_message.to_dict())
                 osd_token = osd_token_response.OSDToken
             except Exception as emsg:
-                logger.error(f"CreateOSD unsuccess.. -> {emsg}")
+                self.logger.error("CreateOSD unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"CreateOSD complete with success..")
-                logger.info(f"Created OSD Token : {osd_token}")
-        else: logger.warning(f"CreateOSD is not supported !")
+                self.logger.info("CreateOSD complete with success..")
+                self.logger.info("Created OSD Token : %s", osd_token)
+        else: self.logger.warning("CreateOSD is not supported !")
         return osd_token
    
\ No newline at end of file
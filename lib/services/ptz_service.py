@@ -4,46 +4,24 @@ Created to control Onvif PTZ service properties.
 craeted by : enstns
 created time : 01.04.23
 """
-import logging
-
-from lib.onvif import OnvifService, get_caching_client
+from lib.onvif import OnvifService, get_service_proxy
 from lib.requests_messages.ptz_request_messages import PTZRequestMessages
 from lib.params.ptz_request_params import PTZEnumParams
+from lib.log_config import get_logger, get_device_logger
+from lib.service_index import ServiceIndex
 
-DEBUG = True
-LOG = False
-
-logger = logging.getLogger('ptz_service')
-logger.setLevel(logging.DEBUG)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = get_logger('ptz_service')
 
 PTZ_SERVICE_NS = "http://www.onvif.org/ver10/ptz/wsdl"
 
-if DEBUG:
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
-    ch.setFormatter(formatter)
-    logger.addHandler(ch)
-
-if LOG: 
-    log = logging.FileHandler(filename="log/onvif_service.log", mode='a', encoding=None, delay=False, errors=None)
-    log.setLevel(logging.DEBUG)
-    log.setFormatter(formatter)
-    logger.addHandler(log)
-
 def get_ptz_namespace(services = [],xaddr=""):
-    if services and services != None:
-        for serv in services:
-            ns = str(serv.Namespace)
-            if serv.XAddr == xaddr and "ptz" in ns:
-                return serv.Namespace
-    else:
-        return None
-        
+    return ServiceIndex(services).get_namespace(xaddr,"ptz") if services else None
+
 class PTZService:
     def __init__(self,onvif_service = OnvifService()) -> None:
         self.is_ptz_service_supported = False
         self.onvif_service = onvif_service
+        self.logger = get_device_logger(logger,onvif_service)
         self.wsdlUrl = self.onvif_service.wsdl_directory + "/ptz.wsdl"
         self.xAddr = "" 
         self.ptz_name_space = ""
@@ -55,11 +33,11 @@ class PTZService:
         if self.onvif_service.get_con_status() and self.onvif_service.capabilities.PTZ != None:
             self.is_ptz_service_supported = True
             self.xAddr = self.onvif_service.capabilities.PTZ.XAddr
-            self.ptz_name_space = get_ptz_namespace(services = self.onvif_service.services,xaddr = self.xAddr)
+            self.ptz_name_space = self.onvif_service.get_service_index().get_namespace(self.xAddr,"ptz")
             self.capabilities = self.GetServiceCapabilities()
             if self.onvif_service.get_first_profile() != None: self.profile_token = self.onvif_service.get_first_profile().token
         else:
-            logger.error(f"PTZ service not sported from {self.onvif_service.ip}")
+            self.logger.error("PTZ service not sported from %s", self.onvif_service.ip)
      
     def GetServiceCapabilities(self) -> dict:
         """
@@ -70,15 +48,13 @@ class PTZService:
         """
         service_cap = {}
         if self.is_ptz_service_supported:
-            logger.info(f"Try to GetServiceCapabilities information..")
+            self.logger.info("Try to GetServiceCapabilities information..")
             try:
-                zeepPTZClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_ptz = zeepPTZClient.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
-                service_cap = ws_client_ptz.GetServiceCapabilities()
+                service_cap = self.onvif_service.call_metadata_operation("GetServiceCapabilities",wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr)
             except Exception as emsg:
-                logger.error(f"GetServiceCapabilities unsuccess.. -> {emsg}")
+                self.logger.error("GetServiceCapabilities unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetServiceCapabilities complete with success..")
+                self.logger.info("GetServiceCapabilities complete with success..")
         return service_cap
 
     def GetConfigurations(self) -> list:
@@ -92,15 +68,14 @@ class PTZService:
         """
         configs = []
         if self.is_ptz_service_supported:
-            logger.info(f"Try to GetConfigurations information..")
+            self.logger.info("Try to GetConfigurations information..")
             try:
-                zeepPTZClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_ptz = zeepPTZClient.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 configs = ws_client_ptz.GetConfigurations()
             except Exception as emsg:
-                logger.error(f"GetConfigurations unsuccess.. -> {emsg}")
+                self.logger.error("GetConfigurations unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetConfigurations complete with success..")
+                self.logger.info("GetConfigurations complete with success..")
         return configs
 
     def GetConfiguration(self,ptz_configuration_token : str) -> dict:
@@ -117,15 +92,14 @@ class PTZService:
         """
         configs = {}
         if self.is_ptz_service_supported:
-            logger.info(f"Try to GetConfiguration information..")
+            self.logger.info("Try to GetConfiguration information..")
             try:
-                zeepPTZClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_ptz = zeepPTZClient.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 configs = ws_client_ptz.GetConfiguration(PTZConfigurationToken = ptz_configuration_token)
             except Exception as emsg:
-                logger.error(f"GetConfiguration unsuccess.. -> {emsg}")
+                self.logger.error("GetConfiguration unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetConfiguration complete with success..")
+                self.logger.info("GetConfiguration complete with success..")
         return configs
 
     def GetCompatibleConfigurations(self,profile_token : str) -> dict:
@@ -141,15 +115,14 @@ class PTZService:
         compatible_configs = {}
         if profile_token == None: profile_token = self.profile_token
         if self.is_ptz_service_supported:
-            logger.info(f"Try to GetCompatibleConfigurations information..")
+            self.logger.info("Try to GetCompatibleConfigurations information..")
             try:
-                zeepPTZClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_ptz = zeepPTZClient.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 compatible_configs = ws_client_ptz.GetCompatibleConfigurations(ProfileToken = profile_token)
             except Exception as emsg:
-                logger.error(f"GetCompatibleConfigurations unsuccess.. -> {emsg}")
+                self.logger.error("GetCompatibleConfigurations unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetCompatibleConfigurations complete with success..")
+                self.logger.info("GetCompatibleConfigurations complete with success..")
         return compatible_configs
 
     def GetNodes(self) -> list:
@@ -161,15 +134,14 @@ class PTZService:
         """
         nodes = []
         if self.is_ptz_service_supported:
-            logger.info(f"Try to GetNodes information..")
+            self.logger.info("Try to GetNodes information..")
             try:
-                zeepPTZClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_ptz = zeepPTZClient.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 nodes = ws_client_ptz.GetNodes()
             except Exception as emsg:
-                logger.error(f"GetNodes unsuccess.. -> {emsg}")
+                self.logger.error("GetNodes unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetNodes complete with success..")
+                self.logger.info("GetNodes complete with success..")
         return nodes
 
     def GetNode(self,node_token : str) -> list:
@@ -183,15 +155,14 @@ class PTZService:
         """
         node = {}
         if self.is_ptz_service_supported:
-            logger.info(f"Try to GetNode information..")
+            self.logger.info("Try to GetNode information..")
             try:
-                zeepPTZClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_ptz = zeepPTZClient.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 node = ws_client_ptz.GetNode(NodeToken = node_token)
             except Exception as emsg:
-                logger.error(f"GetNode unsuccess.. -> {emsg}")
+                self.logger.error("GetNode unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetNode complete with success..")
+                self.logger.info("GetNode complete with success..")
         return node
 
     def AbsoluteMove(self,request_message : PTZRequestMessages.AbsoluteMoveRequestMessage) -> bool:
@@ -206,19 +177,18 @@ class PTZService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to AbsoluteMove request..")
+            self.logger.info("Try to AbsoluteMove request..")
             if self.is_ptz_service_supported:
                 try:
-                    zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                    ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_ptz.AbsoluteMove(**request_message.to_dict())
                 except Exception as emsg:
-                    logger.error(f"AbsoluteMove unsuccess.. -> {emsg}")
+                    self.logger.error("AbsoluteMove unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"Move complete with success..")
+                    self.logger.info("Move complete with success..")
             else:
-                logger.error(f"PTZ Service not supported..")
+                self.logger.error("PTZ Service not supported..")
         return status
 
     def ContinuousMove(self,request_message : PTZRequestMessages.ContinuousMoveRequestMessage) -> bool:
@@ -232,19 +202,18 @@ class PTZService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to ContinuousMove request..")
+            self.logger.info("Try to ContinuousMove request..")
             if self.is_ptz_service_supported:
                 try:
-                    zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                    ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_ptz.ContinuousMove(**request_message.to_dict())
                 except Exception as emsg:
-                    logger.error(f"ContinuousMove unsuccess.. -> {emsg}")
+                    self.logger.error("ContinuousMove unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"ContinuousMove complete with success..")
+                    self.logger.info("ContinuousMove complete with success..")
             else:
-                logger.error(f"PTZ Service not supported..")
+                self.logger.error("PTZ Service not supported..")
         return status
 
     def GetPresets(self,profile_token  = None) -> list:
@@ -260,15 +229,14 @@ class PTZService:
         presets = []
         if profile_token == None: profile_token = self.profile_token
         if self.is_ptz_service_supported:
-            logger.info(f"Try to GetPresets information..")
+            self.logger.info("Try to GetPresets information..")
             try:
-                zeepPTZClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_ptz = zeepPTZClient.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 presets = ws_client_ptz.GetPresets(ProfileToken = profile_token)
             except Exception as emsg:
-                logger.error(f"GetPresets unsuccess.. -> {emsg}")
+                self.logger.error("GetPresets unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetPresets complete with success..")
+                self.logger.info("GetPresets complete with success..")
         return presets 
 
     def SetPreset(self,profile_token = None,preset_name = None,preset_token = None) -> dict:
@@ -296,15 +264,14 @@ class PTZService:
         if preset_name != None:
             request_params["PresetToken"] = preset_token
         if self.is_ptz_service_supported:
-            logger.info(f"Try to SetPreset information..")
+            self.logger.info("Try to SetPreset information..")
             try:
-                zeepPTZClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_ptz = zeepPTZClient.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 preset_token = ws_client_ptz.SetPreset(**request_params)
             except Exception as emsg:
-                logger.error(f"SetPreset unsuccess.. -> {emsg}")
+                self.logger.error("SetPreset unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"SetPreset complete with success..")
+                self.logger.info("SetPreset complete with success..")
         return preset_token
 
     def RemovePreset(self,preset_token : str,profile_token = None) -> bool:
@@ -321,19 +288,18 @@ class PTZService:
         status = False
         if profile_token == None: profile_token = self.profile_token
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to RemovePreset request..")
+            self.logger.info("Try to RemovePreset request..")
             if self.is_ptz_service_supported:
                 try:
-                    zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                    ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_ptz.RemovePreset(ProfileToken = profile_token,PresetToken = preset_token)
                 except Exception as emsg:
-                    logger.error(f"RemovePreset unsuccess.. -> {emsg}")
+                    self.logger.error("RemovePreset unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"RemovePreset complete with success..")
+                    self.logger.info("RemovePreset complete with success..")
             else:
-                logger.error(f"PTZ Service not supported..")
+                self.logger.error("PTZ Service not supported..")
         return status
 
     def GotoPreset(self,preset_token : str,speed = None,profile_token = None) -> bool:
@@ -356,19 +322,18 @@ class PTZService:
         request_params["PresetToken"] = preset_token
         if speed != None: request_params["Speed"] = speed
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to GotoPreset request..")
+            self.logger.info("Try to GotoPreset request..")
             if self.is_ptz_service_supported:
                 try:
-                    zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                    ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_ptz.GotoPreset(**request_params)
                 except Exception as emsg:
-                    logger.error(f"GotoPreset unsuccess.. -> {emsg}")
+                    self.logger.error("GotoPreset unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"GotoPreset complete with success..")
+                    self.logger.info("GotoPreset complete with success..")
             else:
-                logger.error(f"PTZ Service not supported..")
+                self.logger.error("PTZ Service not supported..")
         return status
 
     def SetHomePosition(self,profile_token = None) -> bool:
@@ -383,19 +348,18 @@ class PTZService:
         status = False
         if profile_token == None: profile_token = self.profile_token
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to SetHomePosition request..")
+            self.logger.info("Try to SetHomePosition request..")
             if self.is_ptz_service_supported:
                 try:
-                    zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                    ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_ptz.SetHomePosition(ProfileToken = profile_token)
                 except Exception as emsg:
-                    logger.error(f"SetHomePosition unsuccess.. -> {emsg}")
+                    self.logger.error("SetHomePosition unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"SetHomePosition complete with success..")
+                    self.logger.info("SetHomePosition complete with success..")
             else:
-                logger.error(f"PTZ Service not supported..")
+                self.logger.error("PTZ Service not supported..")
         return status
 
     def GotoHomePosition(self,speed = None,profile_token = None) -> bool:
@@ -419,19 +383,18 @@ class PTZService:
         request_params["ProfileToken"] = profile_token
         if speed != None: request_params["Speed"] = speed
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to GotoHomePosition request..")
+            self.logger.info("Try to GotoHomePosition request..")
             if self.is_ptz_service_supported:
                 try:
-                    zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                    ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_ptz.GotoHomePosition(**request_params)
                 except Exception as emsg:
-                    logger.error(f"GotoHomePosition unsuccess.. -> {emsg}")
+                    self.logger.error("GotoHomePosition unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"GotoHomePosition complete with success..")
+                    self.logger.info("GotoHomePosition complete with success..")
             else:
-                logger.error(f"PTZ Service not supported..")
+                self.logger.error("PTZ Service not supported..")
         return status
 
     def GetPresetTours(self,profile_token  = None) -> list:
@@ -447,15 +410,14 @@ class PTZService:
         preset_tours = []
         if profile_token == None: profile_token = self.profile_token
         if self.is_ptz_service_supported:
-            logger.info(f"Try to GetPresetTours information..")
+            self.logger.info("Try to GetPresetTours information..")
             try:
-                zeepPTZClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_ptz = zeepPTZClient.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 preset_tours = ws_client_ptz.GetPresetTours(ProfileToken = profile_token)
             except Exception as emsg:
-                logger.error(f"GetPresetTours unsuccess.. -> {emsg}")
+                self.logger.error("GetPresetTours unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetPresetTours complete with success..")
+                self.logger.info("GetPresetTours complete with success..")
         return preset_tours
     
     def GetPresetTour(self,preset_tour_token : str,profile_token = None) -> dict:
@@ -471,15 +433,14 @@ class PTZService:
         preset_tour = {}
         if profile_token == None: profile_token = self.profile_token
         if self.is_ptz_service_supported:
-            logger.info(f"Try to GetPresetTour information..")
+            self.logger.info("Try to GetPresetTour information..")
             try:
-                zeepPTZClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_ptz = zeepPTZClient.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 preset_tour = ws_client_ptz.GetPresetTour(ProfileToken = profile_token,PresetTourToken = preset_tour_token)
             except Exception as emsg:
-                logger.error(f"GetPresetTour unsuccess.. -> {emsg}")
+                self.logger.error("GetPresetTour unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetPresetTour complete with success..")
+                self.logger.info("GetPresetTour complete with success..")
         return preset_tour
     
     def GetPresetTourOptions(self,preset_tour_token : str,profile_token = None) -> list:
@@ -495,15 +456,14 @@ class PTZService:
         preset_tour_options = {}
         if profile_token == None: profile_token = self.profile_token
         if self.is_ptz_service_supported:
-            logger.info(f"Try to GetPresetTourOptions information..")
+            self.logger.info("Try to GetPresetTourOptions information..")
             try:
-                zeepPTZClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_ptz = zeepPTZClient.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 preset_tour_options = ws_client_ptz.GetPresetTourOptions(ProfileToken = profile_token,PresetTourToken = preset_tour_token)
             except Exception as emsg:
-                logger.error(f"GetPresetTourOptions unsuccess.. -> {emsg}")
+                self.logger.error("GetPresetTourOptions unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetPresetTourOptions complete with success..")
+                self.logger.info("GetPresetTourOptions complete with success..")
         return preset_tour_options
 
     def CreatePresetTour(self,profile_token = None) -> dict:
@@ -519,15 +479,14 @@ class PTZService:
         preset_tour_token = None
         if profile_token == None: profile_token = self.profile_token
         if self.is_ptz_service_supported:
-            logger.info(f"Try to CreatePresetTour information..")
+            self.logger.info("Try to CreatePresetTour information..")
             try:
-                zeepPTZClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_ptz = zeepPTZClient.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 preset_tour_token = ws_client_ptz.CreatePresetTour(ProfileToken = profile_token)
             except Exception as emsg:
-                logger.error(f"CreatePresetTour unsuccess.. -> {emsg}")
+                self.logger.error("CreatePresetTour unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"CreatePresetTour complete with success..")
+                self.logger.info("CreatePresetTour complete with success..")
         return preset_tour_token
 
     def ModifyPresetTour(self,request_message : PTZRequestMessages.ModifyPresetTourRequestMessage) -> bool:
@@ -540,19 +499,18 @@ class PTZService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to ModifyPresetTour request..")
+            self.logger.info("Try to ModifyPresetTour request..")
             if self.is_ptz_service_supported:
                 try:
-                    zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                    ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_ptz.ModifyPresetTour(**request_message.to_dict())
                 except Exception as emsg:
-                    logger.error(f"ModifyPresetTour unsuccess.. -> {emsg}")
+                    self.logger.error("ModifyPresetTour unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"ModifyPresetTour complete with success..")
+                    self.logger.info("ModifyPresetTour complete with success..")
             else:
-                logger.error(f"PTZ Service not supported..")
+                self.logger.error("PTZ Service not supported..")
         return status
 
     def RemovePresetTour(self,preset_tour_token : str,profile_token = None) -> bool:
@@ -569,19 +527,18 @@ class PTZService:
         status = False
         if profile_token == None: profile_token = self.profile_token
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to RemovePresetTour request..")
+            self.logger.info("Try to RemovePresetTour request..")
             if self.is_ptz_service_supported:
                 try:
-                    zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                    ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_ptz.RemovePresetTour(ProfileToken = profile_token,PresetTourToken = preset_tour_token)
                 except Exception as emsg:
-                    logger.error(f"RemovePresetTour unsuccess.. -> {emsg}")
+                    self.logger.error("RemovePresetTour unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"RemovePresetTour complete with success..")
+                    self.logger.info("RemovePresetTour complete with success..")
             else:
-                logger.error(f"PTZ Service not supported..")
+                self.logger.error("PTZ Service not supported..")
         return status
 
     def OperatePresetTour(self,preset_tour_token : str,operation : PTZEnumParams.PTZPresetTourOperation,profile_token = None) -> bool:
@@ -599,19 +556,18 @@ class PTZService:
         status = False
         if profile_token == None: profile_token = self.profile_token
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to OperatePresetTour request..")
+            self.logger.info("Try to OperatePresetTour request..")
             if self.is_ptz_service_supported:
                 try:
-                    zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                    ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_ptz.OperatePresetTour(ProfileToken = profile_token,PresetTourToken = preset_tour_token,Opetation = operation)
                 except Exception as emsg:
-                    logger.error(f"OperatePresetTour unsuccess.. -> {emsg}")
+                    self.logger.error("OperatePresetTour unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"OperatePresetTour complete with success..")
+                    self.logger.info("OperatePresetTour complete with success..")
             else:
-                logger.error(f"PTZ Service not supported..")
+                self.logger.error("PTZ Service not supported..")
         return status
 
     def Stop(self,profile_token = None,pantilt = False,zoom = False) -> bool:
@@ -631,19 +587,18 @@ class PTZService:
         status = False
         if profile_token == None: profile_token = self.profile_token
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to Stop request..")
+            self.logger.info("Try to Stop request..")
             if self.is_ptz_service_supported:
                 try:
-                    zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                    ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_ptz.Stop(ProfileToken = profile_token,PanTilt = pantilt,Zoom = zoom)
                 except Exception as emsg:
-                    logger.error(f"Stop unsuccess.. -> {emsg}")
+                    self.logger.error("Stop unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"Stop complete with success..")
+                    self.logger.info("Stop complete with success..")
             else:
-                logger.error(f"PTZ Service not supported..")
+                self.logger.error("PTZ Service not supported..")
         return status
 
     def SendAuxiliaryCommand(self,auxilary_data : str,profile_token = None) -> dict:
@@ -661,15 +616,14 @@ class PTZService:
         auxiliary_response = {}
         if profile_token == None: profile_token = self.profile_token
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to SendAuxiliaryCommand request..")
+            self.logger.info("Try to SendAuxiliaryCommand request..")
             try:
-                zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 auxiliary_response = ws_client_ptz.SendAuxiliaryCommand(ProfileToken = profile_token,AuxiliaryData = auxilary_data)
             except Exception as emsg:
-                logger.error(f"SendAuxiliaryCommand unsuccess.. -> {emsg}")
+                self.logger.error("SendAuxiliaryCommand unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"SendAuxiliaryCommand complete with success..")
+                self.logger.info("SendAuxiliaryCommand complete with success..")
         return auxiliary_response
 
     def RelativeMove(self,request_message : PTZRequestMessages.RelativeMoveRequestMessage) -> bool:
@@ -682,19 +636,18 @@ class PTZService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to RelativeMove request..")
+            self.logger.info("Try to RelativeMove request..")
             if self.is_ptz_service_supported:
                 try:
-                    zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                    ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_ptz.RelativeMove(**request_message.to_dict())
                 except Exception as emsg:
-                    logger.error(f"RelativeMove unsuccess.. -> {emsg}")
+                    self.logger.error("RelativeMove unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"RelativeMove complete with success..")
+                    self.logger.info("RelativeMove complete with success..")
             else:
-                logger.error(f"PTZ Service not supported..")
+                self.logger.error("PTZ Service not supported..")
         return status
 
     def GetStatus(self,profile_token = None) -> dict:
@@ -710,15 +663,14 @@ class PTZService:
         status = {}
         if profile_token == None: profile_token = self.profile_token
         if self.is_ptz_service_supported:
-            logger.info(f"Try to GetStatus information..")
+            self.logger.info("Try to GetStatus information..")
             try:
-                zeepPTZClient = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                ws_client_ptz = zeepPTZClient.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                 status = ws_client_ptz.GetStatus(ProfileToken = profile_token)
             except Exception as emsg:
-                logger.error(f"GetStatus unsuccess.. -> {emsg}")
+                self.logger.error("GetStatus unsuccess.. -> %s", emsg)
             else:
-                logger.info(f"GetStatus complete with success..")
+                self.logger.info("GetStatus complete with success..")
         return status
 
     def GeoMove(self,request_message : PTZRequestMessages.GeoMoveRequestMessage) -> bool:
@@ -732,19 +684,18 @@ class PTZService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to GeoMove request..")
+            self.logger.info("Try to GeoMove request..")
             if self.is_ptz_service_supported:
                 try:
-                    zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                    ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_ptz.GeoMove(**request_message.to_dict())
                 except Exception as emsg:
-                    logger.error(f"GeoMove unsuccess.. -> {emsg}")
+                    self.logger.error("GeoMove unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"GeoMove complete with success..")
+                    self.logger.info("GeoMove complete with success..")
             else:
-                logger.error(f"PTZ Service not supported..")
+                self.logger.error("PTZ Service not supported..")
         return status
     
     def MoveAndStartTracking(self,request_message : PTZRequestMessages.MoveAndStartTrackingRequestMessage) -> bool:
@@ -758,19 +709,18 @@ class PTZService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to MoveAndStartTracking request..")
+            self.logger.info("Try to MoveAndStartTracking request..")
             if self.is_ptz_service_supported:
                 try:
-                    zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                    ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_ptz.MoveAndStartTracking(**request_message.to_dict())
                 except Exception as emsg:
-                    logger.error(f"MoveAndStartTracking unsuccess.. -> {emsg}")
+                    self.logger.error("MoveAndStartTracking unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"MoveAndStartTracking complete with success..")
+                    self.logger.info("MoveAndStartTracking complete with success..")
             else:
-                logger.error(f"PTZ Service not supported..")
+                self.logger.error("PTZ Service not supported..")
         return status
     
     def SetConfiguration(self,request_message : PTZRequestMessages.SetConfigurationRequestMessage) -> bool:
@@ -784,17 +734,16 @@ class PTZService:
         """
         status = False
         if self.onvif_service.get_con_status():
-            logger.info(f"Try to SetConfiguration request..")
+            self.logger.info("Try to SetConfiguration request..")
             if self.is_ptz_service_supported:
                 try:
-                    zeep_ptz_client = get_caching_client(isAuth=True,wsdl_URL=self.wsdlUrl,username_token=self.onvif_service.get_username_token())
-                    ws_client_ptz = zeep_ptz_client.create_service("{" + self.ptz_name_space + "}PTZBinding", self.xAddr)
+                    ws_client_ptz = get_service_proxy(wsdl_URL=self.wsdlUrl,binding="{" + self.ptz_name_space + "}PTZBinding",xaddr=self.xAddr,username_token=self.onvif_service.get_username_token())
                     ws_client_ptz.SetConfiguration(**request_message.to_dict())
                 except Exception as emsg:
-                    logger.error(f"SetConfiguration unsuccess.. -> {emsg}")
+                    self.logger.error("SetConfiguration unsuccess.. -> %s", emsg)
                 else:
                     status = True
-                    logger.info(f"SetConfiguration complete with success..")
+                    self.logger.info("SetConfiguration complete with success..")
             else:
-                logger.error(f"PTZ Service not supported..")
+                self.logger.error("PTZ Service not supported..")
         return status
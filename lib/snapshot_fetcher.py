@@ -0,0 +1,105 @@
+"""
+Created to download snapshot images of a device over pooled http connections with a bounded memory footprint.
+
+    snapshot_fetcher = onvif_device.get_snapshot_fetcher()
+    snapshot_fetcher.fetch(snapshot_uri.Uri,"download/camera.jpg")
+    image = io.BytesIO()
+    snapshot_fetcher.fetch(snapshot_uri.Uri,image)
+
+The image is written chunk by chunk, so only one chunk of it is in memory. The digest challenge of the device is kept by the
+auth object of the fetcher, the following requests of a thread are signed without an other 401 round trip.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPDigestAuth
+
+SNAPSHOT_TIMEOUT = 5
+SNAPSHOT_CHUNK_SIZE = 64 * 1024
+# kept connections per device, e.g. for concurrent snapshots of two profiles
+SNAPSHOT_POOL_SIZE = 2
+# larger responses are not snapshots, they are cut off instead of filling the memory or the disk
+SNAPSHOT_MAX_BYTES = 16 * 1024 * 1024
+
+class SnapshotTooLarge(Exception):
+    pass
+
+class SnapshotFetcher:
+    def __init__(self,username : str,password : str,pool_size = SNAPSHOT_POOL_SIZE,timeout = SNAPSHOT_TIMEOUT,chunk_size = SNAPSHOT_CHUNK_SIZE,max_bytes = SNAPSHOT_MAX_BYTES) -> None:
+        """
+        Keep-alive http session of one device for its snapshot uris.
+        - requirements:
+            - username, password [str] : http digest credentials of the device
+            - pool_size [int] : kept connections per host
+            - timeout [float or tuple] : seconds, or (connect, read) seconds, of a request
+            - chunk_size [int] : bytes read and written at once
+            - max_bytes [int] : a larger image is not written, fetch raises SnapshotTooLarge
+        """
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections = 1,pool_maxsize = pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # requests keeps the nonce and the nonce count of the last challenge per thread in the auth object
+        self.session.auth = HTTPDigestAuth(username, password)
+        self.lock = threading.Lock()
+        self.fetch_count = 0
+        self.byte_count = 0
+
+    def fetch(self,uri : str,destination,timeout = None) -> int:
+        """
+        Downloads the image of the uri.
+        - requirements:
+            - uri [str] : snapshot uri, e.g. GetSnapshotUri().Uri
+            - destination [str or writable] : file path, the image is written to path.part and renamed when it is complete,
+              or an object with a write method like io.BytesIO or an open file
+            - timeout [float or tuple] : optional, overrides the timeout of the fetcher
+        - return:
+            - size [int] : bytes of the image
+        - raises:
+            - requests.RequestException on connection errors and http error status, SnapshotTooLarge
+        """
+        with self.session.get(uri, stream = True, timeout = timeout or self.timeout) as response:
+            response.raise_for_status()
+            content_length = response.headers.get("Content-Length")
+            if content_length != None and content_length.isdigit() and int(content_length) > self.max_bytes:
+                raise SnapshotTooLarge(f"Snapshot of {content_length} bytes is larger than {self.max_bytes} bytes")
+            if isinstance(destination, (str, os.PathLike)):
+                part_path = f"{destination}.part"
+                try:
+                    with open(part_path, "wb") as outfile:
+                        size = self.write_chunks(response, outfile)
+                    os.replace(part_path, destination)
+                except BaseException:
+                    if os.path.exists(part_path): os.remove(part_path)
+                    raise
+            else:
+                size = self.write_chunks(response, destination)
+        with self.lock:
+            self.fetch_count += 1
+            self.byte_count += size
+        return size
+
+    def write_chunks(self,response,outfile) -> int:
+        size = 0
+        for chunk in response.iter_content(chunk_size = self.chunk_size):
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise SnapshotTooLarge(f"Snapshot is larger than {self.max_bytes} bytes")
+            outfile.write(chunk)
+        return size
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {"fetch": self.fetch_count, "bytes": self.byte_count}
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,87 @@
+"""
+Created to sign Onvif requests with a WS-Security UsernameToken digest in device time.
+
+The device time is kept as a monotonic clock offset from the last GetSystemDateAndTime, so a token is only
+a nonce and one SHA-1 away. The token flags itself for a re-sync when the device answers with an
+authentication or time skew fault.
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import base64
+import datetime
+import hashlib
+import os
+import time
+from zeep.wsse import utils
+from zeep.wsse.username import UsernameToken
+
+SOAP_FAULT_PATHS = ("{http://www.w3.org/2003/05/soap-envelope}Body/{http://www.w3.org/2003/05/soap-envelope}Fault",
+                    "{http://schemas.xmlsoap.org/soap/envelope/}Body/{http://schemas.xmlsoap.org/soap/envelope/}Fault")
+SOAP12_CODE_TAG = "{http://www.w3.org/2003/05/soap-envelope}Code"
+SOAP12_VALUE_TAG = "{http://www.w3.org/2003/05/soap-envelope}Value"
+# local names of the fault subcodes devices answer for a wrong digest or a created time out of their window,
+# ter:NotAuthorized of onvif, wsse:FailedAuthentication and wsu:MessageExpired of WS-Security
+RESYNC_FAULT_CODES = ("NotAuthorized", "FailedAuthentication", "MessageExpired")
+
+def get_fault_codes(fault_node) -> list:
+    """
+    Returns the local names of the Code and Subcode values (SOAP 1.2) or of the faultcode (SOAP 1.1) of a fault,
+    e.g. ["Sender", "NotAuthorized"] for env:Sender / ter:NotAuthorized.
+    """
+    code_node = fault_node.find(SOAP12_CODE_TAG)
+    values = code_node.iter(SOAP12_VALUE_TAG) if code_node != None else fault_node.iter("faultcode")
+    return [(value.text or "").strip().rpartition(":")[2] for value in values]
+
+class DeviceUsernameToken(UsernameToken):
+    """
+    UsernameToken of a device, it is attached once to the clients of the device as their wsse.
+    """
+    def __init__(self,username : str,password : str) -> None:
+        super().__init__(username = username,password = password,use_digest = True,zulu_timestamp = True)
+        self.password_bytes = password.encode("utf-8")
+        # device utc time at the monotonic reference, local utc time until the first sync
+        self.device_time_reference = datetime.datetime.utcnow()
+        self.monotonic_reference = time.monotonic()
+        self.is_synced = False
+        self.needs_sync = False
+
+    def sync(self,device_time : datetime.datetime) -> None:
+        """
+        Sets the device utc time of now, e.g. from GetSystemDateAndTime.
+        """
+        self.device_time_reference = device_time
+        self.monotonic_reference = time.monotonic()
+        self.is_synced = True
+        self.needs_sync = False
+
+    def get_device_time(self) -> datetime.datetime:
+        return self.device_time_reference + datetime.timedelta(seconds = time.monotonic() - self.monotonic_reference)
+
+    def get_device_time_offset(self) -> float:
+        """
+        Returns the device time minus the local utc time in seconds.
+        """
+        return (self.get_device_time() - datetime.datetime.utcnow()).total_seconds()
+
+    def _create_password_digest(self) -> list:
+        nonce = os.urandom(16)
+        created = self.get_device_time().strftime("%Y-%m-%dT%H:%M:%SZ")
+        digest = base64.b64encode(hashlib.sha1(nonce + created.encode("ascii") + self.password_bytes).digest()).decode("ascii")
+        return [
+            utils.WSSE.Password(digest, Type = "%s#PasswordDigest" % self.username_token_profile_ns),
+            utils.WSSE.Nonce(base64.b64encode(nonce).decode("ascii"), EncodingType = "%s#Base64Binary" % self.soap_message_secutity_ns),
+            utils.WSU.Created(created),
+        ]
+
+    def verify(self,envelope) -> None:
+        """
+        Called by zeep for every response, flags the token for a re-sync on authentication or time skew faults.
+        Only the fault codes are compared, the reason of e.g. an expired subscription does not trigger a re-sync.
+        """
+        for path in SOAP_FAULT_PATHS:
+            fault_node = envelope.find(path)
+            if fault_node != None:
+                if any(code in RESYNC_FAULT_CODES for code in get_fault_codes(fault_node)):
+                    self.needs_sync = True
+                return
@@ -0,0 +1,192 @@
+"""
+Created to store parsed WSDL/XSD documents of a wsdl directory in a precompiled snapshot file.
+
+Short-lived workers load the snapshot instead of parsing several megabytes of xml on cold start.
+The snapshot is invalidated when any file of the wsdl directory, zeep or python changes.
+
+    python -m lib.wsdl_snapshot wsdl
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import copyreg
+import gc
+import hashlib
+import io
+import os
+import pickle
+import platform
+import sys
+import zeep
+from lxml import etree
+from zeep.settings import Settings
+from zeep.transports import Transport
+from zeep.wsdl import Document
+from lib.log_config import get_logger
+
+logger = get_logger('wsdl_snapshot')
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_FILENAME = "wsdl.snapshot"
+# zeep builds xsd classes at parse time, they are not importable so they are rebuilt on load
+DYNAMIC_MODULES = ("zeep.xsd.dynamic_types", "zeep.objects")
+
+def _create_dynamic_type(name : str,bases : tuple,attributes : dict) -> type:
+    return type(name, bases, attributes)
+
+def _create_element(xml : bytes):
+    return etree.fromstring(xml)
+
+class SnapshotPickler(pickle.Pickler):
+    dispatch_table = copyreg.dispatch_table.copy()
+    dispatch_table[etree.QName] = lambda qname: (etree.QName, (qname.text,))
+    dispatch_table[etree._Element] = lambda element: (_create_element, (etree.tostring(element),))
+
+    def persistent_id(self, obj):
+        # settings and transports belong to the loading process
+        if isinstance(obj, Settings): return "settings"
+        if isinstance(obj, Transport): return "transport"
+        return None
+
+    def reducer_override(self, obj):
+        if isinstance(obj, type) and obj.__module__ in DYNAMIC_MODULES:
+            attributes = {key: value for key, value in vars(obj).items() if key not in ("__dict__", "__weakref__", "__doc__")}
+            return (_create_dynamic_type, (obj.__name__, obj.__bases__, attributes))
+        if type(obj).__name__ in ("odict_values", "odict_keys", "dict_values", "dict_keys"):
+            return (list, (list(obj),))
+        return NotImplemented
+
+class SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file, settings : Settings) -> None:
+        super().__init__(file)
+        self.settings = settings
+
+    def persistent_load(self, pid):
+        if pid == "settings": return self.settings
+        if pid == "transport": return Transport()
+        raise pickle.UnpicklingError(f"unsupported persistent id : {pid}")
+
+def get_snapshot_path(wsdl_directory = "wsdl") -> str:
+    return os.path.join(wsdl_directory, SNAPSHOT_FILENAME)
+
+def get_wsdl_directory_hash(wsdl_directory = "wsdl") -> str:
+    """
+    Returns the sha256 content hash of every file in the wsdl directory together with the zeep and python versions.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{SNAPSHOT_VERSION}/{zeep.__version__}/{platform.python_version()}".encode())
+    for root, dirs, files in os.walk(wsdl_directory):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename == SNAPSHOT_FILENAME: continue
+            path = os.path.join(root, filename)
+            digest.update(os.path.relpath(path, wsdl_directory).replace(os.sep, "/").encode())
+            with open(path, 'rb') as infile:
+                digest.update(infile.read())
+    return digest.hexdigest()
+
+def get_settings_key(settings : Settings) -> tuple:
+    return (settings.strict, settings.xml_huge_tree)
+
+def build_wsdl_snapshot(wsdl_directory = "wsdl",settings = None,snapshot_path = None) -> bool:
+    """
+    Parses every wsdl file in the wsdl directory and writes them to the snapshot file.
+    - requirements:
+        - wsdl_directory [str] : wsdl directory, e.g. "wsdl"
+        - settings [Settings] : zeep settings used while parsing, defaults to lib.onvif.SETTINGS
+        - snapshot_path [str] : optional, defaults to <wsdl_directory>/wsdl.snapshot
+    - return:
+        - status [boolean] : True means OK else False
+    """
+    if settings == None:
+        from lib.onvif import SETTINGS
+        settings = SETTINGS
+    if snapshot_path == None: snapshot_path = get_snapshot_path(wsdl_directory)
+    status = False
+    logger.info("Try to build wsdl snapshot for %s ..", wsdl_directory)
+    try:
+        # every document is pickled on its own, so a worker only unpickles the services it uses
+        documents = {}
+        for filename in sorted(os.listdir(wsdl_directory)):
+            if filename.endswith(".wsdl"):
+                document = Document(os.path.abspath(os.path.join(wsdl_directory, filename)), Transport(), settings=settings)
+                document_buffer = io.BytesIO()
+                SnapshotPickler(document_buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(document)
+                documents[filename] = document_buffer.getvalue()
+        buffer = io.BytesIO()
+        header = {"version": SNAPSHOT_VERSION, "hash": get_wsdl_directory_hash(wsdl_directory), "settings": get_settings_key(settings)}
+        pickle.dump(header, buffer, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(documents, buffer, protocol=pickle.HIGHEST_PROTOCOL)
+        temp_path = snapshot_path + ".tmp"
+        with open(temp_path, 'wb') as outfile:
+            outfile.write(buffer.getvalue())
+        os.replace(temp_path, snapshot_path)
+    except Exception as emsg:
+        logger.error("Build wsdl snapshot unsuccess.. -> %s", emsg)
+    else:
+        status = True
+        logger.info("Build wsdl snapshot complete with success %s (%s documents)", snapshot_path, len(documents))
+    return status
+
+def load_wsdl_snapshot(wsdl_directory = "wsdl",settings = None,snapshot_path = None) -> dict:
+    """
+    Loads the pickled documents of the wsdl directory from the snapshot file, use load_snapshot_document to unpickle one of them.
+    The snapshot is only used if it was built by the same snapshot/zeep/python versions, with the same parse settings and the
+    same wsdl directory content, otherwise an empty dict is returned and the documents should be parsed from xml.
+    Snapshot files are pickles, only load snapshots built by this process owner.
+    - requirements:
+        - wsdl_directory [str] : wsdl directory, e.g. "wsdl"
+        - settings [Settings] : zeep settings the documents will be used with
+        - snapshot_path [str] : optional, defaults to <wsdl_directory>/wsdl.snapshot
+    - return:
+        - documents [dict] : absolute wsdl path -> pickled zeep Document [bytes]
+    """
+    if settings == None:
+        from lib.onvif import SETTINGS
+        settings = SETTINGS
+    if snapshot_path == None: snapshot_path = get_snapshot_path(wsdl_directory)
+    documents = {}
+    if not os.path.isfile(snapshot_path):
+        return documents
+    try:
+        with open(snapshot_path, 'rb') as infile:
+            header = pickle.load(infile)
+            if header.get("version") != SNAPSHOT_VERSION or header.get("settings") != get_settings_key(settings):
+                logger.warning("Wsdl snapshot %s was built with other settings, ignored..", snapshot_path)
+            elif header.get("hash") != get_wsdl_directory_hash(wsdl_directory):
+                logger.warning("Wsdl snapshot %s is out of date, ignored..", snapshot_path)
+            else:
+                for filename, document in pickle.load(infile).items():
+                    documents[os.path.abspath(os.path.join(wsdl_directory, filename))] = document
+    except Exception as emsg:
+        logger.error("Load wsdl snapshot unsuccess.. -> %s", emsg)
+        documents = {}
+    else:
+        if documents: logger.info("Load wsdl snapshot complete with success %s", snapshot_path)
+    return documents
+
+def load_snapshot_document(pickled_document : bytes,settings = None) -> Document:
+    """
+    Unpickles one document returned by load_wsdl_snapshot.
+    - return:
+        - Document or None if the document can not be unpickled
+    """
+    if settings == None:
+        from lib.onvif import SETTINGS
+        settings = SETTINGS
+    document = None
+    # the document graph only holds live objects, collecting while it is rebuilt is wasted time
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        document = SnapshotUnpickler(io.BytesIO(pickled_document), settings).load()
+    except Exception as emsg:
+        logger.error("Load snapshot document unsuccess.. -> %s", emsg)
+    finally:
+        if gc_enabled: gc.enable()
+    return document
+
+if __name__ == "__main__":
+    # build from the importable module so the pickled helpers resolve to lib.wsdl_snapshot
+    from lib.wsdl_snapshot import build_wsdl_snapshot
+    sys.exit(0 if build_wsdl_snapshot(wsdl_directory = sys.argv[1] if len(sys.argv) > 1 else "wsdl") else 1)
@@ -0,0 +1,495 @@
+"""
+Created to simulate Onvif cameras locally for load and latency tests, no camera is needed.
+
+Every simulated camera listens on its own address and answers the Device, Media, PTZ, Imaging, Events (PullPoint)
+and Analytics requests of the bundled wsdl bindings with a configurable latency, jitter, fault rate and event rate.
+All cameras of a process are served by one asyncio event loop thread.
+
+    simulator = OnvifSimulator()
+    cameras = simulator.start(camera_count = 100,latency = 0.02,jitter = 0.005,fault_rate = 0.01,event_rate = 2.0)
+    fleet = FleetManager(devices = simulator.get_devices())
+    ...
+    simulator.stop()
+
+    python simulator/onvif_simulator.py --cameras 100 --latency 0.02 --event-rate 2
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import random
+import re
+import threading
+import time
+from lxml import etree
+
+SOAP_ENV_NS = "http://www.w3.org/2003/05/soap-envelope"
+TT_NS = "http://www.onvif.org/ver10/schema"
+TDS_NS = "http://www.onvif.org/ver10/device/wsdl"
+TRT_NS = "http://www.onvif.org/ver10/media/wsdl"
+TPTZ_NS = "http://www.onvif.org/ver20/ptz/wsdl"
+TIMG_NS = "http://www.onvif.org/ver20/imaging/wsdl"
+TEV_NS = "http://www.onvif.org/ver10/events/wsdl"
+TAN_NS = "http://www.onvif.org/ver20/analytics/wsdl"
+WSNT_NS = "http://docs.oasis-open.org/wsn/b-2"
+WSTOP_NS = "http://docs.oasis-open.org/wsn/t-1"
+WSA_NS = "http://www.w3.org/2005/08/addressing"
+TNS1_NS = "http://www.onvif.org/ver10/topics"
+NAMESPACES = f'xmlns:s="{SOAP_ENV_NS}" xmlns:tt="{TT_NS}" xmlns:tds="{TDS_NS}" xmlns:trt="{TRT_NS}" xmlns:tptz="{TPTZ_NS}" xmlns:timg="{TIMG_NS}" ' \
+             f'xmlns:tev="{TEV_NS}" xmlns:tan="{TAN_NS}" xmlns:wsnt="{WSNT_NS}" xmlns:wstop="{WSTOP_NS}" xmlns:wsa="{WSA_NS}" xmlns:tns1="{TNS1_NS}"'
+
+# service path -> (namespace, major version) of GetServices
+SERVICES = {
+    "device_service": (TDS_NS, 2),
+    "media_service": (TRT_NS, 2),
+    "ptz_service": (TPTZ_NS, 2),
+    "imaging_service": (TIMG_NS, 2),
+    "events_service": (TEV_NS, 2),
+    "analytics_service": (TAN_NS, 2),
+}
+
+# topic, source item name, data item name of the generated events
+EVENT_TOPICS = (
+    ("tns1:RuleEngine/CellMotionDetector/Motion", "VideoSourceConfigurationToken", "IsMotion"),
+    ("tns1:VideoSource/MotionAlarm", "Source", "State"),
+    ("tns1:Device/Trigger/DigitalInput", "InputToken", "LogicalState"),
+)
+
+MAX_PULL_TIMEOUT = 60.0
+PROFILE_TOKENS = ("Profile_1", "Profile_2")
+
+DURATION_PATTERN = re.compile(r"^PT(?:(?P<hours>\d+(?:\.\d+)?)H)?(?:(?P<minutes>\d+(?:\.\d+)?)M)?(?:(?P<seconds>\d+(?:\.\d+)?)S)?$")
+
+def parse_duration(duration : str,default : float) -> float:
+    match = DURATION_PATTERN.match((duration or "").strip())
+    if match == None: return default
+    values = {name: float(value) if value else 0.0 for name, value in match.groupdict().items()}
+    return values["hours"] * 3600 + values["minutes"] * 60 + values["seconds"]
+
+def format_time(timestamp : float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+def envelope(body : str) -> bytes:
+    return f'<?xml version="1.0" encoding="UTF-8"?><s:Envelope {NAMESPACES}><s:Body>{body}</s:Body></s:Envelope>'.encode("utf-8")
+
+def fault(subcode : str,reason : str) -> bytes:
+    return envelope(f'<s:Fault><s:Code><s:Value>s:Receiver</s:Value><s:Subcode><s:Value xmlns:ter="http://www.onvif.org/ver10/error">{subcode}</s:Value></s:Subcode></s:Code>'
+                    f'<s:Reason><s:Text xml:lang="en">{reason}</s:Text></s:Reason></s:Fault>')
+
+def get_topic_set() -> str:
+    """
+    Returns the wstop:TopicSet of EVENT_TOPICS.
+    """
+    tree = {}
+    for topic, source_name, data_name in EVENT_TOPICS:
+        node = tree
+        prefix = topic.partition(":")[0]
+        for segment in topic.split("/"):
+            node = node.setdefault(segment if ":" in segment else f"{prefix}:{segment}", {})
+        node[None] = (source_name, data_name)
+    def render(node : dict) -> str:
+        xml = ""
+        for segment, child in node.items():
+            if segment == None: continue
+            if None in child:
+                source_name, data_name = child[None]
+                xml += (f'<{segment} wstop:topic="true"><tt:MessageDescription IsProperty="true"><tt:Source><tt:SimpleItemDescription Name="{source_name}" Type="tt:ReferenceToken"/></tt:Source>'
+                        f'<tt:Data><tt:SimpleItemDescription Name="{data_name}" Type="xs:boolean"/></tt:Data></tt:MessageDescription></{segment}>')
+            else:
+                xml += f"<{segment}>{render(child)}</{segment}>"
+        return xml
+    return f"<wstop:TopicSet>{render(tree)}</wstop:TopicSet>"
+
+async def gather(coroutines : list) -> list:
+    return await asyncio.gather(*coroutines)
+
+def match_topic(topic : str,expressions : list) -> bool:
+    """
+    Matches a topic to ConcreteSet expressions, concrete topics and topics ending with //.
+    """
+    if not expressions: return True
+    for expression in expressions:
+        if expression.endswith("//."):
+            if topic == expression[:-3] or topic.startswith(expression[:-3] + "/"): return True
+        elif topic == expression:
+            return True
+    return False
+
+class PullPoint:
+    def __init__(self,pull_point_id : int,termination_time : float,topic_expressions = None) -> None:
+        self.pull_point_id = pull_point_id
+        self.termination_time = termination_time
+        self.topic_expressions = topic_expressions or []
+        # time.time() of the last generated event
+        self.event_time = time.time()
+        self.event_index = 0
+        self.pending_events = 0.0
+
+class SimulatedCamera:
+    def __init__(self,host = "127.0.0.1",port = 0,latency = 0.0,jitter = 0.0,fault_rate = 0.0,event_rate = 1.0,snapshot_size = 64 * 1024,name = "Camera") -> None:
+        """
+        - requirements:
+            - host, port [str, int] : listening address, port 0 picks a free port
+            - latency, jitter [float] : seconds, every response is delayed by latency +- a uniform jitter
+            - fault_rate [float] : 0..1, share of requests answered with a SOAP fault
+            - event_rate [float] : generated events per second of every pull point subscription
+            - snapshot_size [int] : bytes of the snapshot image
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.fault_rate = fault_rate
+        self.event_rate = event_rate
+        self.snapshot_size = snapshot_size
+        self.name = name
+        self.server = None
+        self.pull_points = {}
+        self.pull_point_ids = itertools.count(1)
+        self.random = random.Random()
+        # PTZ state, the position moves with the velocity of the last ContinuousMove
+        self.ptz_position = [0.0, 0.0, 0.0]
+        self.ptz_velocity = [0.0, 0.0, 0.0]
+        self.ptz_time = time.monotonic()
+        self.request_counts = {}
+        self.fault_count = 0
+        self.connection_count = 0
+        self.writers = set()
+
+    def get_base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def get_xaddr(self,service : str) -> str:
+        return f"{self.get_base_url()}/onvif/{service}"
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self.server != None:
+            self.server.close()
+            # kept alive client connections are closed too, wait_closed waits for them
+            for writer in list(self.writers): writer.close()
+            await self.server.wait_closed()
+
+    async def handle_connection(self,reader,writer) -> None:
+        self.connection_count += 1
+        self.writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line: break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""): break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+                status, content_type, response = await self.handle_request(method, path, body)
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(response)}\r\n\r\n".encode("latin-1") + response)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close": break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    async def handle_request(self,method : str,path : str,body : bytes) -> tuple:
+        delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        if delay: await asyncio.sleep(delay)
+        if method == "GET" and path.startswith("/onvif/snapshot"):
+            self.request_counts["Snapshot"] = self.request_counts.get("Snapshot", 0) + 1
+            return "200 OK", "image/jpeg", self.get_snapshot()
+        try:
+            operation = etree.fromstring(body).find("{%s}Body" % SOAP_ENV_NS)[0]
+        except Exception:
+            return "400 Bad Request", "text/plain", b"Bad Request"
+        qname = etree.QName(operation)
+        self.request_counts[qname.localname] = self.request_counts.get(qname.localname, 0) + 1
+        if self.fault_rate and self.random.random() < self.fault_rate:
+            self.fault_count += 1
+            return "500 Internal Server Error", "application/soap+xml; charset=utf-8", fault("ter:Action", "Simulated fault")
+        handler = getattr(self, "on_" + qname.localname, None)
+        try:
+            if handler == None: response = envelope(f'<r:{qname.localname}Response xmlns:r="{qname.namespace}"/>')
+            elif asyncio.iscoroutinefunction(handler): response = await handler(operation, path)
+            else: response = handler(operation, path)
+        except SimulatorFault as emsg:
+            self.fault_count += 1
+            return "500 Internal Server Error", "application/soap+xml; charset=utf-8", fault(emsg.subcode, emsg.reason)
+        return "200 OK", "application/soap+xml; charset=utf-8", response
+
+    def get_snapshot(self) -> bytes:
+        # jpeg start and end of image markers around a filler payload
+        return b"\xff\xd8" + bytes(max(0, self.snapshot_size - 4)) + b"\xff\xd9"
+
+    # Device service
+    def on_GetSystemDateAndTime(self,operation,path : str) -> bytes:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return envelope(f'<tds:GetSystemDateAndTimeResponse><tds:SystemDateAndTime><tt:DateTimeType>NTP</tt:DateTimeType><tt:DaylightSavings>false</tt:DaylightSavings>'
+                        f'<tt:UTCDateTime><tt:Time><tt:Hour>{now.hour}</tt:Hour><tt:Minute>{now.minute}</tt:Minute><tt:Second>{now.second}</tt:Second></tt:Time>'
+                        f'<tt:Date><tt:Year>{now.year}</tt:Year><tt:Month>{now.month}</tt:Month><tt:Day>{now.day}</tt:Day></tt:Date></tt:UTCDateTime>'
+                        f'</tds:SystemDateAndTime></tds:GetSystemDateAndTimeResponse>')
+
+    def on_GetDeviceInformation(self,operation,path : str) -> bytes:
+        return envelope(f'<tds:GetDeviceInformationResponse><tds:Manufacturer>Simulator</tds:Manufacturer><tds:Model>{self.name}</tds:Model>'
+                        f'<tds:FirmwareVersion>1.0</tds:FirmwareVersion><tds:SerialNumber>{self.host}-{self.port}</tds:SerialNumber><tds:HardwareId>1</tds:HardwareId>'
+                        f'</tds:GetDeviceInformationResponse>')
+
+    def on_GetCapabilities(self,operation,path : str) -> bytes:
+        return envelope(f'<tds:GetCapabilitiesResponse><tds:Capabilities>'
+                        f'<tt:Analytics><tt:XAddr>{self.get_xaddr("analytics_service")}</tt:XAddr><tt:RuleSupport>true</tt:RuleSupport><tt:AnalyticsModuleSupport>true</tt:AnalyticsModuleSupport></tt:Analytics>'
+                        f'<tt:Device><tt:XAddr>{self.get_xaddr("device_service")}</tt:XAddr></tt:Device>'
+                        f'<tt:Events><tt:XAddr>{self.get_xaddr("events_service")}</tt:XAddr><tt:WSSubscriptionPolicySupport>false</tt:WSSubscriptionPolicySupport>'
+                        f'<tt:WSPullPointSupport>true</tt:WSPullPointSupport><tt:WSPausableSubscriptionManagerInterfaceSupport>false</tt:WSPausableSubscriptionManagerInterfaceSupport></tt:Events>'
+                        f'<tt:Imaging><tt:XAddr>{self.get_xaddr("imaging_service")}</tt:XAddr></tt:Imaging>'
+                        f'<tt:Media><tt:XAddr>{self.get_xaddr("media_service")}</tt:XAddr><tt:StreamingCapabilities><tt:RTPMulticast>false</tt:RTPMulticast>'
+                        f'<tt:RTP_TCP>true</tt:RTP_TCP><tt:RTP_RTSP_TCP>true</tt:RTP_RTSP_TCP></tt:StreamingCapabilities></tt:Media>'
+                        f'<tt:PTZ><tt:XAddr>{self.get_xaddr("ptz_service")}</tt:XAddr></tt:PTZ>'
+                        f'</tds:Capabilities></tds:GetCapabilitiesResponse>')
+
+    def on_GetServices(self,operation,path : str) -> bytes:
+        services = "".join(f'<tds:Service><tds:Namespace>{namespace}</tds:Namespace><tds:XAddr>{self.get_xaddr(service)}</tds:XAddr>'
+                           f'<tds:Version><tt:Major>{major}</tt:Major><tt:Minor>0</tt:Minor></tds:Version></tds:Service>' for service, (namespace, major) in SERVICES.items())
+        return envelope(f"<tds:GetServicesResponse>{services}</tds:GetServicesResponse>")
+
+    def on_GetServiceCapabilities(self,operation,path : str) -> bytes:
+        namespace = etree.QName(operation).namespace
+        if namespace == TEV_NS:
+            capabilities = '<tev:Capabilities WSSubscriptionPolicySupport="false" WSPullPointSupport="true" WSPausableSubscriptionManagerInterfaceSupport="false" MaxPullPoints="16" PersistentNotificationStorage="false"/>'
+        elif namespace == TRT_NS:
+            capabilities = '<trt:Capabilities SnapshotUri="true" Rotation="false"><trt:ProfileCapabilities MaximumNumberOfProfiles="2"/><trt:StreamingCapabilities RTPMulticast="false" RTP_TCP="true" RTP_RTSP_TCP="true"/></trt:Capabilities>'
+        elif namespace == TPTZ_NS:
+            capabilities = '<tptz:Capabilities EFlip="false" Reverse="false" GetCompatibleConfigurations="true" MoveStatus="true" StatusPosition="true"/>'
+        elif namespace == TAN_NS:
+            capabilities = '<tan:Capabilities RuleSupport="true" AnalyticsModuleSupport="true" CellBasedSceneDescriptionSupported="true"/>'
+        elif namespace == TIMG_NS:
+            capabilities = '<timg:Capabilities ImageStabilization="false" Presets="false"/>'
+        else:
+            capabilities = f'<r:Capabilities xmlns:r="{namespace}"/>'
+        return envelope(f'<r:GetServiceCapabilitiesResponse xmlns:r="{namespace}">{capabilities}</r:GetServiceCapabilitiesResponse>')
+
+    # Media service
+    def get_profile(self,token : str) -> str:
+        return (f'<tt:Name>{token}</tt:Name>'
+                f'<tt:VideoSourceConfiguration token="VideoSourceConfig_1"><tt:Name>VideoSourceConfig_1</tt:Name><tt:UseCount>2</tt:UseCount><tt:SourceToken>VideoSource_1</tt:SourceToken>'
+                f'<tt:Bounds x="0" y="0" width="1920" height="1080"/></tt:VideoSourceConfiguration>'
+                f'<tt:VideoEncoderConfiguration token="VideoEncoder_{token}"><tt:Name>VideoEncoder_{token}</tt:Name><tt:UseCount>1</tt:UseCount><tt:Encoding>H264</tt:Encoding>'
+                f'<tt:Resolution><tt:Width>1920</tt:Width><tt:Height>1080</tt:Height></tt:Resolution><tt:Quality>5</tt:Quality></tt:VideoEncoderConfiguration>'
+                f'<tt:PTZConfiguration token="PTZConfig_1"><tt:Name>PTZConfig_1</tt:Name><tt:UseCount>2</tt:UseCount><tt:NodeToken>PTZNode_1</tt:NodeToken></tt:PTZConfiguration>')
+
+    def on_GetProfiles(self,operation,path : str) -> bytes:
+        profiles = "".join(f'<trt:Profiles token="{token}" fixed="true">{self.get_profile(token)}</trt:Profiles>' for token in PROFILE_TOKENS)
+        return envelope(f"<trt:GetProfilesResponse>{profiles}</trt:GetProfilesResponse>")
+
+    def on_GetProfile(self,operation,path : str) -> bytes:
+        token = operation.findtext("{%s}ProfileToken" % TRT_NS) or PROFILE_TOKENS[0]
+        return envelope(f'<trt:GetProfileResponse><trt:Profile token="{token}" fixed="true">{self.get_profile(token)}</trt:Profile></trt:GetProfileResponse>')
+
+    def get_media_uri(self,uri : str) -> str:
+        return f'<trt:MediaUri><tt:Uri>{uri}</tt:Uri><tt:InvalidAfterConnect>false</tt:InvalidAfterConnect><tt:InvalidAfterReboot>false</tt:InvalidAfterReboot><tt:Timeout>PT0S</tt:Timeout></trt:MediaUri>'
+
+    def on_GetStreamUri(self,operation,path : str) -> bytes:
+        token = operation.findtext("{%s}ProfileToken" % TRT_NS) or PROFILE_TOKENS[0]
+        return envelope(f"<trt:GetStreamUriResponse>{self.get_media_uri(f'rtsp://{self.host}:554/{token}')}</trt:GetStreamUriResponse>")
+
+    def on_GetSnapshotUri(self,operation,path : str) -> bytes:
+        token = operation.findtext("{%s}ProfileToken" % TRT_NS) or PROFILE_TOKENS[0]
+        return envelope(f"<trt:GetSnapshotUriResponse>{self.get_media_uri(f'{self.get_base_url()}/onvif/snapshot/{token}')}</trt:GetSnapshotUriResponse>")
+
+    # PTZ service
+    def update_ptz_position(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.ptz_time
+        self.ptz_time = now
+        for axis in range(3):
+            low = 0.0 if axis == 2 else -1.0
+            self.ptz_position[axis] = min(1.0, max(low, self.ptz_position[axis] + self.ptz_velocity[axis] * elapsed))
+
+    def on_ContinuousMove(self,operation,path : str) -> bytes:
+        self.update_ptz_position()
+        velocity = operation.find("{%s}Velocity" % TPTZ_NS)
+        pan_tilt = velocity.find("{%s}PanTilt" % TT_NS) if velocity != None else None
+        zoom = velocity.find("{%s}Zoom" % TT_NS) if velocity != None else None
+        self.ptz_velocity = [float(pan_tilt.get("x", 0)) if pan_tilt != None else 0.0, float(pan_tilt.get("y", 0)) if pan_tilt != None else 0.0,
+                             float(zoom.get("x", 0)) if zoom != None else 0.0]
+        return envelope("<tptz:ContinuousMoveResponse/>")
+
+    def on_Stop(self,operation,path : str) -> bytes:
+        self.update_ptz_position()
+        self.ptz_velocity = [0.0, 0.0, 0.0]
+        return envelope("<tptz:StopResponse/>")
+
+    def on_GetStatus(self,operation,path : str) -> bytes:
+        self.update_ptz_position()
+        pan_tilt_status = "MOVING" if self.ptz_velocity[0] or self.ptz_velocity[1] else "IDLE"
+        zoom_status = "MOVING" if self.ptz_velocity[2] else "IDLE"
+        return envelope(f'<tptz:GetStatusResponse><tptz:PTZStatus><tt:Position><tt:PanTilt x="{self.ptz_position[0]:.4f}" y="{self.ptz_position[1]:.4f}"/><tt:Zoom x="{self.ptz_position[2]:.4f}"/></tt:Position>'
+                        f'<tt:MoveStatus><tt:PanTilt>{pan_tilt_status}</tt:PanTilt><tt:Zoom>{zoom_status}</tt:Zoom></tt:MoveStatus><tt:UtcTime>{format_time(time.time())}</tt:UtcTime>'
+                        f'</tptz:PTZStatus></tptz:GetStatusResponse>')
+
+    # Imaging service
+    def on_GetImagingSettings(self,operation,path : str) -> bytes:
+        return envelope('<timg:GetImagingSettingsResponse><timg:ImagingSettings><tt:Brightness>50</tt:Brightness><tt:ColorSaturation>50</tt:ColorSaturation>'
+                        '<tt:Contrast>50</tt:Contrast><tt:IrCutFilter>AUTO</tt:IrCutFilter><tt:Sharpness>50</tt:Sharpness></timg:ImagingSettings></timg:GetImagingSettingsResponse>')
+
+    # Analytics service
+    def on_GetRules(self,operation,path : str) -> bytes:
+        return envelope('<tan:GetRulesResponse><tan:Rule Name="MyMotionDetectorRule" Type="tt:CellMotionDetector"><tt:Parameters>'
+                        '<tt:SimpleItem Name="MinCount" Value="5"/><tt:SimpleItem Name="AlarmOnDelay" Value="1000"/><tt:SimpleItem Name="AlarmOffDelay" Value="1000"/>'
+                        '<tt:SimpleItem Name="ActiveCells" Value="0P8A8A=="/></tt:Parameters></tan:Rule></tan:GetRulesResponse>')
+
+    def on_GetAnalyticsModules(self,operation,path : str) -> bytes:
+        return envelope('<tan:GetAnalyticsModulesResponse><tan:AnalyticsModule Name="MyCellMotionModule" Type="tt:CellMotionEngine"><tt:Parameters>'
+                        '<tt:SimpleItem Name="Sensitivity" Value="50"/></tt:Parameters></tan:AnalyticsModule></tan:GetAnalyticsModulesResponse>')
+
+    # Event service
+    def on_GetEventProperties(self,operation,path : str) -> bytes:
+        return envelope(f'<tev:GetEventPropertiesResponse><tev:TopicNamespaceLocation>http://www.onvif.org/onvif/ver10/topics/topicns.xml</tev:TopicNamespaceLocation>'
+                        f'<wsnt:FixedTopicSet>true</wsnt:FixedTopicSet>{get_topic_set()}'
+                        f'<wsnt:TopicExpressionDialect>http://www.onvif.org/ver10/tev/topicExpression/ConcreteSet</wsnt:TopicExpressionDialect>'
+                        f'<wsnt:TopicExpressionDialect>http://docs.oasis-open.org/wsn/t-1/TopicExpression/Concrete</wsnt:TopicExpressionDialect>'
+                        f'<tev:MessageContentFilterDialect>http://www.onvif.org/ver10/tev/messageContentFilter/ItemFilter</tev:MessageContentFilterDialect>'
+                        f'<tev:MessageContentSchemaLocation>http://www.onvif.org/onvif/ver10/schema/onvif.xsd</tev:MessageContentSchemaLocation>'
+                        f'</tev:GetEventPropertiesResponse>')
+
+    def get_pull_point(self,path : str) -> PullPoint:
+        try:
+            pull_point = self.pull_points.get(int(path.rstrip("/").rsplit("/", 1)[1]))
+        except ValueError:
+            pull_point = None
+        if pull_point == None or pull_point.termination_time < time.time():
+            if pull_point != None: del self.pull_points[pull_point.pull_point_id]
+            raise SimulatorFault("ter:InvalidArgVal", "Resource unknown")
+        return pull_point
+
+    def on_CreatePullPointSubscription(self,operation,path : str) -> bytes:
+        now = time.time()
+        lifetime = parse_duration(operation.findtext("{%s}InitialTerminationTime" % TEV_NS), 60.0)
+        topic_expression = operation.findtext("{%s}Filter/{%s}TopicExpression" % (TEV_NS, WSNT_NS))
+        topic_expressions = [expression.strip() for expression in (topic_expression or "").split("|") if expression.strip()]
+        pull_point = PullPoint(next(self.pull_point_ids), now + lifetime, topic_expressions)
+        self.pull_points[pull_point.pull_point_id] = pull_point
+        return envelope(f'<tev:CreatePullPointSubscriptionResponse><tev:SubscriptionReference><wsa:Address>{self.get_xaddr("pullpoint")}/{pull_point.pull_point_id}</wsa:Address>'
+                        f'</tev:SubscriptionReference><wsnt:CurrentTime>{format_time(now)}</wsnt:CurrentTime><wsnt:TerminationTime>{format_time(pull_point.termination_time)}</wsnt:TerminationTime>'
+                        f'</tev:CreatePullPointSubscriptionResponse>')
+
+    def on_Renew(self,operation,path : str) -> bytes:
+        pull_point = self.get_pull_point(path)
+        now = time.time()
+        pull_point.termination_time = now + parse_duration(operation.findtext("{%s}TerminationTime" % WSNT_NS), 60.0)
+        return envelope(f'<wsnt:RenewResponse><wsnt:TerminationTime>{format_time(pull_point.termination_time)}</wsnt:TerminationTime>'
+                        f'<wsnt:CurrentTime>{format_time(now)}</wsnt:CurrentTime></wsnt:RenewResponse>')
+
+    def on_Unsubscribe(self,operation,path : str) -> bytes:
+        pull_point = self.get_pull_point(path)
+        del self.pull_points[pull_point.pull_point_id]
+        return envelope("<wsnt:UnsubscribeResponse/>")
+
+    def get_events(self,pull_point : PullPoint,message_limit : int) -> list:
+        now = time.time()
+        pull_point.pending_events += (now - pull_point.event_time) * self.event_rate
+        pull_point.event_time = now
+        count = min(int(pull_point.pending_events), message_limit)
+        pull_point.pending_events -= count
+        # events the limit left out are not kept, like a device whose pull point queue overflows
+        pull_point.pending_events = min(pull_point.pending_events, float(message_limit))
+        messages = []
+        for _ in range(count):
+            topic, source_name, data_name = EVENT_TOPICS[pull_point.event_index % len(EVENT_TOPICS)]
+            state = "true" if (pull_point.event_index // len(EVENT_TOPICS)) % 2 == 0 else "false"
+            pull_point.event_index += 1
+            if not match_topic(topic, pull_point.topic_expressions): continue
+            messages.append(f'<wsnt:NotificationMessage><wsnt:Topic Dialect="http://www.onvif.org/ver10/tev/topicExpression/ConcreteSet">{topic}</wsnt:Topic>'
+                            f'<wsnt:Message><tt:Message UtcTime="{format_time(now)}" PropertyOperation="Changed"><tt:Source><tt:SimpleItem Name="{source_name}" Value="VideoSource_1"/></tt:Source>'
+                            f'<tt:Data><tt:SimpleItem Name="{data_name}" Value="{state}"/></tt:Data></tt:Message></wsnt:Message></wsnt:NotificationMessage>')
+        return messages
+
+    async def on_PullMessages(self,operation,path : str) -> bytes:
+        pull_point = self.get_pull_point(path)
+        timeout = min(MAX_PULL_TIMEOUT, parse_duration(operation.findtext("{%s}Timeout" % TEV_NS), 10.0))
+        message_limit = int(operation.findtext("{%s}MessageLimit" % TEV_NS) or 1)
+        end_time = time.monotonic() + timeout
+        # returns as soon as at least one event is available, or empty after the timeout
+        messages = self.get_events(pull_point, message_limit)
+        while not messages and time.monotonic() < end_time:
+            next_event = (1.0 - pull_point.pending_events) / self.event_rate if self.event_rate > 0 else timeout
+            await asyncio.sleep(max(0.001, min(next_event, end_time - time.monotonic())))
+            messages = self.get_events(pull_point, message_limit)
+        now = time.time()
+        return envelope(f'<tev:PullMessagesResponse><tev:CurrentTime>{format_time(now)}</tev:CurrentTime><tev:TerminationTime>{format_time(pull_point.termination_time)}</tev:TerminationTime>'
+                        f'{"".join(messages)}</tev:PullMessagesResponse>')
+
+class SimulatorFault(Exception):
+    def __init__(self,subcode : str,reason : str) -> None:
+        super().__init__(reason)
+        self.subcode = subcode
+        self.reason = reason
+
+class OnvifSimulator:
+    def __init__(self) -> None:
+        self.cameras = []
+        self.loop = None
+        self.thread = None
+
+    def start(self,camera_count = 1,host = "127.0.0.1",start_port = 0,**camera_options) -> list:
+        """
+        Starts the event loop thread and camera_count cameras.
+        - requirements:
+            - host [str] : listening host of the cameras
+            - start_port [int] : port of the first camera, the next cameras use the next ports; 0 picks free ports
+            - camera_options : latency, jitter, fault_rate, event_rate and snapshot_size of SimulatedCamera
+        - return:
+            - cameras [list] : SimulatedCamera objects
+        """
+        if self.loop == None:
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target = self.loop.run_forever,name = "onvif_simulator",daemon = True)
+            self.thread.start()
+        cameras = [SimulatedCamera(host = host,port = start_port + index if start_port else 0,name = f"Camera_{len(self.cameras) + index + 1}",**camera_options)
+                   for index in range(camera_count)]
+        asyncio.run_coroutine_threadsafe(gather([camera.start() for camera in cameras]), self.loop).result()
+        self.cameras.extend(cameras)
+        return cameras
+
+    def get_devices(self,username = "admin",password = "admin") -> list:
+        """
+        Returns (ip, port, username, password) of every camera, the device list of FleetManager.
+        """
+        return [(camera.host, camera.port, username, password) for camera in self.cameras]
+
+    def stop(self) -> None:
+        if self.loop == None: return
+        asyncio.run_coroutine_threadsafe(gather([camera.stop() for camera in self.cameras]), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.loop = None
+        self.cameras = []
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Simulated Onvif cameras")
+    parser.add_argument("--cameras", type = int, default = 1)
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8000, help = "port of the first camera")
+    parser.add_argument("--latency", type = float, default = 0.0, help = "response latency in seconds")
+    parser.add_argument("--jitter", type = float, default = 0.0, help = "response latency jitter in seconds")
+    parser.add_argument("--fault-rate", type = float, default = 0.0, help = "share of requests answered with a SOAP fault")
+    parser.add_argument("--event-rate", type = float, default = 1.0, help = "events per second of every pull point")
+    parser.add_argument("--snapshot-size", type = int, default = 64 * 1024, help = "snapshot size in bytes")
+    args = parser.parse_args()
+    simulator = OnvifSimulator()
+    simulator.start(camera_count = args.cameras,host = args.host,start_port = args.port,latency = args.latency,jitter = args.jitter,
+                    fault_rate = args.fault_rate,event_rate = args.event_rate,snapshot_size = args.snapshot_size)
+    print(f"{args.cameras} simulated cameras on {args.host}:{args.port}-{args.port + args.cameras - 1}, Ctrl+C to stop")
+    try:
+        while True: time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.stop()
@@ -0,0 +1,58 @@
+"""
+Created to test that EventSubscriptionManager keeps more devices than workers subscribed against simulated cameras.
+
+Every PullMessages blocks its worker for the whole pull_timeout since the cameras send no events, the subscriptions only stay
+alive when their Renew is started ahead of the due pulls. The test fails when a device had to be subscribed again.
+
+    python tester/event_subscription_manager_tester.py
+
+craeted by : enstns
+created time : 18.10.26
+"""
+import logging
+import os
+import sys
+import time
+
+# setting path
+parent_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_directory)
+
+from simulator.onvif_simulator import OnvifSimulator
+from lib.event_subscription_manager import EventSubscriptionManager
+from lib.log_config import set_log_level
+from lib.onvif import OnvifService
+
+CAMERA_COUNT = 24
+MAX_WORKERS = 4
+PULL_TIMEOUT = "PT2S"
+TERMINATION_TIME = "PT10S"
+# seconds, three lifetimes of the subscriptions
+TEST_DURATION = 30
+
+set_log_level(logging.WARNING)
+
+simulator = OnvifSimulator()
+cameras = simulator.start(camera_count = CAMERA_COUNT,event_rate = 0.0)
+manager = EventSubscriptionManager(max_workers = MAX_WORKERS,pull_timeout = PULL_TIMEOUT,termination_time = TERMINATION_TIME)
+for camera in cameras:
+    onvif_device = OnvifService(ip = camera.host,port = camera.port,username = "admin",password = "admin")
+    onvif_device.wsdl_directory = parent_directory + "/wsdl"
+    onvif_device.con_xaddr = camera.get_xaddr("device_service")
+    onvif_device.connect_onvif()
+    manager.add_device(onvif_device)
+
+print(f"Start to Test EventSubscriptionManager with {CAMERA_COUNT} devices and {MAX_WORKERS} workers for {TEST_DURATION} s...")
+manager.start()
+time.sleep(TEST_DURATION)
+status = manager.get_status()
+manager.stop()
+simulator.stop()
+
+failed_devices = [device_status for device_status in status if device_status["subscribe_count"] != 1 or not device_status["active"]]
+for device_status in failed_devices:
+    print(f'{device_status["key"]} subscribed {device_status["subscribe_count"]} times, active : {device_status["active"]}, error : {device_status["error"]}')
+if failed_devices:
+    print(f"FAILED, {len(failed_devices)} of {CAMERA_COUNT} devices were subscribed again..")
+    sys.exit(1)
+print(f"OK, every device kept its subscription..")